@@ -1,4 +1,6 @@
 from airflow import DAG
+from airflow.decorators import task, task_group
+from airflow.exceptions import AirflowSkipException
 from airflow.operators.python import PythonOperator
 from datetime import datetime, timedelta
 import sys
@@ -10,9 +12,11 @@ sys.path.insert(0, '/opt/airflow')
 # Importar las funciones desde scripts
 try:
     from scripts.generacion_datos_sinteticos import generar_datos_sinteticos
-    from scripts.bronze_layer import procesar_a_bronze  # ← NOMBRE CORRECTO
-    from scripts.silver_layer import procesar_a_silver  # ← NOMBRE CORRECTO
+    from scripts.bronze_layer import meses_pendientes_bronze, ingerir_mes_bronze, consolidar_bronze
+    from scripts.silver_layer import meses_pendientes_silver, procesar_mes_silver, consolidar_silver
     from scripts.gold_layer import procesar_a_gold  # ← NOMBRE CORRECTO
+    from scripts.png_gold import generar_png_gold
+    from scripts.manifiesto import SIN_CAMBIOS
 except ImportError as e:
     raise ImportError(f"Error importando módulos: {e}. Verifica que los archivos existan en /opt/airflow/scripts/")
 
@@ -37,29 +41,83 @@ with DAG(
     tags=['donaciones', 'etl', 'airflow'],
 ) as dag:
 
-    # Tarea 1: Generar datos sintéticos
-    generar_datos = PythonOperator(
-        task_id='generar_datos_sinteticos',
-        python_callable=generar_datos_sinteticos
-    )
+    # Tarea 1: Generar datos sintéticos. Si los parámetros y el código no
+    # cambiaron (linaje_raw.json) la tarea queda como skipped y no se
+    # reescribe la capa raw en cada corrida.
+    @task(task_id='generar_datos_sinteticos')
+    def generar_datos_fn():
+        if generar_datos_sinteticos() == SIN_CAMBIOS:
+            raise AirflowSkipException("Parámetros del generador sin cambios desde la última ejecución")
 
-    # Tarea 2: Procesar capa Bronze
-    bronze_task = PythonOperator(
-        task_id='procesar_bronze',
-        python_callable=procesar_a_bronze
-    )
+    generar_datos = generar_datos_fn()
 
-    # Tarea 3: Procesar capa Silver
-    silver_task = PythonOperator(
-        task_id='procesar_silver',
-        python_callable=procesar_a_silver
-    )
+    # Tarea 2: Meses de Año_Mes_Donacion pendientes en Bronze o Silver.
+    # none_failed: corre aunque el generador haya quedado skipped, para
+    # retomar meses que una corrida anterior haya dejado pendientes.
+    @task(trigger_rule='none_failed')
+    def listar_meses_pendientes():
+        return sorted(set(meses_pendientes_bronze()) | set(meses_pendientes_silver()))
+
+    # Tarea 3: Bronze -> Silver por mes (mapeo dinámico: una instancia por mes).
+    # Cada mes solo escribe sus propios archivos, así que los meses corren en
+    # paralelo en los workers y un fallo se reintenta solo para ese mes. Un
+    # mes ya consolidado en una capa deja esa tarea como skipped; Silver
+    # corre igual (none_failed) y recibe None como resultado de Bronze.
+    @task
+    def bronze_mes(mes):
+        resultado = ingerir_mes_bronze(mes)
+        if resultado is None:
+            raise AirflowSkipException(f"{mes} ya consolidado en Bronze")
+        return resultado
+
+    @task(trigger_rule='none_failed')
+    def silver_mes(mes, bronze):
+        silver = procesar_mes_silver(mes)
+        if silver is None:
+            raise AirflowSkipException(f"{mes} ya consolidado en Silver")
+        return {'mes': mes, 'bronze': bronze, 'silver': silver}
+
+    @task_group(group_id='procesar_particion')
+    def procesar_particion(mes):
+        return silver_mes(mes, bronze_mes(mes))
 
-    # Tarea 4: Procesar capa Gold
-    gold_task = PythonOperator(
-        task_id='procesar_gold',
-        python_callable=procesar_a_gold
+    # Tareas 4 y 5: reducción de las particiones (estado de fuga y manifiestos).
+    # none_failed: sin meses pendientes el mapeo queda vacío (skipped) y la
+    # reducción corre igual; sin meses nuevos que consolidar queda skipped y
+    # la cadena igual llega a Gold, que retoma meses que haya dejado pendientes.
+    @task(trigger_rule='none_failed')
+    def consolidar_bronze_task(particiones):
+        if consolidar_bronze([particion['bronze'] for particion in particiones]) == SIN_CAMBIOS:
+            raise AirflowSkipException("Sin meses nuevos que consolidar en Bronze")
+
+    @task(trigger_rule='none_failed')
+    def consolidar_silver_task(particiones):
+        if consolidar_silver([particion['silver'] for particion in particiones]) == SIN_CAMBIOS:
+            raise AirflowSkipException("Sin meses nuevos que consolidar en Silver")
+
+    # Tarea 6: Procesar capa Gold (incremental: suma el aporte de los meses nuevos).
+    # Si Silver no cambió desde la última corrida (linaje_gold.json) la tarea
+    # queda como skipped en vez de recalcular. Los PNG no se generan acá
+    # (png="omitir"): Gold termina al escribir los Parquet.
+    @task(task_id='procesar_gold', trigger_rule='none_failed')
+    def gold_task_fn():
+        if procesar_a_gold(incremental=True, png="omitir") == SIN_CAMBIOS:
+            raise AirflowSkipException("Entradas de Gold sin cambios desde la última ejecución")
+
+    gold_task = gold_task_fn()
+
+    # Tarea 7 (opcional): PNG de las tablas Gold desde sus Parquet. Si Gold
+    # quedó como skipped esta también; un fallo acá no afecta a las tablas.
+    png_gold = PythonOperator(
+        task_id='generar_png_gold',
+        python_callable=generar_png_gold
     )
 
     # Flujo de ejecución
-    generar_datos >> bronze_task >> silver_task >> gold_task
\ No newline at end of file
+    meses = listar_meses_pendientes()
+    particiones = procesar_particion.expand(mes=meses)
+    bronze_consolidado = consolidar_bronze_task(particiones)
+    silver_consolidado = consolidar_silver_task(particiones)
+
+    generar_datos >> meses
+    bronze_consolidado >> silver_consolidado >> gold_task >> png_gold
@@ -0,0 +1,318 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# Benchmark del pipeline por escala: para cada cantidad de socios nuevos por
+# mes genera un dataset con generar_datos_sinteticos en un proyecto temporal
+# (copia de scripts/ con su propia carpeta layer/) y mide cada paso en un
+# proceso separado, así el RSS pico de un paso no arrastra el del anterior.
+#
+# Uso:
+#   python benchmarks/benchmark_pipeline.py                        # escalas por defecto
+#   python benchmarks/benchmark_pipeline.py --escalas 1000 1000000
+#   python benchmarks/benchmark_pipeline.py --guardar-linea-base   # fija la línea base
+#   python benchmarks/benchmark_pipeline.py --trabajadores 4       # generador con 4 procesos
+#   python benchmarks/benchmark_pipeline.py --ci --escalas 1000 10000
+#
+# El resultado se escribe en JSON y se compara con la línea base
+# (benchmarks/linea_base.json); si un paso supera la tolerancia de tiempo o
+# de memoria se informa como regresión y el proceso termina con código 1.
+# Los tiempos se comparan relativos a un paso de calibración fijo (calibrar),
+# medido en la misma máquina, y no en segundos absolutos; si la máquina no es
+# la de la línea base (plataforma o CPUs), las regresiones de tiempo solo se
+# avisan. Con --ci (o la variable de entorno CI) también falla si no hay
+# línea base o si una escala medida no figura en ella, en vez de solo avisar.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROYECTO_DIR = os.path.dirname(BASE_DIR)
+LINEA_BASE = os.path.join(BASE_DIR, "linea_base.json")
+RESULTADO = os.path.join(BASE_DIR, "resultado.json")
+
+ESCALAS = [1_000, 10_000, 100_000]  # las de la línea base versionada
+PASOS = ['generar', 'bronze', 'silver', 'gold', 'dashboard']
+
+# Carpeta cuyo tamaño se informa como salida de cada paso
+SALIDAS = {
+    'generar': os.path.join("layer", "raw"),
+    'bronze': os.path.join("layer", "bronze"),
+    'silver': os.path.join("layer", "silver"),
+    'gold': os.path.join("layer", "gold"),
+    'dashboard': None
+}
+
+# Tolerancias para marcar una regresión frente a la línea base. Los pasos
+# que duran menos que TIEMPO_MINIMO no se comparan por tiempo (ruido).
+TOLERANCIA_TIEMPO = 0.25
+TOLERANCIA_MEMORIA = 0.20
+TIEMPO_MINIMO = 0.5
+
+
+# Repeticiones del paso de calibración (se toma la más rápida)
+REPETICIONES_CALIBRACION = 3
+
+
+# -------------------------------
+# PASO INDIVIDUAL (PROCESO HIJO)
+# -------------------------------
+def ejecutar_paso(paso, proyecto, socios_mensuales, perfil, trabajadores=1):
+    """
+    Ejecuta un paso del pipeline en el proyecto temporal y retorna su tiempo
+    de pared, el RSS pico del proceso y el RSS pico de sus procesos hijos
+    (los del pool del generador con trabajadores > 1). La salida de los
+    scripts se descarta.
+    """
+    sys.path.insert(0, os.path.join(proyecto, "scripts"))
+    # Los logs de las etapas van a stderr (se muestran si el paso falla) o a MEDALLON_LOG_ARCHIVO
+    from instrumentacion import configurar_logging
+    configurar_logging()
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        inicio = time.perf_counter()
+        if paso == 'generar':
+            from generacion_datos_sinteticos import generar_datos_sinteticos
+            generar_datos_sinteticos(perfil=perfil, socios_mensuales=socios_mensuales,
+                                     trabajadores=trabajadores)
+        elif paso == 'bronze':
+            from bronze_layer import procesar_a_bronze
+            procesar_a_bronze(forzar=True)
+        elif paso == 'silver':
+            from silver_layer import procesar_a_silver
+            procesar_a_silver(forzar=True)
+        elif paso == 'gold':
+            from gold_layer import procesar_a_gold
+            procesar_a_gold(forzar=True)
+        else:
+            # Bloque de agregación del dashboard: lectura del cubo y KPIs
+            import pandas as pd
+            from metricas import calcular_metricas
+            cubo = pd.read_parquet(os.path.join(proyecto, "layer", "gold", "cubo_cohortes_gold.parquet"))
+            calcular_metricas(cubo)
+        segundos = time.perf_counter() - inicio
+
+    return {'segundos': round(segundos, 3), 'rss_pico_mb': _rss_pico_mb(),
+            'rss_pico_hijos_mb': _rss_pico_mb(hijos=True)}
+
+
+def calibrar():
+    """
+    Tiempo de un trabajo fijo con las mismas bibliotecas que el pipeline
+    (orden de NumPy, groupby de pandas y escritura/lectura Parquet, en un
+    solo hilo). Los tiempos de los pasos se comparan divididos por este, así
+    que la línea base sirve en máquinas más rápidas o más lentas. Corre en
+    un proceso hijo: en Linux los hijos heredan el RSS pico del padre.
+    """
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'clave': rng.integers(0, 10_000, 2_000_000), 'valor': rng.random(2_000_000)})
+    tiempos = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "calibracion.parquet")
+        for _ in range(REPETICIONES_CALIBRACION):
+            inicio = time.perf_counter()
+            np.sort(df['valor'].to_numpy())
+            df.groupby('clave')['valor'].agg(['sum', 'count'])
+            pq.write_table(pa.Table.from_pandas(df), ruta)
+            pq.read_table(ruta).to_pandas()
+            tiempos.append(time.perf_counter() - inicio)
+    return round(min(tiempos), 4)
+
+
+def _rss_pico_mb(hijos=False):
+    """
+    RSS pico del proceso o, con hijos=True, el mayor entre sus procesos
+    hijos ya terminados (RUSAGE_CHILDREN; 0 si no hubo hijos).
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    quien = resource.RUSAGE_CHILDREN if hijos else resource.RUSAGE_SELF
+    rss = resource.getrusage(quien).ru_maxrss
+    # ru_maxrss viene en KB en Linux y en bytes en macOS
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+# -------------------------------
+# ESCALAS (PROCESO PRINCIPAL)
+# -------------------------------
+def medir_escala(socios_mensuales, perfil, trabajadores=1):
+    """Mide todos los pasos para una escala en un proyecto temporal."""
+    proyecto = tempfile.mkdtemp(prefix=f"benchmark_{socios_mensuales}_")
+    try:
+        shutil.copytree(os.path.join(PROYECTO_DIR, "scripts"), os.path.join(proyecto, "scripts"),
+                        ignore=shutil.ignore_patterns("__pycache__", ".ipynb_checkpoints"))
+        os.makedirs(os.path.join(proyecto, "layer", "raw"))
+
+        pasos = {}
+        for paso in PASOS:
+            salida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--paso", paso, "--proyecto", proyecto,
+                 "--socios", str(socios_mensuales), "--perfil", perfil, "--trabajadores", str(trabajadores)],
+                capture_output=True, text=True
+            )
+            if salida.returncode != 0:
+                raise RuntimeError(f"Falló el paso {paso} con {socios_mensuales} socios/mes:\n{salida.stderr}")
+            medicion = json.loads(salida.stdout.strip().splitlines()[-1])
+            carpeta = SALIDAS[paso]
+            medicion['bytes_salida'] = _tamano(os.path.join(proyecto, carpeta)) if carpeta else 0
+            pasos[paso] = medicion
+            print(f"  {paso:<10} {medicion['segundos']:>9.2f} s  {medicion['rss_pico_mb'] or 0:>9.1f} MB  "
+                  f"{medicion['rss_pico_hijos_mb'] or 0:>9.1f} MB hijos  "
+                  f"{medicion['bytes_salida'] / 1024 ** 2:>9.1f} MB en disco")
+
+        return {'filas_raw': _filas_raw(proyecto), 'pasos': pasos}
+    finally:
+        shutil.rmtree(proyecto, ignore_errors=True)
+
+
+def _calibrar_en_proceso():
+    salida = subprocess.run([sys.executable, os.path.abspath(__file__), "--paso", "calibracion"],
+                            capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def _tamano(ruta):
+    if not os.path.exists(ruta):
+        return 0
+    return sum(os.path.getsize(os.path.join(raiz, nombre))
+               for raiz, _, nombres in os.walk(ruta) for nombre in nombres)
+
+
+def _filas_raw(proyecto):
+    import pyarrow.dataset as ds
+    return ds.dataset(os.path.join(proyecto, "layer", "raw", "datos_donantes_sinteticos.parquet"),
+                      format="parquet").count_rows()
+
+
+def comparar(resultado, linea_base):
+    """
+    Compara cada escala y paso con la línea base. Retorna la lista de
+    regresiones (tiempo o RSS pico, del proceso o de sus hijos, por encima
+    de la tolerancia), la de avisos y la de escalas sin línea base.
+
+    El tiempo de cada paso se compara escalado por la calibración de cada
+    corrida (segundos * calibración base / calibración actual). Si la
+    máquina difiere de la de la línea base (plataforma o cantidad de CPUs)
+    las regresiones de tiempo pasan a avisos: la calibración no corrige,
+    por ejemplo, el paralelismo del generador con otra cantidad de CPUs.
+    """
+    regresiones = []
+    avisos = []
+    sin_base = []
+    escala_tiempo = 1.0
+    if resultado.get('calibracion_segundos') and linea_base.get('calibracion_segundos'):
+        escala_tiempo = linea_base['calibracion_segundos'] / resultado['calibracion_segundos']
+    misma_maquina = all(resultado.get(clave) == linea_base.get(clave) for clave in ('plataforma', 'cpus'))
+    regresiones_tiempo = regresiones if misma_maquina else avisos
+    for escala, medidas in resultado['escalas'].items():
+        base_escala = linea_base['escalas'].get(escala)
+        if base_escala is None:
+            sin_base.append(escala)
+            continue
+        for paso, medida in medidas['pasos'].items():
+            base = base_escala['pasos'].get(paso)
+            if base is None:
+                continue
+            segundos = medida['segundos'] * escala_tiempo
+            if (max(segundos, base['segundos']) >= TIEMPO_MINIMO
+                    and segundos > base['segundos'] * (1 + TOLERANCIA_TIEMPO)):
+                regresiones_tiempo.append(f"{escala} socios/mes, {paso}: {medida['segundos']:.2f} s, "
+                                          f"{segundos:.2f} s calibrados (línea base {base['segundos']:.2f} s)")
+            for clave, nombre in [('rss_pico_mb', 'RSS pico'), ('rss_pico_hijos_mb', 'RSS pico de hijos')]:
+                actual, referencia = medida.get(clave), base.get(clave)
+                if actual and referencia and actual > referencia * (1 + TOLERANCIA_MEMORIA):
+                    regresiones.append(f"{escala} socios/mes, {paso}: {nombre} {actual:.1f} MB "
+                                       f"(línea base {referencia:.1f} MB)")
+    return regresiones, avisos, sin_base
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline por escala y por capa")
+    parser.add_argument("--escalas", type=int, nargs="+", default=ESCALAS,
+                        help="socios nuevos por mes de cada escala")
+    parser.add_argument("--perfil", default="estandar", help="perfil del generador (periodo y fuga)")
+    parser.add_argument("--trabajadores", type=int, default=1, help="procesos del generador")
+    parser.add_argument("--salida", default=RESULTADO, help="archivo JSON de resultados")
+    parser.add_argument("--linea-base", default=LINEA_BASE, help="archivo JSON de línea base")
+    parser.add_argument("--guardar-linea-base", action="store_true",
+                        help="guarda el resultado como nueva línea base")
+    parser.add_argument("--ci", action="store_true", default=bool(os.environ.get("CI")),
+                        help="falla si falta la línea base o alguna escala (por defecto, si CI está definida)")
+    # Uso interno: ejecución de un paso (o de la calibración) en un proceso hijo
+    parser.add_argument("--paso", choices=PASOS + ['calibracion'], help=argparse.SUPPRESS)
+    parser.add_argument("--proyecto", help=argparse.SUPPRESS)
+    parser.add_argument("--socios", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.paso == 'calibracion':
+        print(json.dumps(calibrar()))
+        return 0
+    if args.paso:
+        print(json.dumps(ejecutar_paso(args.paso, args.proyecto, args.socios, args.perfil, args.trabajadores)))
+        return 0
+
+    resultado = {
+        'generado': datetime.now(timezone.utc).isoformat(),
+        'perfil': args.perfil,
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'trabajadores': args.trabajadores,
+        'calibracion_segundos': _calibrar_en_proceso(),
+        'escalas': {}
+    }
+    print(f"Calibración: {resultado['calibracion_segundos']:.2f} s")
+    for escala in args.escalas:
+        print(f"\n--- {escala:,} socios/mes ---")
+        resultado['escalas'][str(escala)] = medir_escala(escala, args.perfil, args.trabajadores)
+
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ Resultados guardados en: {args.salida}")
+
+    if args.guardar_linea_base:
+        shutil.copyfile(args.salida, args.linea_base)
+        print(f"✓ Línea base actualizada: {args.linea_base}")
+        return 0
+
+    if not os.path.exists(args.linea_base):
+        if args.ci:
+            print(f"❌ Sin línea base para comparar ({args.linea_base})")
+            return 1
+        print(f"⚠ Sin línea base para comparar ({args.linea_base}); usar --guardar-linea-base")
+        return 0
+    with open(args.linea_base, encoding="utf-8") as f:
+        linea_base = json.load(f)
+    regresiones, avisos, sin_base = comparar(resultado, linea_base)
+    if avisos:
+        print(f"\n⚠ Máquina distinta a la de la línea base ({linea_base.get('cpus')} CPUs, "
+              f"{linea_base.get('plataforma')}); tiempos por encima de la tolerancia, sin fallar:")
+        for aviso in avisos:
+            print(f" - {aviso}")
+    if sin_base:
+        marca = "❌" if args.ci else "⚠"
+        print(f"{marca} Escalas sin línea base (no se comparan): {', '.join(sin_base)}")
+        if args.ci:
+            return 1
+    if regresiones:
+        print("\n❌ Regresiones frente a la línea base:")
+        for regresion in regresiones:
+            print(f" - {regresion}")
+        return 1
+    print("✓ Sin regresiones frente a la línea base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
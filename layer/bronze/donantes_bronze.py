@@ -1,3 +0,0 @@
-# Archivo indicador para la capa Bronze
-# Generado: 2025-11-18T21:53:01.409596+00:00
-# Contiene: donantes_bronze.parquet (datos crudos procesados)
@@ -1,3 +0,0 @@
-# Archivo indicador para la capa Gold
-# Generado: 2025-11-18T21:53:10.764834+00:00
-# Contiene: suma_montos_gold.parquet, cantidad_personas_gold.parquet y PNGs
@@ -1,3 +0,0 @@
-# Archivo indicador para la capa Silver
-# Generado: 2025-11-18T21:53:02.366333+00:00
-# Contiene: donantes_silver.parquet (datos limpios y pivot mensuales)
@@ -1,21 +1,19 @@
 from scripts.generacion_datos_sinteticos import generar_datos_sinteticos
-from scripts.bronze_layer import procesar_a_bronze
-from scripts.silver_layer import procesar_a_silver
-from scripts.gold_layer import procesar_a_gold
+from scripts.pipeline_memoria import ejecutar_pipeline
+from scripts.instrumentacion import configurar_logging
+from scripts.manifiesto import SIN_CAMBIOS
 
 if __name__ == "__main__":
+    configurar_logging()
     print("Iniciando pipeline ETL Donaciones (modo local)...")
 
-    generar_datos_sinteticos()
-    print("✔ Datos sintéticos generados")
+    if generar_datos_sinteticos() == SIN_CAMBIOS:
+        print("✔ Datos sintéticos vigentes (sin cambios)")
+    else:
+        print("✔ Datos sintéticos generados")
 
-    procesar_a_bronze()
-    print("✔ Capa Bronze procesada")
-
-    procesar_a_silver()
-    print("✔ Capa Silver procesada")
-
-    procesar_a_gold()
-    print("✔ Capa Gold procesada")
+    # Bronze -> Silver -> Gold en memoria; cada capa se persiste en segundo plano
+    ejecutar_pipeline()
+    print("✔ Capas Bronze, Silver y Gold procesadas")
 
     print("✅ Pipeline completo ejecutado correctamente.")
\ No newline at end of file
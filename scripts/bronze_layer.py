@@ -1,12 +1,102 @@
 import os
+import numpy as np
 import pandas as pd
-from datetime import datetime, timezone
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
-def procesar_a_bronze(nombre_archivo="datos_donantes_sinteticos.csv"):
+try:
+    from scripts.manifiesto import (leer_manifiesto, guardar_manifiesto, firma_paso, sin_cambios,
+                                    guardar_linaje, SIN_CAMBIOS)
+    from scripts.instrumentacion import etapa, medir_capa, tamano_en_disco
+except ImportError:  # ejecución directa: python scripts/bronze_layer.py
+    from manifiesto import (leer_manifiesto, guardar_manifiesto, firma_paso, sin_cambios,
+                            guardar_linaje, SIN_CAMBIOS)
+    from instrumentacion import etapa, medir_capa, tamano_en_disco
+
+# Orden de columnas de la capa raw. En el dataset parquet Año_Mes_Donacion
+# viene de la ruta de partición (Hive) y se reubica en su posición original.
+COLUMNAS_RAW = [
+    'Id_donante', 'Método_Pago', 'Estrategia', 'Fecha_Creacion', 'Fecha_Pago',
+    'Monto_Donacion', 'Status_Socio', 'Fecha_Fuga',
+    'Año_Mes_Creacion', 'Año_Mes_Donacion', 'Año_Mes_Fuga'
+]
+PARTICIONES_RAW = ds.partitioning(pa.schema([('Año_Mes_Donacion', pa.string())]), flavor="hive")
+
+# Esquema declarado de la capa Bronze: categóricas de baja cardinalidad como
+# diccionarios, montos int32, fechas date32 y una clave entera del donante
+# derivada de Id_donante ('D000123' -> 123). Se valida al escribir.
+CATEGORIA = pa.dictionary(pa.int8(), pa.string())
+PERIODO = pa.dictionary(pa.int16(), pa.string())
+
+ESQUEMA_BRONZE = pa.schema([
+    ('Id_donante', pa.string()),
+    ('Clave_Donante', pa.int32()),
+    ('Método_Pago', CATEGORIA),
+    ('Estrategia', CATEGORIA),
+    ('Fecha_Creacion', pa.date32()),
+    ('Fecha_Pago', pa.date32()),
+    ('Monto_Donacion', pa.int32()),
+    ('Status_Socio', CATEGORIA),
+    ('Fecha_Fuga', pa.date32()),
+    ('Año_Mes_Creacion', PERIODO),
+    ('Año_Mes_Donacion', PERIODO),
+    ('Año_Mes_Fuga', PERIODO)
+])
+
+COLUMNAS_OBLIGATORIAS = [
+    'Id_donante', 'Clave_Donante', 'Método_Pago', 'Estrategia',
+    'Fecha_Creacion', 'Status_Socio', 'Año_Mes_Creacion'
+]
+VALORES_STATUS = pa.array(['Activo', 'Fugado'])
+
+# Tipos explícitos para leer el CSV por bloques: todos los bloques deben
+# producir el mismo esquema (mismos tipos que infiere pandas.read_csv)
+TIPOS_CSV = {columna: pa.string() for columna in COLUMNAS_RAW}
+TIPOS_CSV['Monto_Donacion'] = pa.float64()
+
+# Modo streaming: filas por lote (row group) y tamaño aproximado de una
+# fila del CSV raw (~92 bytes) para dimensionar los bloques de lectura
+FILAS_POR_LOTE = 250_000
+BYTES_POR_FILA_CSV = 100
+
+# Modo incremental: un archivo Bronze por mes de donación dentro de la carpeta
+# incremental (los socios fugados sin pago van en 'sin_pago-<mes de fuga>'),
+# una tabla con el estado de fuga vigente por socio y el manifiesto con los
+# meses ya ingeridos (marca de agua)
+CARPETA_INCREMENTAL = "donantes_bronze_incremental"
+ARCHIVO_FUGAS = "fugas_bronze.parquet"
+MANIFIESTO = "manifiesto_bronze.json"
+COLUMNAS_FUGA = ['Id_donante', 'Clave_Donante', 'Fecha_Fuga', 'Año_Mes_Fuga']
+
+# Manifiesto de linaje: huella de las entradas, versión del código y filas y
+# esquema de las salidas de la última ejecución (ver manifiesto.firma_paso)
+LINAJE = "linaje_bronze.json"
+
+
+@medir_capa("bronze")
+def procesar_a_bronze(nombre_archivo="datos_donantes_sinteticos.parquet", streaming=False,
+                      filas_por_lote=FILAS_POR_LOTE, incremental=False, forzar=False):
     """
-    Carga el CSV desde /raw y lo transforma a la capa Bronze (Parquet),
-    creando además un archivo indicador para trazabilidad en Airflow.
-    Retorna el DataFrame cargado.
+    Carga los datos desde /raw y los transforma a la capa Bronze (Parquet),
+    registrando el linaje de la ejecución en linaje_bronze.json.
+    Acepta el dataset parquet particionado del generador (tipos nativos, sin
+    parseo de texto) o el CSV histórico.
+
+    Con streaming=True el origen se lee en lotes de `filas_por_lote` filas que
+    se escriben como row groups a medida que llegan, y los totales se acumulan
+    lote a lote: la memoria queda acotada por el tamaño del lote.
+
+    Con incremental=True solo se ingieren los meses de Año_Mes_Donacion que
+    no figuran en el manifiesto de Bronze (ver _ingerir_incremental): el costo
+    de cada ejecución depende de los meses nuevos, no de todo el historial.
+    Si el origen, el código y el modo no cambiaron desde la última ejecución
+    (y las salidas siguen en disco) no se reprocesa nada y se retorna
+    SIN_CAMBIOS; forzar=True ignora el linaje.
+    Retorna el DataFrame cargado (en modo streaming o incremental, el
+    diccionario de totales).
     """
 
     # -------------------------------
@@ -27,38 +117,82 @@ def procesar_a_bronze(nombre_archivo="datos_donantes_sinteticos.csv"):
         raise FileNotFoundError(f"No se encontró el archivo origen: {archivo}")
     print(f"✓ Archivo encontrado en: {archivo}")
 
-    # -------------------------------
-    # CARGAR CSV
-    # -------------------------------
-    df_bronze = pd.read_csv(archivo, encoding="utf-8-sig")
-    print(f"✓ Archivo leído correctamente. Registros cargados: {len(df_bronze)}")
+    if incremental:
+        salidas = [os.path.join(carpeta_bronze, CARPETA_INCREMENTAL), os.path.join(carpeta_bronze, ARCHIVO_FUGAS)]
+    else:
+        salidas = [os.path.join(carpeta_bronze, "donantes_bronze.parquet")]
+    ruta_salida = salidas[0]
 
     # -------------------------------
-    # GUARDAR PARQUET
+    # LINAJE: SALTAR SI NO HAY CAMBIOS
     # -------------------------------
-    ruta_salida = os.path.join(carpeta_bronze, "donantes_bronze.parquet")
-    df_bronze.to_parquet(ruta_salida, index=False)
+    ruta_linaje = os.path.join(carpeta_bronze, LINAJE)
+    firma = firma_paso({'raw': archivo}, base_dir, {'incremental': incremental}, "bronze_layer")
+    if not forzar and sin_cambios(ruta_linaje, firma, salidas):
+        print(f"✓ Origen sin cambios desde la última ejecución, Bronze vigente: {ruta_salida}")
+        return SIN_CAMBIOS
+
+    df_bronze = None
+    if incremental:
+        # -------------------------------
+        # INGESTA INCREMENTAL (SOLO MESES NUEVOS)
+        # -------------------------------
+        with etapa("bronze", "ingesta_incremental") as medicion:
+            totales = _ingerir_incremental(archivo, carpeta_bronze)
+            medicion['filas'] = totales['registros']
+    elif streaming:
+        # -------------------------------
+        # INGESTA POR LOTES (MEMORIA ACOTADA)
+        # -------------------------------
+        with etapa("bronze", "ingesta_lotes") as medicion:
+            totales = _ingerir_por_lotes(archivo, ruta_salida, filas_por_lote)
+            medicion.update(filas=totales['registros'], bytes_leidos=tamano_en_disco(archivo),
+                            bytes_escritos=tamano_en_disco(ruta_salida))
+        print(f"✓ Ingesta por lotes completada. Registros cargados: {totales['registros']} "
+              f"en {totales['lotes']} lotes")
+    else:
+        # -------------------------------
+        # CARGAR PARQUET RAW (TIPADO) O CSV
+        # -------------------------------
+        with etapa("bronze", "lectura") as medicion:
+            tabla = leer_raw(archivo)
+            medicion.update(filas=tabla.num_rows, bytes_leidos=tamano_en_disco(archivo))
+        print(f"✓ Archivo leído correctamente. Registros cargados: {tabla.num_rows}")
+
+    if not streaming and not incremental:
+        # -------------------------------
+        # VALIDAR ESQUEMA Y GUARDAR PARQUET
+        # -------------------------------
+        with etapa("bronze", "esquema", filas=tabla.num_rows):
+            tabla = aplicar_esquema_bronze(tabla)
+        with etapa("bronze", "escritura", filas=tabla.num_rows) as medicion:
+            pq.write_table(tabla, ruta_salida)
+            medicion['bytes_escritos'] = tamano_en_disco(ruta_salida)
+        df_bronze = tabla.to_pandas()
     print(f"✓ Datos guardados en formato Parquet en: {ruta_salida}")
 
     # -------------------------------
-    # ARCHIVO INDICADOR
+    # MANIFIESTO DE LINAJE
     # -------------------------------
-    indicador_py = os.path.join(carpeta_bronze, "donantes_bronze.py")
-    ahora_utc = datetime.now(timezone.utc)
-    with open(indicador_py, "w", encoding="utf-8") as f:
-        f.write("# Archivo indicador para la capa Bronze\n")
-        f.write(f"# Generado: {ahora_utc.isoformat()}\n")
-        f.write("# Contiene: donantes_bronze.parquet (datos crudos procesados)\n")
-    print(f"✓ Archivo indicador creado: {indicador_py}")
+    with etapa("bronze", "linaje"):
+        guardar_linaje(ruta_linaje, firma, salidas)
+    print(f"✓ Linaje registrado en: {ruta_linaje}")
 
     # -------------------------------
     # TOTALES ACUMULADOS (solo Monto_Donacion > 0)
     # -------------------------------
-    transacciones_efectivas = df_bronze[df_bronze['Monto_Donacion'] > 0]
-    total_donaciones = transacciones_efectivas['Monto_Donacion'].sum(skipna=True)
-    total_registros = len(df_bronze)
-    total_transacciones = len(transacciones_efectivas)
-    total_socios_unicos = df_bronze['Id_donante'].nunique()
+    if df_bronze is not None:
+        transacciones_efectivas = df_bronze[df_bronze['Monto_Donacion'] > 0]
+        totales = {
+            'registros': len(df_bronze),
+            'suma_donaciones': transacciones_efectivas['Monto_Donacion'].sum(skipna=True),
+            'transacciones': len(transacciones_efectivas),
+            'socios_unicos': df_bronze['Id_donante'].nunique()
+        }
+    total_donaciones = totales['suma_donaciones']
+    total_registros = totales['registros']
+    total_transacciones = totales['transacciones']
+    total_socios_unicos = totales['socios_unicos']
 
     print("\n--- RESUMEN BRONZE ACUMULADO ---")
     print(f"Suma total Monto_Donacion: {total_donaciones}")
@@ -66,7 +200,313 @@ def procesar_a_bronze(nombre_archivo="datos_donantes_sinteticos.csv"):
     print(f"Total transacciones (>0): {total_transacciones}")
     print(f"Socios únicos: {total_socios_unicos}")
 
-    return df_bronze
+    return df_bronze if df_bronze is not None else totales
+
+
+def aplicar_esquema_bronze(tabla):
+    """
+    Convierte una tabla o record batch con columnas raw al esquema Bronze
+    declarado (ESQUEMA_BRONZE) y lo valida. Lanza ValueError si faltan
+    columnas, si un valor no se puede convertir sin pérdida o si hay nulos
+    o estados inválidos en columnas obligatorias.
+    """
+    faltantes = [c for c in COLUMNAS_RAW if c not in tabla.schema.names]
+    if faltantes:
+        raise ValueError(f"Faltan columnas para el esquema Bronze: {faltantes}")
+
+    columnas = {}
+    for campo in ESQUEMA_BRONZE:
+        nombre = campo.name
+        if nombre == 'Clave_Donante':
+            origen = pc.utf8_slice_codeunits(tabla.column('Id_donante'), 1)
+        else:
+            origen = tabla.column(nombre)
+            if pa.types.is_string(origen.type) and nombre.startswith(('Fecha_', 'Año_Mes_')):
+                # El CSV histórico trae 'NaT' o vacío en periodos sin valor. Solo se
+                # reemplaza si aparecen: if_else sobre chunks con offset (tablas
+                # leídas de un dataset) corrompe los offsets de strings en pyarrow 16
+                vacio = pc.fill_null(pc.is_in(origen, value_set=pa.array(['NaT', ''])), False)
+                if pc.any(vacio).as_py():
+                    origen = pc.if_else(vacio, pa.scalar(None, pa.string()), origen)
+        try:
+            columnas[nombre] = pc.cast(origen, campo.type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            raise ValueError(f"La columna {nombre} no cumple el esquema Bronze ({campo.type}): {e}") from e
+
+    for nombre in COLUMNAS_OBLIGATORIAS:
+        if columnas[nombre].null_count > 0:
+            raise ValueError(f"La columna {nombre} tiene {columnas[nombre].null_count} valores nulos")
+
+    status = pc.cast(columnas['Status_Socio'], pa.string())
+    if not pc.all(pc.is_in(status, value_set=VALORES_STATUS)).as_py():
+        raise ValueError(f"Status_Socio solo admite {VALORES_STATUS.to_pylist()}")
+
+    resultado = type(tabla).from_arrays([columnas[c.name] for c in ESQUEMA_BRONZE], schema=ESQUEMA_BRONZE)
+    if isinstance(resultado, pa.Table):
+        # Un diccionario común por columna: si cambia entre chunks, el writer
+        # de Parquet abandona la codificación por diccionario
+        resultado = resultado.unify_dictionaries()
+    return resultado
+
+
+def leer_raw(archivo):
+    """
+    Lee el origen raw completo (dataset parquet particionado o CSV) como
+    tabla Arrow con las columnas en el orden de COLUMNAS_RAW.
+    """
+    if _es_parquet(archivo):
+        tabla = ds.dataset(archivo, format="parquet", partitioning=PARTICIONES_RAW).to_table()
+        return tabla.select(COLUMNAS_RAW)
+    return pa.Table.from_pandas(pd.read_csv(archivo, encoding="utf-8-sig"), preserve_index=False)
+
+
+def _es_parquet(archivo):
+    return os.path.isdir(archivo) or archivo.endswith(".parquet")
+
+
+def _abrir_lotes_raw(archivo, filas_por_lote):
+    """
+    Abre el origen raw como flujo de record batches.
+    Retorna (esquema, iterador de lotes).
+    """
+    if _es_parquet(archivo):
+        dataset = ds.dataset(archivo, format="parquet", partitioning=PARTICIONES_RAW)
+        esquema = pa.schema([dataset.schema.field(c) for c in COLUMNAS_RAW])
+        return esquema, dataset.to_batches(columns=COLUMNAS_RAW, batch_size=filas_por_lote)
+
+    lector = pa_csv.open_csv(
+        archivo,
+        read_options=pa_csv.ReadOptions(block_size=filas_por_lote * BYTES_POR_FILA_CSV),
+        convert_options=pa_csv.ConvertOptions(column_types=TIPOS_CSV, strings_can_be_null=True)
+    )
+    return lector.schema, lector
+
+
+def _ingerir_por_lotes(archivo, ruta_salida, filas_por_lote):
+    """
+    Copia el origen raw a Bronze lote a lote con un ParquetWriter y acumula
+    los totales del resumen de forma incremental.
+    """
+    _, lotes = _abrir_lotes_raw(archivo, filas_por_lote)
+    totales = {'registros': 0, 'suma_donaciones': 0, 'transacciones': 0, 'socios_unicos': 0, 'lotes': 0}
+    # Socios vistos, indexados por Clave_Donante (entero): un byte por clave
+    # en vez de un string de Python por socio
+    vistos = np.zeros(0, dtype=bool)
+
+    def escribir_row_group(pendientes):
+        # Los lotes pequeños (una partición raw por mes) se agrupan hasta
+        # `filas_por_lote` filas para no fragmentar el archivo en row groups
+        tabla = pa.Table.from_batches(pendientes).unify_dictionaries()
+        escritor.write_table(tabla, row_group_size=tabla.num_rows)
+
+    ruta_temporal = ruta_salida + ".tmp"
+    with pq.ParquetWriter(ruta_temporal, ESQUEMA_BRONZE) as escritor:
+        pendientes, filas_pendientes = [], 0
+        for lote in lotes:
+            if lote.num_rows == 0:
+                continue
+            lote = aplicar_esquema_bronze(lote)
+            pendientes.append(lote)
+            filas_pendientes += lote.num_rows
+            if filas_pendientes >= filas_por_lote:
+                escribir_row_group(pendientes)
+                pendientes, filas_pendientes = [], 0
+
+            monto = lote.column('Monto_Donacion')
+            positivos = pc.filter(monto, pc.greater(monto, 0))
+            totales['registros'] += lote.num_rows
+            totales['suma_donaciones'] += pc.sum(positivos).as_py() or 0
+            totales['transacciones'] += len(positivos)
+            totales['lotes'] += 1
+            claves = lote.column('Clave_Donante').to_numpy()
+            if claves.max() >= len(vistos):
+                # Se duplica el tamaño para no copiar el arreglo en cada lote
+                ampliado = np.zeros(max(int(claves.max()) + 1, 2 * len(vistos)), dtype=bool)
+                ampliado[:len(vistos)] = vistos
+                vistos = ampliado
+            vistos[claves] = True
+        if pendientes:
+            escribir_row_group(pendientes)
+    # Reemplazo atómico: un fallo a mitad de la ingesta no deja Bronze a medias
+    os.replace(ruta_temporal, ruta_salida)
+
+    totales['socios_unicos'] = int(np.count_nonzero(vistos))
+    return totales
+
+
+def _meses_particionados(archivo):
+    """
+    Meses de Año_Mes_Donacion presentes en el dataset raw, leídos de los
+    nombres de las particiones Hive (sin abrir los archivos).
+    """
+    prefijo = "Año_Mes_Donacion="
+    return sorted(
+        nombre[len(prefijo):] for nombre in os.listdir(archivo)
+        if nombre.startswith(prefijo) and not nombre.endswith("__HIVE_DEFAULT_PARTITION__")
+    )
+
+
+def _ingerir_incremental(archivo, carpeta_bronze):
+    """
+    Ingesta incremental: compara los meses del dataset raw con el manifiesto
+    de Bronze e ingiere solo los nuevos, un mes a la vez (_ingerir_mes), y
+    luego consolida el estado de fuga y el manifiesto (_consolidar_bronze).
+    El DAG de Airflow ejecuta los mismos pasos con un mes por tarea
+    (ingerir_mes_bronze + consolidar_bronze).
+
+    Los registros ya ingeridos no se reescriben: las fugas detectadas en los
+    meses nuevos se registran en la tabla de estado por socio (ARCHIVO_FUGAS),
+    que las capas siguientes aplican sobre el historial. Los totales del
+    resumen se acumulan en el manifiesto.
+    """
+    if not os.path.isdir(archivo):
+        raise ValueError(f"El modo incremental requiere el dataset raw particionado por Año_Mes_Donacion: {archivo}")
+
+    nuevos = _meses_pendientes(archivo, carpeta_bronze)
+    if not nuevos:
+        manifiesto = leer_manifiesto(os.path.join(carpeta_bronze, MANIFIESTO))
+        print(f"✓ Sin meses nuevos en raw (marca de agua: {manifiesto['marca_agua']})")
+        return manifiesto.get('totales', _totales_vacios())
+    print(f"✓ Meses nuevos a ingerir: {len(nuevos)} ({nuevos[0]} .. {nuevos[-1]})")
+
+    dataset = ds.dataset(archivo, format="parquet", partitioning=PARTICIONES_RAW)
+    carpeta_incremental = os.path.join(carpeta_bronze, CARPETA_INCREMENTAL)
+    os.makedirs(carpeta_incremental, exist_ok=True)
+    resultados = [_ingerir_mes(dataset, mes, carpeta_incremental) for mes in nuevos]
+    return _consolidar_bronze(carpeta_bronze, resultados)
+
+
+# -------------------------------
+# TAREAS POR PARTICIÓN (DAG)
+# -------------------------------
+def _rutas_bronze(nombre_archivo):
+    proyecto_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    archivo = os.path.join(proyecto_dir, "layer", "raw", nombre_archivo)
+    carpeta_bronze = os.path.join(proyecto_dir, "layer", "bronze")
+    return archivo, carpeta_bronze
+
+
+def meses_pendientes_bronze(nombre_archivo="datos_donantes_sinteticos.parquet"):
+    """Meses del dataset raw que aún no figuran en el manifiesto de Bronze."""
+    archivo, carpeta_bronze = _rutas_bronze(nombre_archivo)
+    return _meses_pendientes(archivo, carpeta_bronze)
+
+
+def ingerir_mes_bronze(mes, nombre_archivo="datos_donantes_sinteticos.parquet"):
+    """
+    Ingiere un solo mes del dataset raw (tarea mapeada del DAG). Solo escribe
+    archivos propios del mes, así que varios meses pueden correr en paralelo
+    y un reintento sobrescribe lo mismo; el manifiesto y el estado de fuga se
+    actualizan después, en consolidar_bronze. Retorna None si el mes ya
+    figura en el manifiesto.
+    """
+    archivo, carpeta_bronze = _rutas_bronze(nombre_archivo)
+    if mes in leer_manifiesto(os.path.join(carpeta_bronze, MANIFIESTO))['meses']:
+        print(f"✓ {mes} ya consolidado en Bronze")
+        return None
+
+    carpeta_incremental = os.path.join(carpeta_bronze, CARPETA_INCREMENTAL)
+    os.makedirs(carpeta_incremental, exist_ok=True)
+    dataset = ds.dataset(archivo, format="parquet", partitioning=PARTICIONES_RAW)
+    return _ingerir_mes(dataset, mes, carpeta_incremental)
+
+
+def consolidar_bronze(resultados, nombre_archivo="datos_donantes_sinteticos.parquet"):
+    """
+    Reducción del DAG: consolida los resultados de ingerir_mes_bronze.
+    Retorna SIN_CAMBIOS si no hay meses nuevos que consolidar.
+    """
+    _, carpeta_bronze = _rutas_bronze(nombre_archivo)
+    procesados = set(leer_manifiesto(os.path.join(carpeta_bronze, MANIFIESTO))['meses'])
+    if not any(resultado and resultado['mes'] not in procesados for resultado in resultados):
+        print("✓ Sin meses nuevos que consolidar en Bronze")
+        return SIN_CAMBIOS
+    return _consolidar_bronze(carpeta_bronze, resultados)
+
+
+def _meses_pendientes(archivo, carpeta_bronze):
+    procesados = set(leer_manifiesto(os.path.join(carpeta_bronze, MANIFIESTO))['meses'])
+    return [mes for mes in _meses_particionados(archivo) if mes not in procesados]
+
+
+def _totales_vacios():
+    return {'registros': 0, 'suma_donaciones': 0, 'transacciones': 0, 'socios_unicos': 0}
+
+
+def _ingerir_mes(dataset, mes, carpeta_incremental):
+    """
+    Escribe los registros de un mes, los fugados sin pago de ese mes
+    (partición nula de raw) y las fugas detectadas en él. Retorna los
+    totales del mes (serializables, para XCom).
+    """
+    # Registros del mes + fugados sin pago cuya fuga ocurrió ese mes
+    campo_mes = ds.field('Año_Mes_Donacion')
+    filtro = (campo_mes == mes) | (campo_mes.is_null() & (ds.field('Año_Mes_Fuga') == mes))
+    tabla = aplicar_esquema_bronze(dataset.to_table(columns=COLUMNAS_RAW, filter=filtro))
+
+    sin_pago = pc.is_null(tabla.column('Año_Mes_Donacion'))
+    pq.write_table(tabla.filter(pc.invert(sin_pago)), os.path.join(carpeta_incremental, f"{mes}.parquet"))
+    if pc.any(sin_pago).as_py():
+        pq.write_table(tabla.filter(sin_pago), os.path.join(carpeta_incremental, f"sin_pago-{mes}.parquet"))
+
+    fugado = pc.equal(pc.cast(tabla.column('Status_Socio'), pa.string()), 'Fugado')
+    pq.write_table(tabla.filter(fugado).select(COLUMNAS_FUGA), os.path.join(carpeta_incremental, f"fugas-{mes}.parquet"))
+
+    monto = tabla.column('Monto_Donacion')
+    positivos = pc.filter(monto, pc.greater(monto, 0))
+    creados = pc.equal(pc.cast(tabla.column('Año_Mes_Creacion'), pa.string()), mes)
+    print(f"  · {mes}: {tabla.num_rows} registros")
+    return {
+        'mes': mes,
+        'filas': tabla.num_rows,
+        'totales': {
+            'registros': tabla.num_rows,
+            'suma_donaciones': pc.sum(positivos).as_py() or 0,
+            'transacciones': len(positivos),
+            'socios_unicos': pc.count_distinct(pc.filter(tabla.column('Id_donante'), creados)).as_py()
+        }
+    }
+
+
+def _consolidar_bronze(carpeta_bronze, resultados):
+    """
+    Agrega al manifiesto los meses ingeridos (en orden) y sus totales, y
+    actualiza el estado de fuga por socio con las fugas de esos meses. Los
+    meses que ya figuran en el manifiesto se ignoran, así que repetir la
+    consolidación no duplica totales.
+    """
+    ruta_manifiesto = os.path.join(carpeta_bronze, MANIFIESTO)
+    carpeta_incremental = os.path.join(carpeta_bronze, CARPETA_INCREMENTAL)
+    manifiesto = leer_manifiesto(ruta_manifiesto)
+    totales = manifiesto.setdefault('totales', _totales_vacios())
+
+    procesados = set(manifiesto['meses'])
+    nuevos = sorted((r for r in resultados if r and r['mes'] not in procesados), key=lambda r: r['mes'])
+    if not nuevos:
+        print(f"✓ Sin meses nuevos que consolidar en Bronze (marca de agua: {manifiesto['marca_agua']})")
+        return totales
+
+    fugas = []
+    for resultado in nuevos:
+        for clave, valor in resultado['totales'].items():
+            totales[clave] += valor
+        manifiesto.setdefault('filas_por_mes', {})[resultado['mes']] = resultado['filas']
+        manifiesto['meses'].append(resultado['mes'])
+        fugas.append(pd.read_parquet(os.path.join(carpeta_incremental, f"fugas-{resultado['mes']}.parquet")))
+
+    # -------------------------------
+    # ESTADO DE FUGA POR SOCIO (UPSERT)
+    # -------------------------------
+    ruta_fugas = os.path.join(carpeta_bronze, ARCHIVO_FUGAS)
+    if os.path.exists(ruta_fugas):
+        fugas.insert(0, pd.read_parquet(ruta_fugas))
+    df_fugas = pd.concat(fugas, ignore_index=True).drop_duplicates('Id_donante', keep='last')
+    df_fugas.sort_values('Clave_Donante').to_parquet(ruta_fugas, index=False)
+    print(f"✓ Estado de fuga actualizado: {len(df_fugas)} socios fugados")
+
+    guardar_manifiesto(ruta_manifiesto, manifiesto)
+    print(f"✓ Manifiesto Bronze actualizado (marca de agua: {manifiesto['marca_agua']})")
+    return totales
 
 
 if __name__ == "__main__":
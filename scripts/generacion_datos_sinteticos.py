@@ -1,24 +1,287 @@
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import os
+import shutil
+import sys
+import time
 from datetime import datetime
 
-def generar_datos_sinteticos():
+try:
+    import resource
+except ImportError:  # Windows no tiene el módulo resource
+    resource = None
+
+try:
+    from scripts.manifiesto import firma_paso, sin_cambios, guardar_linaje, SIN_CAMBIOS
+except ImportError:  # ejecución directa: python scripts/generacion_datos_sinteticos.py
+    from manifiesto import firma_paso, sin_cambios, guardar_linaje, SIN_CAMBIOS
+
+# -------------------------------
+# PARÁMETROS POR DEFECTO
+# -------------------------------
+SEMILLA = 42
+
+# Métodos de pago y efectividad
+METODOS_PAGO_CONFIG = {
+    'Cuenta Corriente': {'probabilidad': 0.12, 'efectividad': 0.97},
+    'Tarjeta Crédito': {'probabilidad': 0.10, 'efectividad': 0.93},
+    'Cuenta Vista': {'probabilidad': 0.18, 'efectividad': 0.85},
+    'Cuenta Rut': {'probabilidad': 0.60, 'efectividad': 0.70}
+}
+
+ESTRATEGIAS = ['Face to Face', 'Telemarketing']
+PROBABILIDADES_ESTRATEGIAS = [0.80, 0.20]
+
+# Monto fijo del socio: uno de los montos base (con esta probabilidad) o uno alto
+PROBABILIDAD_MONTO_BASE = 0.85
+MONTOS_BASE = np.array([8000, 9000, 10000])
+MONTOS_ALTOS = np.arange(10000, 26000, 1000)
+
+# Formatos de salida de la capa raw. En parquet se escribe un dataset
+# particionado por Año_Mes_Donacion (estilo Hive) con tipos nativos.
+NOMBRES_RAW = {
+    'csv': 'datos_donantes_sinteticos.csv',
+    'parquet': 'datos_donantes_sinteticos.parquet'
+}
+PARTICION_SIN_VALOR = '__HIVE_DEFAULT_PARTITION__'
+
+# Manifiesto de linaje de la capa raw (parámetros de la simulación y versión
+# del código de la última generación, ver manifiesto.firma_paso)
+LINAJE = "linaje_raw.json"
+
+ESQUEMA_RAW = pa.schema([
+    ('Id_donante', pa.string()),
+    ('Método_Pago', pa.string()),
+    ('Estrategia', pa.string()),
+    ('Fecha_Creacion', pa.date32()),
+    ('Fecha_Pago', pa.date32()),
+    ('Monto_Donacion', pa.int32()),
+    ('Status_Socio', pa.string()),
+    ('Fecha_Fuga', pa.date32()),
+    ('Año_Mes_Creacion', pa.string()),
+    ('Año_Mes_Donacion', pa.string()),
+    ('Año_Mes_Fuga', pa.string())
+])
+
+# Perfiles con nombre para la CLI y las pruebas de carga
+PERFILES = {
+    # Periodo de análisis: Junio 2023 - Mayo 2025
+    'estandar': {
+        'socios_mensuales': 1000,
+        'tasa_fuga_mensual': 0.02,
+        'fecha_inicio': datetime(2023, 6, 30),
+        'fecha_fin': datetime(2025, 5, 30)
+    },
+    # ~1 millón de donantes en 60 meses (Junio 2020 - Mayo 2025)
+    'estres': {
+        'socios_mensuales': 16_667,
+        'tasa_fuga_mensual': 0.02,
+        'fecha_inicio': datetime(2020, 6, 30),
+        'fecha_fin': datetime(2025, 5, 30)
+    }
+}
+
+
+def generar_datos_sinteticos(perfil="estandar", socios_mensuales=None, tasa_fuga_mensual=None,
+                             fecha_inicio=None, fecha_fin=None, metodos_pago_config=None,
+                             semilla=SEMILLA, meses_por_bloque=6, ruta_salida=None,
+                             formato="parquet", trabajadores=1, forzar=False):
     """
     Genera un dataset sintético de donaciones mensuales con fugas simuladas
-    y lo guarda como 'datos_donantes_sinteticos.csv' en la carpeta /layer/raw/.
+    y lo guarda en la carpeta /layer/raw/: 'datos_donantes_sinteticos.parquet'
+    (dataset particionado por Año_Mes_Donacion, fechas date32 y montos int32)
+    o, con formato="csv", 'datos_donantes_sinteticos.csv'.
+
+    La simulación es vectorizada (NumPy). Este proceso sortea solo el
+    calendario de fugas (cada mes se fugan exactamente
+    int(activos * tasa_fuga_mensual) socios activos, lo que depende de todas
+    las cohortes). Cada cohorte tiene su propio flujo aleatorio
+    (numpy.random.Generator sobre SeedSequence(semilla, spawn_key=...)) para
+    sus atributos y sus cobros mes a mes, así que los bloques de meses se
+    simulan, materializan y escriben de forma independiente en `trabajadores`
+    procesos (por defecto 1, sin procesos auxiliares; el paralelismo se
+    activa explícitamente). Para una misma semilla el resultado es el mismo
+    con cualquier cantidad de procesos y tamaño de bloque.
+
+    Los parámetros parten del perfil indicado (ver PERFILES) y pueden
+    sobrescribirse uno a uno. Si los parámetros que definen el dataset y el
+    código coinciden con los de la última generación (linaje_raw.json, junto
+    a la salida) y la salida existe, no se regenera y se retorna SIN_CAMBIOS;
+    forzar=True lo ignora. La simulación y la escritura avanzan por
+    bloques de `meses_por_bloque` meses: cada bloque solo tiene en memoria
+    sus registros y el calendario de fugas, lo que acota la memoria.
+    Retorna la ruta del archivo generado.
     """
-    SEMILLA = 42
-    np.random.seed(SEMILLA)
+    if formato not in NOMBRES_RAW:
+        raise ValueError(f"Formato raw no soportado: {formato}. Opciones: {sorted(NOMBRES_RAW)}")
 
-    SOCIOS_MENSUALES = 1000
-    TASA_FUGA_MENSUAL = 0.02
+    config = configuracion_perfil(perfil, socios_mensuales, tasa_fuga_mensual, fecha_inicio, fecha_fin)
+    if metodos_pago_config is None:
+        metodos_pago_config = METODOS_PAGO_CONFIG
 
-    # Periodo de análisis: Junio 2023 - Mayo 2025
-    fecha_inicio = datetime(2023, 6, 30)
-    fecha_fin = datetime(2025, 5, 30)
+    SOCIOS_MENSUALES = config['socios_mensuales']
+    TASA_FUGA_MENSUAL = config['tasa_fuga_mensual']
+    if not 0 <= TASA_FUGA_MENSUAL <= 1:
+        raise ValueError(f"La tasa de fuga mensual debe estar entre 0 y 1: {TASA_FUGA_MENSUAL}")
+    if trabajadores < 1:
+        raise ValueError(f"trabajadores debe ser al menos 1: {trabajadores}")
+
+    inicio_ejecucion = time.perf_counter()
+
+    meses = generar_meses(config['fecha_inicio'], config['fecha_fin'])
+    trabajadores = min(trabajadores, len(meses))
+    print(f"Perfil '{perfil}': {SOCIOS_MENSUALES:,} socios/mes, {len(meses)} meses, "
+          f"fuga mensual {TASA_FUGA_MENSUAL * 100:.1f}%, {trabajadores} proceso(s)")
+
+    metodos_pago = list(metodos_pago_config.keys())
+    probabilidades_metodos = [metodos_pago_config[m]['probabilidad'] for m in metodos_pago]
+    efectividad_metodos = np.array([metodos_pago_config[m]['efectividad'] for m in metodos_pago])
+
+    efectividad_promedio = sum(
+        metodos_pago_config[m]['efectividad'] * metodos_pago_config[m]['probabilidad']
+        for m in metodos_pago
+    )
+    print(f"Efectividad promedio ponderada: {efectividad_promedio * 100:.2f}%")
+
+    SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+    if ruta_salida is None:
+        ruta_salida = os.path.join(SCRIPT_DIR, "..", "layer", "raw", NOMBRES_RAW[formato])
+    os.makedirs(os.path.dirname(os.path.abspath(ruta_salida)), exist_ok=True)
+
+    # -------------------------------
+    # LINAJE: SALTAR SI NO HAY CAMBIOS
+    # -------------------------------
+    # El dataset no depende de la cantidad de procesos ni del tamaño de los bloques
+    ruta_linaje = os.path.join(os.path.dirname(os.path.abspath(ruta_salida)), LINAJE)
+    parametros = {
+        'salida': os.path.basename(os.path.normpath(ruta_salida)),
+        'formato': formato,
+        'semilla': semilla,
+        'socios_mensuales': SOCIOS_MENSUALES,
+        'tasa_fuga_mensual': TASA_FUGA_MENSUAL,
+        'fecha_inicio': config['fecha_inicio'].isoformat(),
+        'fecha_fin': config['fecha_fin'].isoformat(),
+        'metodos_pago': metodos_pago_config
+    }
+    firma = firma_paso({}, SCRIPT_DIR, parametros, "generacion_datos_sinteticos")
+    if not forzar and sin_cambios(ruta_linaje, firma, [ruta_salida]):
+        print(f"✓ Parámetros y código sin cambios desde la última generación, raw vigente: {ruta_salida}")
+        return SIN_CAMBIOS
+
+    # Con más de un proceso, la simulación, materialización y escritura de los
+    # bloques de meses se reparte en un pool; los resultados se toman en
+    # orden, así que la concatenación de resultados es determinista
+    pool = ProcessPoolExecutor(max_workers=trabajadores) if trabajadores > 1 else None
+    try:
+        # Calendario de fugas, un arreglo por campo indexado por número de
+        # donante. La fecha de fuga se guarda una sola vez por socio y se
+        # propaga a todos sus registros al materializar, en vez de reescribir
+        # el historial.
+        simulacion = {
+            'semilla': semilla,
+            'socios_mensuales': SOCIOS_MENSUALES,
+            'total_meses': len(meses),
+            'probabilidades_metodos': probabilidades_metodos,
+            'efectividad_metodos': efectividad_metodos,
+            'fugas': _sortear_fugas(_generador(semilla), SOCIOS_MENSUALES, len(meses), TASA_FUGA_MENSUAL)
+        }
+        # -------------------------------
+        # ESCRITURA POR BLOQUES
+        # -------------------------------
+        resumenes = []
+        registros_sin_pago = []
+        total_registros = 0
+        total_donaciones_acumuladas = 0.0
+        total_transacciones_acumuladas = 0
+
+        archivo_csv = None
+        carpeta_parquet = None
+        if formato == "csv":
+            archivo_csv = open(ruta_salida, "w", encoding="utf-8-sig", newline="")
+        else:
+            carpeta_parquet = ruta_salida
+            if os.path.isdir(ruta_salida):
+                # Evitar particiones obsoletas de una ejecución anterior
+                shutil.rmtree(ruta_salida)
+
+        try:
+            # Cada bloque de meses se simula con los flujos de sus cohortes y
+            # escribe sus propias particiones (parquet), así que los bloques
+            # se procesan en paralelo; el CSV se escribe en orden en este
+            # proceso. Hay a lo sumo `trabajadores` bloques en vuelo.
+            tareas = ((_procesar_bloque, inicio, min(inicio + meses_por_bloque, len(meses)), simulacion,
+                       meses, metodos_pago, carpeta_parquet)
+                      for inicio in range(0, len(meses), meses_por_bloque))
+            escribir_encabezado = True
+            for bloque in _en_orden(pool, tareas, trabajadores):
+                total_registros += bloque['registros']
+                total_donaciones_acumuladas += bloque['donaciones']
+                total_transacciones_acumuladas += bloque['transacciones']
+                registros_sin_pago.append(bloque['sin_pago'])
+                resumenes.append(bloque['resumen'])
+                if archivo_csv is not None:
+                    bloque['con_fecha'].to_csv(archivo_csv, index=False, header=escribir_encabezado)
+                    escribir_encabezado = False
+
+            # Los registros sin Fecha_Pago van al final del archivo (como NaT al ordenar)
+            df_sin_pago = pd.concat(registros_sin_pago).sort_values('Id_donante')
+            if archivo_csv is not None:
+                df_sin_pago.to_csv(archivo_csv, index=False, header=escribir_encabezado)
+            else:
+                _escribir_particiones_parquet(df_sin_pago, ruta_salida)
+        finally:
+            if archivo_csv is not None:
+                archivo_csv.close()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # Resumen mensual (excluye registros sin Fecha_Pago)
+    resumen_mensual = pd.concat(resumenes)
+    print(resumen_mensual)
+
+    print(f"\nTotal donaciones acumuladas: {total_donaciones_acumuladas:,}")
+    print(f"\nCantidad total de registros generados: {total_registros}")
+    print(f"Total transacciones acumuladas (>0): {total_transacciones_acumuladas:,}")
+    print(f"\nArchivo guardado correctamente en: {ruta_salida}")
+    guardar_linaje(ruta_linaje, firma, [ruta_salida])
+
+    # -------------------------------
+    # RENDIMIENTO
+    # -------------------------------
+    duracion = time.perf_counter() - inicio_ejecucion
+    print(f"\nDuración: {duracion:.2f} s | Rendimiento: {total_registros / duracion:,.0f} filas/s")
+    rss_pico = _rss_pico_mb()
+    if rss_pico is not None:
+        print(f"RSS pico: {rss_pico:,.1f} MB")
+
+    return ruta_salida
+
+
+def configuracion_perfil(perfil="estandar", socios_mensuales=None, tasa_fuga_mensual=None,
+                        fecha_inicio=None, fecha_fin=None):
+    """Parámetros del perfil indicado, con los valores que se sobrescriban (los None se ignoran)."""
+    config = dict(PERFILES[perfil])
+    sobrescritos = {
+        'socios_mensuales': socios_mensuales,
+        'tasa_fuga_mensual': tasa_fuga_mensual,
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin
+    }
+    config.update({clave: valor for clave, valor in sobrescritos.items() if valor is not None})
+    return config
 
-    # Generar lista de meses
+
+def generar_meses(fecha_inicio, fecha_fin):
+    """
+    Lista de fechas mensuales entre fecha_inicio y fecha_fin. El primer mes
+    conserva el día de fecha_inicio; los siguientes parten el día 1.
+    """
     meses = []
     fecha_actual = fecha_inicio
     while fecha_actual <= fecha_fin:
@@ -27,218 +290,339 @@ def generar_datos_sinteticos():
             fecha_actual = datetime(fecha_actual.year + 1, 1, 1)
         else:
             fecha_actual = datetime(fecha_actual.year, fecha_actual.month + 1, 1)
+    return meses
 
-    # Métodos de pago y efectividad
-    metodos_pago_config = {
-        'Cuenta Corriente': {'probabilidad': 0.12, 'efectividad': 0.97},
-        'Tarjeta Crédito': {'probabilidad': 0.10, 'efectividad': 0.93},
-        'Cuenta Vista': {'probabilidad': 0.18, 'efectividad': 0.85},
-        'Cuenta Rut': {'probabilidad': 0.60, 'efectividad': 0.70}
-    }
-    metodos_pago = list(metodos_pago_config.keys())
-    probabilidades_metodos = [metodos_pago_config[m]['probabilidad'] for m in metodos_pago]
 
-    estrategias = ['Face to Face', 'Telemarketing']
-    probabilidades_estrategias = [0.80, 0.20]
+def _generador(semilla, *flujo):
+    """
+    Generador del flujo aleatorio indicado, derivado de la semilla como los
+    hijos de SeedSequence.spawn: sin flujo, el del calendario de fugas;
+    (1 + cohorte, 0), el de los atributos de una cohorte, y
+    (1 + cohorte, 1 + mes), el de sus cobros de un mes. Cualquier proceso
+    obtiene el mismo flujo sin recibirlo del anterior.
+    """
+    return np.random.default_rng(np.random.SeedSequence(semilla, spawn_key=flujo or (0,)))
 
-    efectividad_promedio = sum(
-        metodos_pago_config[m]['efectividad'] * metodos_pago_config[m]['probabilidad']
-        for m in metodos_pago
-    )
-    print(f"Efectividad promedio ponderada: {efectividad_promedio * 100:.2f}%")
 
-    # Estructuras de datos
-    socios_info = {}
-    socios_activos = set()
-    socios_fugados = {}
-    registros_por_donante = {}
-    id_donante_counter = 1
-
-    # Generar datos mes a mes
-    for fecha_mes in meses:
-        # Nuevos socios
-        for _ in range(SOCIOS_MENSUALES):
-            id_donante = f"D{id_donante_counter:06d}"
-
-            if np.random.random() < 0.85:
-                monto_fijo = np.random.choice([8000, 9000, 10000])
-            else:
-                monto_fijo = np.random.choice(range(10000, 26000, 1000))
-
-            metodo_pago = np.random.choice(metodos_pago, p=probabilidades_metodos)
-            estrategia = np.random.choice(estrategias, p=probabilidades_estrategias)
-
-            socios_info[id_donante] = {
-                'fecha_creacion': fecha_mes,
-                'metodo_pago': metodo_pago,
-                'estrategia': estrategia,
-                'monto_fijo': monto_fijo,
-                'efectividad': metodos_pago_config[metodo_pago]['efectividad'],
-                'dono_alguna_vez': False
-            }
-
-            socios_activos.add(id_donante)
-            registros_por_donante[id_donante] = []
-            id_donante_counter += 1
-
-        # Cobro mensual (primero procesar todos los cobros)
-        cobros_del_mes = {}  # Guardar temporalmente los resultados
-        for id_donante in sorted(socios_activos):
-            info = socios_info[id_donante]
-            dia = np.random.randint(1, 29)
-            fecha_pago = datetime(fecha_mes.year, fecha_mes.month, dia)
-
-            cobro_exitoso = np.random.random() < info['efectividad']
-            monto_donacion = info['monto_fijo'] if cobro_exitoso else 0
-
-            if cobro_exitoso:
-                info['dono_alguna_vez'] = True
-
-            cobros_del_mes[id_donante] = {
-                'fecha_pago': fecha_pago,
-                'monto': monto_donacion,
-                'cobro_exitoso': cobro_exitoso
-            }
-
-        # Aplicar fugas del mes actual (después de cobros)
-        total_activos = len(socios_activos)
-        num_fugas = int(total_activos * TASA_FUGA_MENSUAL)
-
-        ids_a_fugar_este_mes = set()
-        if num_fugas > 0:
-            ids_a_fugar_este_mes = set(np.random.choice(
-                sorted(list(socios_activos)), 
-                size=num_fugas, 
-                replace=False
-            ))
-
-        # Procesar registros del mes
-        for id_donante in sorted(socios_activos):
-            info = socios_info[id_donante]
-            cobro_info = cobros_del_mes[id_donante]
-            
-            # Si se va a fugar ESTE mes
-            if id_donante in ids_a_fugar_este_mes:
-                # Calcular fecha de fuga
-                dia_fuga = np.random.randint(1, 29)
-                fecha_fuga = datetime(fecha_mes.year, fecha_mes.month, dia_fuga)
-                fecha_fuga_str = fecha_fuga.strftime('%Y-%m-%d')
-                
-                # Verificar si ya tiene donaciones previas
-                dono_antes = any(
-                    reg.get('Monto_Donacion', 0) > 0 
-                    for reg in registros_por_donante[id_donante]
-                )
-                
-                # CASO 1: Se fuga sin haber donado nunca
-                if not dono_antes:
-                    registros_por_donante[id_donante].append({
-                        'Id_donante': id_donante,
-                        'Método_Pago': info['metodo_pago'],
-                        'Estrategia': info['estrategia'],
-                        'Fecha_Creacion': info['fecha_creacion'].strftime('%Y-%m-%d'),
-                        'Fecha_Pago': None,  # NaT
-                        'Monto_Donacion': None,  # NaN
-                        'Status_Socio': 'Fugado',
-                        'Fecha_Fuga': fecha_fuga_str
-                    })
-                    
-                # CASO 2: Se fuga pero ya había donado antes
-                else:
-                    registros_por_donante[id_donante].append({
-                        'Id_donante': id_donante,
-                        'Método_Pago': info['metodo_pago'],
-                        'Estrategia': info['estrategia'],
-                        'Fecha_Creacion': info['fecha_creacion'].strftime('%Y-%m-%d'),
-                        'Fecha_Pago': fecha_fuga_str,
-                        'Monto_Donacion': 0,
-                        'Status_Socio': 'Fugado',
-                        'Fecha_Fuga': fecha_fuga_str
-                    })
-                
-                # Actualizar registros históricos con Status y Fecha_Fuga
-                for reg in registros_por_donante[id_donante]:
-                    reg['Status_Socio'] = 'Fugado'
-                    reg['Fecha_Fuga'] = fecha_fuga_str
-                
-                # Marcar como fugado
-                socios_fugados[id_donante] = fecha_fuga
-                
-            else:
-                # Socio activo normal: registrar cobro
-                registros_por_donante[id_donante].append({
-                    'Id_donante': id_donante,
-                    'Método_Pago': info['metodo_pago'],
-                    'Estrategia': info['estrategia'],
-                    'Fecha_Creacion': info['fecha_creacion'].strftime('%Y-%m-%d'),
-                    'Fecha_Pago': cobro_info['fecha_pago'].strftime('%Y-%m-%d'),
-                    'Monto_Donacion': cobro_info['monto'],
-                    'Status_Socio': 'Activo',
-                    'Fecha_Fuga': ''
-                })
-
-        # Eliminar los fugados de activos
-        socios_activos -= ids_a_fugar_este_mes
-
-    # Consolidar registros
-    registros = []
-    for id_donante in registros_por_donante:
-        registros.extend(registros_por_donante[id_donante])
-
-    df = pd.DataFrame(registros)
-
-    df['Fecha_Creacion'] = pd.to_datetime(df['Fecha_Creacion'])
-    df['Fecha_Pago'] = pd.to_datetime(df['Fecha_Pago'])
-    df['Fecha_Fuga'] = pd.to_datetime(df['Fecha_Fuga'], errors='coerce')
-    df['Monto_Donacion'] = pd.to_numeric(df['Monto_Donacion'], errors='coerce')
-
-    df['Año_Mes_Creacion'] = df['Fecha_Creacion'].dt.to_period('M').astype(str)
-    df['Año_Mes_Donacion'] = df['Fecha_Pago'].dt.to_period('M').astype(str)
-    df['Año_Mes_Fuga'] = df['Fecha_Fuga'].dt.to_period('M').astype(str)
-
-    df = df.sort_values(['Fecha_Pago', 'Id_donante']).reset_index(drop=True)
-
-    # Resumen mensual (excluir registros sin Fecha_Pago)
-    df_con_fecha = df[df['Fecha_Pago'].notna()].copy()
-    
-    resumen_mensual = (
-        df_con_fecha.groupby('Año_Mes_Donacion', as_index=True)
-        .agg(
-            Total_Donaciones=('Monto_Donacion', lambda x: x[x > 0].sum()),
-            Cantidad_Donaciones_Exitosas=('Monto_Donacion', lambda x: (x > 0).sum()),
-            Fugados=('Status_Socio', lambda x: (x == 'Fugado').sum()),
-            Donantes_Unicos=('Id_donante', 'nunique')
-        )
+def _sortear_fugas(rng, socios_mensuales, total_meses, tasa_fuga_mensual):
+    """
+    Sortea el calendario de fugas: cada mes, después de incorporar la
+    cohorte del mes, se fugan exactamente int(activos * tasa_fuga_mensual)
+    socios activos, elegidos al azar sin reemplazo, con su día de fuga.
+    Depende de los activos de todas las cohortes, así que se sortea en un
+    solo flujo, antes de simular los bloques.
+
+    Retorna arreglos por socio, indexados por número de donante (mes_fuga
+    -1 si el socio no se fuga).
+    """
+    total_socios = socios_mensuales * total_meses
+    mes_fuga = np.full(total_socios, -1, dtype=np.int16)
+    dia_fuga = np.zeros(total_socios, dtype=np.int8)
+    activos = np.empty(0, dtype=np.int64)
+    for i_mes in range(total_meses):
+        nuevos = np.arange(i_mes * socios_mensuales, (i_mes + 1) * socios_mensuales)
+        activos = np.concatenate([activos, nuevos])
+        num_fugas = int(len(activos) * tasa_fuga_mensual)
+        if num_fugas:
+            posiciones = rng.choice(len(activos), num_fugas, replace=False)
+            ids_fuga = activos[posiciones]
+            mes_fuga[ids_fuga] = i_mes
+            dia_fuga[ids_fuga] = rng.integers(1, 29, size=num_fugas)
+            activos = np.delete(activos, posiciones)
+
+    return {'mes_fuga': mes_fuga, 'dia_fuga': dia_fuga}
+
+
+def _sortear_cohorte(cohorte, simulacion):
+    """
+    Sortea, con el flujo de atributos de la cohorte, el monto fijo, el
+    método de pago y la estrategia de sus socios, y el mes de su primer
+    cobro exitoso: los cobros de cada mes son independientes, así que los
+    meses fallidos antes del primero siguen una distribución geométrica
+    (total_meses si no llega a cobrar dentro del periodo).
+    """
+    rng = _generador(simulacion['semilla'], 1 + cohorte, 0)
+    socios_mensuales = simulacion['socios_mensuales']
+    usa_monto_base = rng.random(socios_mensuales) < PROBABILIDAD_MONTO_BASE
+    monto_fijo = np.where(
+        usa_monto_base,
+        rng.choice(MONTOS_BASE, size=socios_mensuales),
+        rng.choice(MONTOS_ALTOS, size=socios_mensuales)
     )
+    probabilidades_metodos = simulacion['probabilidades_metodos']
+    metodo = rng.choice(len(probabilidades_metodos), size=socios_mensuales, p=probabilidades_metodos)
+    estrategia = rng.choice(len(ESTRATEGIAS), size=socios_mensuales, p=PROBABILIDADES_ESTRATEGIAS)
+
+    efectividad = simulacion['efectividad_metodos'][metodo]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        meses_fallidos = np.floor(np.log(1.0 - rng.random(socios_mensuales)) / np.log1p(-efectividad))
+    total_meses = simulacion['total_meses']
+    primer_cobro = cohorte + np.where(efectividad > 0, np.minimum(meses_fallidos, total_meses), total_meses)
+
+    return {
+        'monto_fijo': monto_fijo.astype(np.int64),
+        'metodo': metodo.astype(np.int8),
+        'estrategia': estrategia.astype(np.int8),
+        'primer_cobro': primer_cobro.astype(np.int64)
+    }
 
-    fallos_cobro = df_con_fecha[(df_con_fecha['Status_Socio'] == 'Activo') & (df_con_fecha['Monto_Donacion'] == 0)].groupby('Año_Mes_Donacion').size()
-    resumen_mensual['Fallos_Cobro'] = fallos_cobro
-    resumen_mensual['Fallos_Cobro'] = resumen_mensual['Fallos_Cobro'].fillna(0).astype(int)
+
+def _simular_mes(i_mes, cohorte, socios, simulacion):
+    """
+    Cobros del mes i_mes para los socios activos de la cohorte, con el flujo
+    de la cohorte para ese mes. socios son los atributos de la cohorte
+    (_sortear_cohorte) junto con su calendario de fugas; el mes del primer
+    cobro reemplaza al estado "donó alguna vez" entre meses, así que cada
+    mes se simula sin los anteriores.
+
+    Retorna los registros del mes (id y atributos del socio, mes, día de
+    pago y monto), en arreglos columnares.
+    """
+    activo = (socios['mes_fuga'] < 0) | (socios['mes_fuga'] >= i_mes)
+    socios = {atributo: valores[activo] for atributo, valores in socios.items()}
+    rng = _generador(simulacion['semilla'], 1 + cohorte, 1 + i_mes)
+
+    # Cobro mensual: antes del primer cobro exitoso falla, en ese mes se cobra
+    # y después cada mes se cobra con la efectividad del método
+    dias_pago = rng.integers(1, 29, size=len(socios['id']))
+    exito = rng.random(len(socios['id'])) < simulacion['efectividad_metodos'][socios['metodo']]
+    primer_cobro = socios.pop('primer_cobro')
+    cobro_exitoso = (primer_cobro == i_mes) | ((primer_cobro < i_mes) & exito)
+    montos = np.where(cobro_exitoso, socios.pop('monto_fijo'), 0).astype(np.float64)
+
+    # Fugas del mes (según el calendario sorteado). Se verifica si el socio ya
+    # había donado en meses anteriores (el cobro del mes de fuga no cuenta):
+    # CASO 1: se fuga sin haber donado nunca -> sin Fecha_Pago ni monto
+    # CASO 2: se fuga pero ya había donado antes -> Fecha_Pago = fecha de fuga, monto 0
+    es_fuga = socios['mes_fuga'] == i_mes
+    dono_antes = primer_cobro[es_fuga] < i_mes
+    dias_pago[es_fuga] = np.where(dono_antes, socios['dia_fuga'][es_fuga], 0)
+    montos[es_fuga] = np.where(dono_antes, 0, np.nan)
+
+    return dict(socios, mes=np.full(len(montos), i_mes, dtype=np.int16), dia_pago=dias_pago.astype(np.int8),
+                monto=montos)
+
+
+def _simular_bloque(inicio, fin, simulacion):
+    """
+    Simula los registros de los meses [inicio, fin) de todas las cohortes
+    creadas hasta fin, con los atributos de su socio ya asociados a cada
+    registro. Solo usa los flujos de esas cohortes y el calendario de
+    fugas, así que cada bloque se simula en cualquier proceso sin los
+    bloques anteriores.
+    """
+    socios_mensuales = simulacion['socios_mensuales']
+    fugas = simulacion['fugas']
+    registros_meses = []
+    for cohorte in range(fin):
+        ids = np.arange(cohorte * socios_mensuales, (cohorte + 1) * socios_mensuales)
+        mes_fuga = fugas['mes_fuga'][ids]
+        if np.all((mes_fuga >= 0) & (mes_fuga < inicio)):
+            continue  # toda la cohorte se fugó antes del bloque
+        socios = dict(_sortear_cohorte(cohorte, simulacion), id=ids, mes_fuga=mes_fuga,
+                      dia_fuga=fugas['dia_fuga'][ids],
+                      mes_creacion=np.full(socios_mensuales, cohorte, dtype=np.int16))
+        registros_meses.extend(_simular_mes(i_mes, cohorte, socios, simulacion)
+                               for i_mes in range(max(inicio, cohorte), fin))
+
+    return {columna: np.concatenate([registros[columna] for registros in registros_meses])
+            for columna in registros_meses[0]}
+
+
+def _en_orden(pool, tareas, en_vuelo):
+    """
+    Ejecuta las tareas (función, *argumentos) y entrega sus resultados en
+    orden. Con pool, envía a lo sumo en_vuelo tareas a la vez (la siguiente
+    se genera recién cuando se toma un resultado); sin pool, las ejecuta en
+    este proceso.
+    """
+    if pool is None:
+        for funcion, *argumentos in tareas:
+            yield funcion(*argumentos)
+        return
+    pendientes = deque()
+    for funcion, *argumentos in tareas:
+        pendientes.append(pool.submit(funcion, *argumentos))
+        if len(pendientes) >= en_vuelo:
+            yield pendientes.popleft().result()
+    while pendientes:
+        yield pendientes.popleft().result()
+
+
+def _materializar_registros(bloque, meses, metodos_pago, estrategias):
+    """
+    Convierte un bloque columnar de la simulación en un DataFrame de registros
+    (mismas columnas que el CSV de la capa raw), ordenado por Fecha_Pago e Id.
+    Los atributos del socio, incluido su estado y fecha de fuga, vienen en el
+    bloque por registro. Las columnas de texto son categóricas (el Id, con
+    una categoría por socio del bloque): se arman desde códigos, sin un
+    objeto str por registro.
+    """
+    orden = np.lexsort((bloque['id'], bloque['dia_pago'], bloque['mes']))
+    bloque = {columna: valores[orden] for columna, valores in bloque.items()}
+    ids, mes, monto = bloque['id'], bloque['mes'], bloque['monto']
+    dia_pago = bloque['dia_pago'].astype(np.int64)
+    mes_fuga = bloque['mes_fuga']
+    dia_fuga = bloque['dia_fuga'].astype(np.int64)
+
+    fechas_meses = np.array(meses, dtype='datetime64[D]')
+    inicio_meses = fechas_meses.astype('datetime64[M]').astype('datetime64[D]')
+    un_dia = np.timedelta64(1, 'D')
+    nat = np.datetime64('NaT')
+
+    # Etiquetas 'YYYY-MM' de los meses; la última ('NaT') es la de los registros sin fecha
+    etiquetas_meses = list(fechas_meses.astype('datetime64[M]').astype(str)) + ['NaT']
+    sin_fecha = len(meses)
+
+    # Un texto por socio del bloque (no por registro)
+    ids_unicos, codigos_ids = np.unique(ids, return_inverse=True)
+
+    fugado = mes_fuga >= 0
+    fecha_pago = np.where(dia_pago > 0, inicio_meses[mes] + (dia_pago - 1) * un_dia, nat)
+    fecha_fuga = np.where(fugado, inicio_meses[np.maximum(mes_fuga, 0)] + (dia_fuga - 1) * un_dia, nat)
+
+    df = pd.DataFrame({
+        'Id_donante': pd.Categorical.from_codes(codigos_ids, 'D' + pd.Series(ids_unicos + 1).astype(str).str.zfill(6)),
+        'Método_Pago': pd.Categorical.from_codes(bloque['metodo'], metodos_pago),
+        'Estrategia': pd.Categorical.from_codes(bloque['estrategia'], estrategias),
+        'Fecha_Creacion': pd.to_datetime(fechas_meses[bloque['mes_creacion']]),
+        'Fecha_Pago': pd.to_datetime(fecha_pago),
+        'Monto_Donacion': monto,
+        'Status_Socio': pd.Categorical.from_codes(fugado.astype(np.int8), ['Activo', 'Fugado']),
+        'Fecha_Fuga': pd.to_datetime(fecha_fuga),
+        'Año_Mes_Creacion': pd.Categorical.from_codes(bloque['mes_creacion'], etiquetas_meses),
+        'Año_Mes_Donacion': pd.Categorical.from_codes(np.where(dia_pago > 0, mes, sin_fecha), etiquetas_meses),
+        'Año_Mes_Fuga': pd.Categorical.from_codes(np.where(fugado, mes_fuga, sin_fecha), etiquetas_meses)
+    })
+    return df
+
+
+def _procesar_bloque(inicio, fin, simulacion, meses, metodos_pago, carpeta_parquet):
+    """
+    Simula y materializa el bloque de meses [inicio, fin) y retorna sus
+    totales, su resumen mensual y los registros sin Fecha_Pago (que se
+    escriben al final). Si se indica carpeta_parquet escribe ahí las
+    particiones del bloque; si no, retorna también los registros con fecha
+    ('con_fecha') para escribirlos en CSV.
+    """
+    bloque = _simular_bloque(inicio, fin, simulacion)
+    df = _materializar_registros(bloque, meses, metodos_pago, ESTRATEGIAS)
+    montos = df['Monto_Donacion'].fillna(0)
+    sin_pago = df['Fecha_Pago'].isna()
+    df_con_fecha = df[~sin_pago]
+    resultado = {
+        'registros': len(df),
+        'donaciones': montos.sum(),
+        'transacciones': int((montos > 0).sum()),
+        # Id como texto: se ordenan como texto al concatenar los de todos los bloques
+        'sin_pago': df[sin_pago].astype({'Id_donante': object}),
+        'resumen': _resumen_mensual(df_con_fecha)
+    }
+    if carpeta_parquet is not None:
+        _escribir_particiones_parquet(df_con_fecha, carpeta_parquet)
+    else:
+        resultado['con_fecha'] = df_con_fecha
+    return resultado
+
+
+def _escribir_particiones_parquet(df, carpeta):
+    """
+    Escribe un bloque de registros en el dataset raw particionado por
+    Año_Mes_Donacion, un archivo por mes. Los registros sin fecha de pago
+    van a la partición nula de Hive.
+    """
+    df = df.copy()
+    # Las categóricas se escriben como texto (mismo archivo y metadatos que con
+    # columnas object); astype(object) solo copia referencias a las categorías
+    for columna in df.select_dtypes('category').columns:
+        df[columna] = df[columna].astype(object)
+    for columna in ['Año_Mes_Donacion', 'Año_Mes_Fuga']:
+        df[columna] = df[columna].where(df[columna] != 'NaT')
+    tabla = pa.Table.from_pandas(df, schema=ESQUEMA_RAW, preserve_index=False)
+    tabla = tabla.drop_columns(['Año_Mes_Donacion'])
+
+    for mes, posiciones in df.groupby('Año_Mes_Donacion', dropna=False, sort=False).indices.items():
+        valor = mes if isinstance(mes, str) else PARTICION_SIN_VALOR
+        carpeta_mes = os.path.join(carpeta, f"Año_Mes_Donacion={valor}")
+        os.makedirs(carpeta_mes, exist_ok=True)
+        pq.write_table(tabla.take(posiciones), os.path.join(carpeta_mes, "part-0.parquet"))
+
+
+def _resumen_mensual(df_con_fecha):
+    """
+    Resumen por Año_Mes_Donacion de un bloque de registros con Fecha_Pago.
+    """
+    monto = df_con_fecha['Monto_Donacion']
+    es_fugado = df_con_fecha['Status_Socio'] == 'Fugado'
+    columnas = pd.DataFrame({
+        'Año_Mes_Donacion': df_con_fecha['Año_Mes_Donacion'],
+        'Id_donante': df_con_fecha['Id_donante'],
+        'Monto_Positivo': monto.where(monto > 0, 0),
+        'Exitosa': monto > 0,
+        'Fugado': es_fugado,
+        'Fallo_Cobro': ~es_fugado & (monto == 0)
+    })
+
+    resumen_mensual = columnas.groupby('Año_Mes_Donacion', observed=True).agg(
+        Total_Donaciones=('Monto_Positivo', 'sum'),
+        Cantidad_Donaciones_Exitosas=('Exitosa', 'sum'),
+        Fugados=('Fugado', 'sum'),
+        Donantes_Unicos=('Id_donante', 'nunique'),
+        Fallos_Cobro=('Fallo_Cobro', 'sum')
+    )
 
     resumen_mensual['Tasa_Exito_%'] = (
         resumen_mensual['Cantidad_Donaciones_Exitosas'] /
         (resumen_mensual['Cantidad_Donaciones_Exitosas'] + resumen_mensual['Fallos_Cobro']) * 100
     ).round(2)
+    return resumen_mensual
 
-    print(resumen_mensual)
-
-    total_donaciones_acumuladas = df['Monto_Donacion'].fillna(0).sum()
-    total_registros = len(df)
-    total_transacciones_acumuladas = (df['Monto_Donacion'].fillna(0) > 0).sum()
 
-    print(f"\nTotal donaciones acumuladas: {total_donaciones_acumuladas:,}")
-    print(f"\nCantidad total de registros generados: {total_registros}")
-    print(f"Total transacciones acumuladas (>0): {total_transacciones_acumuladas:,}")
+def _rss_pico_mb():
+    """
+    Memoria residente máxima del proceso en MB (None si no se puede medir).
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
 
-    # Guardar CSV
-    SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-    ruta_csv = os.path.join(SCRIPT_DIR, "..", "layer", "raw", "datos_donantes_sinteticos.csv")
-    os.makedirs(os.path.join(SCRIPT_DIR, "..", "layer", "raw"), exist_ok=True)
-    df.to_csv(ruta_csv, index=False, encoding='utf-8-sig')
-    print(f"\nArchivo guardado correctamente en: {ruta_csv}")
 
-    return ruta_csv
+def _fecha(texto):
+    return datetime.strptime(texto, "%Y-%m-%d")
 
 
 if __name__ == "__main__":
-    generar_datos_sinteticos()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Genera el dataset sintético de donaciones (capa raw).")
+    parser.add_argument("--perfil", choices=sorted(PERFILES), default="estandar",
+                        help="Perfil de parámetros base (estandar | estres)")
+    parser.add_argument("--socios-mensuales", type=int, help="Nuevos socios por mes")
+    parser.add_argument("--tasa-fuga", type=float, help="Tasa de fuga mensual (ej. 0.02)")
+    parser.add_argument("--fecha-inicio", type=_fecha, help="Primer mes (YYYY-MM-DD)")
+    parser.add_argument("--fecha-fin", type=_fecha, help="Último mes (YYYY-MM-DD)")
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    parser.add_argument("--meses-por-bloque", type=int, default=6,
+                        help="Meses materializados por bloque de escritura")
+    parser.add_argument("--formato", choices=sorted(NOMBRES_RAW), default="parquet",
+                        help="Formato de la capa raw")
+    parser.add_argument("--salida", help="Ruta de salida (archivo CSV o carpeta del dataset parquet)")
+    parser.add_argument("--forzar", action="store_true",
+                        help="Regenera aunque los parámetros no hayan cambiado")
+    parser.add_argument("--trabajadores", type=int, default=1,
+                        help="Procesos para simular y escribir los bloques de meses (por defecto 1; 0 = uno por CPU)")
+    args = parser.parse_args()
+
+    generar_datos_sinteticos(
+        perfil=args.perfil,
+        socios_mensuales=args.socios_mensuales,
+        tasa_fuga_mensual=args.tasa_fuga,
+        fecha_inicio=args.fecha_inicio,
+        fecha_fin=args.fecha_fin,
+        semilla=args.semilla,
+        meses_por_bloque=args.meses_por_bloque,
+        ruta_salida=args.salida,
+        formato=args.formato,
+        trabajadores=args.trabajadores or os.cpu_count() or 1,
+        forzar=args.forzar
+    )
@@ -1,14 +1,73 @@
 import os
+import numpy as np
 import pandas as pd
-from datetime import datetime, timezone
-import dataframe_image as dfi
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-def procesar_a_gold(nombre_archivo="donantes_silver_pivot.parquet"):
+try:
+    from scripts.manifiesto import (leer_manifiesto, guardar_manifiesto, firma_paso, sin_cambios,
+                                    guardar_linaje, SIN_CAMBIOS)
+    from scripts.silver_layer import leer_silver_incremental
+    from scripts.metricas import calcular_metricas, resumen_metricas
+    from scripts.instrumentacion import etapa, medir_capa, tamano_en_disco
+    from scripts.png_gold import exportar_png_gold, MODOS_PNG
+except ImportError:  # ejecución directa: python scripts/gold_layer.py
+    from manifiesto import (leer_manifiesto, guardar_manifiesto, firma_paso, sin_cambios,
+                            guardar_linaje, SIN_CAMBIOS)
+    from silver_layer import leer_silver_incremental
+    from metricas import calcular_metricas, resumen_metricas
+    from instrumentacion import etapa, medir_capa, tamano_en_disco
+    from png_gold import exportar_png_gold, MODOS_PNG
+
+MANIFIESTO = "manifiesto_gold.json"
+LINAJE = "linaje_gold.json"
+
+# Columnas de Silver (formato largo) que necesita Gold
+COLUMNAS_SILVER = ['Año_Mes_Creacion', 'Año_Mes_Donacion', 'Monto_Donacion']
+
+# Cubo de cohortes para el dashboard: métricas por cohorte x periodo x
+# estrategia x método de pago x estado del socio. Las métricas *_Nuevos
+# cuentan a cada donante solo en su primer periodo, así que suman sin
+# duplicar en cualquier corte. Se escribe con un row group por cohorte para
+# que los filtros del dashboard descarten cohortes por estadísticas.
+ARCHIVO_CUBO = "cubo_cohortes_gold.parquet"
+DIMENSIONES_CUBO = ['Año_Mes_Creacion', 'Año_Mes_Donacion', 'Estrategia', 'Método_Pago', 'Status_Socio']
+COLUMNAS_CUBO = COLUMNAS_SILVER + ['Id_donante', 'Estrategia', 'Método_Pago', 'Status_Socio',
+                                   'Fecha_Creacion', 'Fecha_Fuga']
+
+# Modo incremental: estado de fuga de Silver con que se actualizó el cubo por
+# última vez, para detectar las fugas nuevas en la próxima ejecución
+ARCHIVO_FUGAS = "fugas_gold.parquet"
+COLUMNAS_FUGA = ['Id_donante', 'Fecha_Fuga']
+
+
+@medir_capa("gold")
+def procesar_a_gold(nombre_archivo="donantes_silver.parquet", incremental=False, motor="pandas", forzar=False,
+                    png="sincrono"):
     """
     Procesa los datos desde la capa Silver hacia la capa Gold.
-    - Calcula montos y cantidad de transacciones por mes relativo.
+    - Calcula montos y cantidad de transacciones por mes relativo, leyendo
+      de Silver en formato largo solo las columnas necesarias (también
+      acepta el pivot donantes_silver_pivot.parquet).
     - Genera resúmenes estilo 'show()'.
     - Guarda resultados en /gold y archivos PNG de resumen.
+
+    png elige cuándo se generan los PNG (ver png_gold): "sincrono" (antes
+    de terminar), "diferido" (en segundo plano, Gold termina al escribir
+    los Parquet) u "omitir" (los genera aparte generar_png_gold). Si una
+    tabla no cambió, su PNG no se regenera.
+
+    Con incremental=True lee solo los meses de Silver incremental que no
+    figuran en el manifiesto de Gold, suma su aporte a las tablas existentes
+    y actualiza solo las celdas afectadas del cubo (actualizar_cubo_cohortes).
+
+    Con motor="duckdb" o motor="polars" (modo completo, Silver en formato
+    largo) los totales por mes relativo y el cubo se agregan sobre el
+    Parquet de Silver con ese motor (SQL o plan lazy de Polars).
+
+    Si las entradas de Silver, el código y los parámetros coinciden con
+    linaje_gold.json no se recalcula nada y se retorna SIN_CAMBIOS (el DAG
+    marca la tarea como omitida); forzar=True lo ignora.
     """
     # -------------------------------
     # CONFIGURACIÓN
@@ -18,6 +77,29 @@ def procesar_a_gold(nombre_archivo="donantes_silver_pivot.parquet"):
     carpeta_gold = os.path.join(base_dir, "..", "layer", "gold")
     ruta_silver = os.path.join(carpeta_silver, nombre_archivo)
     os.makedirs(carpeta_gold, exist_ok=True)
+    ruta_linaje = os.path.join(carpeta_gold, LINAJE)
+    if png not in MODOS_PNG:
+        raise ValueError(f"Modo PNG no soportado: {png!r} (usar 'sincrono', 'diferido' u 'omitir')")
+    salidas = [os.path.join(carpeta_gold, nombre) for nombre in
+               ("suma_montos_gold.parquet", "cantidad_personas_gold.parquet", ARCHIVO_CUBO)]
+
+    if incremental:
+        entradas = {
+            'manifiesto_silver': os.path.join(carpeta_silver, "manifiesto_silver.json"),
+            'fugas_silver': os.path.join(carpeta_silver, "fugas_silver.parquet")
+        }
+        if not all(os.path.exists(ruta) for ruta in entradas.values()):
+            raise FileNotFoundError(f"No hay meses procesados en modo incremental en Silver: {carpeta_silver}")
+        firma = firma_paso(entradas, base_dir, {'incremental': True}, "gold_layer")
+        if not forzar and sin_cambios(ruta_linaje, firma, salidas):
+            print(f"✓ Silver sin cambios desde la última ejecución, Gold vigente: {carpeta_gold}")
+            return SIN_CAMBIOS
+        with etapa("gold", "incremental"):
+            _procesar_incremental(carpeta_silver, carpeta_gold, png)
+        with etapa("gold", "linaje"):
+            guardar_linaje(ruta_linaje, firma, salidas)
+        print(f"✓ Linaje registrado en: {ruta_linaje}")
+        return
 
     # -------------------------------
     # VALIDAR ARCHIVO
@@ -26,44 +108,61 @@ def procesar_a_gold(nombre_archivo="donantes_silver_pivot.parquet"):
         raise FileNotFoundError(f"No se encontró el archivo en Silver: {ruta_silver}")
     print(f"✓ Archivo encontrado en Silver: {ruta_silver}")
 
-    df_pivot = pd.read_parquet(ruta_silver)
-    print(f"✓ Archivo leído correctamente. Registros cargados: {len(df_pivot)}")
+    if motor not in ("pandas", "duckdb", "polars"):
+        raise ValueError(f"Motor no soportado: {motor!r} (usar 'pandas', 'duckdb' o 'polars')")
 
-    # -------------------------------
-    # MESES Y POSICIÓN DE INICIO
-    # -------------------------------
-    months = [col for col in df_pivot.columns if isinstance(col, str) and col[:4].isdigit() and '-' in col]
-    months = sorted(months, key=lambda x: pd.Period(x, freq='M'))  # orden cronológico
-    entry_idx = df_pivot['Año_Mes_Creacion'].apply(lambda x: months.index(x))
+    formato_largo = 'Año_Mes_Donacion' in pq.read_schema(ruta_silver).names
+    if not formato_largo:
+        salidas.remove(os.path.join(carpeta_gold, ARCHIVO_CUBO))
 
     # -------------------------------
-    # DATOS RELATIVOS
+    # LINAJE: SALTAR SI NO HAY CAMBIOS
     # -------------------------------
-    relative_data, presence_data = [], []
-    for idx, row in df_pivot.iterrows():
-        start = entry_idx[idx]
-        rel = row[months[start:]].tolist()
-        relative_data.append(rel)
-        pres = [1 if val > 0 else 0 for val in rel]
-        presence_data.append(pres)
-
-    max_months = max(len(r) for r in relative_data)
-    relative_data_padded = [r + [0]*(max_months-len(r)) for r in relative_data]
-    presence_data_padded = [r + [0]*(max_months-len(r)) for r in presence_data]
+    firma = firma_paso({'silver': ruta_silver}, base_dir, {'incremental': False, 'motor': motor},
+                       "gold_layer")
+    if not forzar and sin_cambios(ruta_linaje, firma, salidas):
+        print(f"✓ Silver sin cambios desde la última ejecución, Gold vigente: {carpeta_gold}")
+        return SIN_CAMBIOS
 
-    df_relative = pd.DataFrame(relative_data_padded)
-    df_presence = pd.DataFrame(presence_data_padded)
+    if formato_largo and motor == "duckdb":
+        try:
+            from scripts import motor_duckdb
+        except ImportError:  # ejecución directa: python scripts/gold_layer.py
+            import motor_duckdb
+        with motor_duckdb.conectar() as con, etapa("gold", "desplazamiento_cohortes", motor=motor) as medicion:
+            suma_montos, suma_trans = motor_duckdb.totales_por_mes_relativo(con, ruta_silver)
+            df_cubo = motor_duckdb.cubo_cohortes(con, ruta_silver, DIMENSIONES_CUBO)
+            medicion.update(filas=int(df_cubo['Registros'].sum()), bytes_leidos=tamano_en_disco(ruta_silver))
+        print(f"✓ Silver agregado con DuckDB: {df_cubo['Registros'].sum()} registros")
+    elif formato_largo and motor == "polars":
+        try:
+            from scripts import motor_polars
+        except ImportError:  # ejecución directa: python scripts/gold_layer.py
+            import motor_polars
+        with etapa("gold", "desplazamiento_cohortes", motor=motor) as medicion:
+            suma_montos, suma_trans = motor_polars.totales_por_mes_relativo(ruta_silver)
+            df_cubo = motor_polars.cubo_cohortes(ruta_silver, DIMENSIONES_CUBO)
+            medicion.update(filas=int(df_cubo['Registros'].sum()), bytes_leidos=tamano_en_disco(ruta_silver))
+        print(f"✓ Silver agregado con Polars: {df_cubo['Registros'].sum()} registros")
+    elif formato_largo:
+        # Formato largo: proyección de columnas y agregación por mes relativo
+        with etapa("gold", "lectura") as medicion:
+            df_silver = pd.read_parquet(ruta_silver, columns=COLUMNAS_CUBO)
+            medicion.update(filas=len(df_silver), bytes_leidos=tamano_en_disco(ruta_silver))
+        print(f"✓ Archivo leído correctamente. Registros cargados: {len(df_silver)}")
+        with etapa("gold", "desplazamiento_cohortes", filas=len(df_silver)):
+            suma_montos, suma_trans = totales_por_mes_relativo(df_silver)
+            df_cubo = construir_cubo_cohortes(df_silver)
+    else:
+        df_cubo = None
+        with etapa("gold", "lectura") as medicion:
+            df_pivot = pd.read_parquet(ruta_silver)
+            medicion.update(filas=len(df_pivot), bytes_leidos=tamano_en_disco(ruta_silver))
+        print(f"✓ Archivo leído correctamente. Registros cargados: {len(df_pivot)}")
+        with etapa("gold", "desplazamiento_cohortes", filas=len(df_pivot)):
+            suma_montos, suma_trans = _totales_desde_pivot(df_pivot)
 
-    cols = [f"Mes {i+1}" for i in range(max_months)]
-    df_relative.columns = cols
-    df_presence.columns = cols
-
-    # Agregar Periodo para mostrar como en PySpark
-    df_relative_t = df_relative.sum().reset_index()
-    df_relative_t.columns = ["Periodo", "Total_Monto"]
-
-    df_presence_t = df_presence.sum().reset_index()
-    df_presence_t.columns = ["Periodo", "Cantidad_Transacciones"]
+    df_relative_t, df_presence_t = tablas_gold(suma_montos, suma_trans)
 
     # -------------------------------
     # LOG ESTILO SHOW()
@@ -76,39 +175,343 @@ def procesar_a_gold(nombre_archivo="donantes_silver_pivot.parquet"):
     print(df_presence_t.to_string(index=False))
     print(f"Total transacciones acumuladas: {df_presence_t['Cantidad_Transacciones'].sum():,.0f}")
 
+    if df_cubo is not None:
+        print("\n--- KPIs por Cohorte (cubo) ---")
+        print(resumen_metricas(calcular_metricas(df_cubo), 'Año_Mes_Creacion').to_string())
+
     # -------------------------------
-    # GUARDAR PARQUET
+    # GUARDAR PARQUET Y PNG
     # -------------------------------
+    archivos = guardar_gold(carpeta_gold, df_relative_t, df_presence_t, df_cubo, png)
+    if df_cubo is not None:
+        print(f"✓ Cubo de cohortes: {len(df_cubo)} celdas")
+    else:
+        print("⚠ Entrada en formato pivot: el cubo de cohortes no se actualiza")
+
+    # -------------------------------
+    # MANIFIESTO DE LINAJE
+    # -------------------------------
+    with etapa("gold", "linaje"):
+        guardar_linaje(ruta_linaje, firma, salidas)
+    print(f"✓ Linaje registrado en: {ruta_linaje}")
+
+    print("\n✅ Proceso Gold finalizado correctamente.\n")
+    print(f"Archivos generados en {carpeta_gold}:")
+    for ruta in archivos:
+        print(f" - {ruta}")
+
+
+def guardar_gold(carpeta_gold, df_relative_t, df_presence_t, df_cubo=None, png="sincrono"):
+    """
+    Escribe las salidas del modo completo de Gold: tablas por mes relativo
+    (Parquet y PNG según el modo png) y, si se calculó, el cubo de
+    cohortes. Elimina el manifiesto de Gold porque las tablas se
+    recalcularon completas: el próximo modo incremental debe
+    reconstruirlas desde Silver en vez de sumar sobre ellas. Retorna las
+    rutas escritas.
+    """
     ruta_salida_montos = os.path.join(carpeta_gold, "suma_montos_gold.parquet")
     ruta_salida_trans = os.path.join(carpeta_gold, "cantidad_personas_gold.parquet")
-    df_relative_t.to_parquet(ruta_salida_montos, index=False)
-    df_presence_t.to_parquet(ruta_salida_trans, index=False)
+    with etapa("gold", "escritura") as medicion:
+        df_relative_t.to_parquet(ruta_salida_montos, index=False)
+        df_presence_t.to_parquet(ruta_salida_trans, index=False)
+        archivos = [ruta_salida_montos, ruta_salida_trans]
+        if df_cubo is not None:
+            ruta_salida_cubo = os.path.join(carpeta_gold, ARCHIVO_CUBO)
+            guardar_cubo_cohortes(df_cubo, ruta_salida_cubo)
+            archivos.append(ruta_salida_cubo)
+        medicion.update(filas=len(df_cubo) if df_cubo is not None else len(df_relative_t),
+                        bytes_escritos=tamano_en_disco(*archivos))
+
+    ruta_manifiesto = os.path.join(carpeta_gold, MANIFIESTO)
+    if os.path.exists(ruta_manifiesto):
+        os.remove(ruta_manifiesto)
+
+    return archivos + _exportar_png(carpeta_gold, df_relative_t, df_presence_t, png)
+
+
+def _exportar_png(carpeta_gold, df_relative_t, df_presence_t, png):
+    return exportar_png_gold(carpeta_gold, {
+        "suma_montos_gold.png": df_relative_t,
+        "cantidad_personas_gold.png": df_presence_t
+    }, png)
+
+
+def _procesar_incremental(carpeta_silver, carpeta_gold, png="sincrono"):
+    """
+    Suma a las tablas Gold el aporte de los meses nuevos de Silver.
+    El mes relativo de cada registro es la distancia en meses entre
+    Año_Mes_Donacion y Año_Mes_Creacion (Mes 1 = mes de creación), igual
+    que en el modo completo, así que los totales por mes relativo son
+    aditivos entre ejecuciones. El cubo de cohortes se actualiza solo en
+    las celdas afectadas (ver actualizar_cubo_cohortes).
+    """
+    manifiesto_silver = leer_manifiesto(os.path.join(carpeta_silver, "manifiesto_silver.json"))
+    if not manifiesto_silver['meses']:
+        raise FileNotFoundError(f"No hay meses procesados en modo incremental en Silver: {carpeta_silver}")
+
+    ruta_manifiesto = os.path.join(carpeta_gold, MANIFIESTO)
+    ruta_salida_montos = os.path.join(carpeta_gold, "suma_montos_gold.parquet")
+    ruta_salida_trans = os.path.join(carpeta_gold, "cantidad_personas_gold.parquet")
+
+    manifiesto = leer_manifiesto(ruta_manifiesto)
+    procesados = set(manifiesto['meses'])
+    nuevos = [mes for mes in manifiesto_silver['meses'] if mes not in procesados]
+    if not nuevos:
+        print(f"✓ Sin meses nuevos en Silver (marca de agua: {manifiesto['marca_agua']})")
+        return
+    print(f"✓ Meses nuevos a agregar: {len(nuevos)} ({nuevos[0]} .. {nuevos[-1]})")
+
+    df_nuevos = leer_silver_incremental(carpeta_silver, meses=nuevos)[COLUMNAS_CUBO]
+    delta_montos, delta_trans = totales_por_mes_relativo(df_nuevos)
 
     # -------------------------------
-    # GUARDAR PNG
+    # MERGE CON LAS TABLAS EXISTENTES
     # -------------------------------
-    ruta_png_montos = os.path.join(carpeta_gold, "suma_montos_gold.png")
-    ruta_png_trans = os.path.join(carpeta_gold, "cantidad_personas_gold.png")
-    dfi.export(df_relative_t, ruta_png_montos, max_cols=-1)
-    dfi.export(df_presence_t, ruta_png_trans, max_cols=-1)
+    if manifiesto['meses']:
+        montos_previos = _por_mes_relativo(pd.read_parquet(ruta_salida_montos), 'Total_Monto')
+        trans_previas = _por_mes_relativo(pd.read_parquet(ruta_salida_trans), 'Cantidad_Transacciones')
+    else:
+        # Primera ejecución incremental: las tablas se construyen desde cero
+        montos_previos = pd.Series(dtype='float64')
+        trans_previas = pd.Series(dtype='int64')
+
+    total_meses = int(max(len(montos_previos), delta_montos.index.max()))
+    indice = pd.RangeIndex(1, total_meses + 1)
+    suma_montos = montos_previos.reindex(indice, fill_value=0) + delta_montos.reindex(indice, fill_value=0)
+    suma_trans = trans_previas.reindex(indice, fill_value=0) + delta_trans.reindex(indice, fill_value=0)
+
+    df_relative_t, df_presence_t = tablas_gold(suma_montos, suma_trans)
+
+    print("\n--- Resumen Gold Montos ---")
+    print(df_relative_t.to_string(index=False))
+    print(f"Total donaciones acumuladas: {df_relative_t['Total_Monto'].sum():,.0f}")
+
+    print("\n--- Resumen Gold Transacciones (>0) ---")
+    print(df_presence_t.to_string(index=False))
+    print(f"Total transacciones acumuladas: {df_presence_t['Cantidad_Transacciones'].sum():,.0f}")
+
+    df_relative_t.to_parquet(ruta_salida_montos, index=False)
+    df_presence_t.to_parquet(ruta_salida_trans, index=False)
+    _exportar_png(carpeta_gold, df_relative_t, df_presence_t, png)
 
     # -------------------------------
-    # ARCHIVO INDICADOR
+    # CUBO DE COHORTES: SOLO LAS CELDAS AFECTADAS
     # -------------------------------
-    ahora_utc = datetime.now(timezone.utc)
-    indicador_py = os.path.join(carpeta_gold, "donantes_gold.py")
-    with open(indicador_py, "w", encoding="utf-8") as f:
-        f.write("# Archivo indicador para la capa Gold\n")
-        f.write(f"# Generado: {ahora_utc.isoformat()}\n")
-        f.write("# Contiene: suma_montos_gold.parquet, cantidad_personas_gold.parquet y PNGs\n")
-    print(f"✓ Archivo indicador creado: {indicador_py}")
+    ruta_cubo = os.path.join(carpeta_gold, ARCHIVO_CUBO)
+    ruta_fugas = os.path.join(carpeta_gold, ARCHIVO_FUGAS)
+    fugas = pd.read_parquet(os.path.join(carpeta_silver, "fugas_silver.parquet"), columns=COLUMNAS_FUGA)
+    if manifiesto['meses'] and os.path.exists(ruta_cubo):
+        # Sin la copia del estado de fuga, todas las fugas cuentan como nuevas
+        fugas_previas = (pd.read_parquet(ruta_fugas) if os.path.exists(ruta_fugas)
+                         else pd.DataFrame(columns=COLUMNAS_FUGA))
+        df_cubo = actualizar_cubo_cohortes(pd.read_parquet(ruta_cubo), df_nuevos, carpeta_silver,
+                                           manifiesto['meses'], fugas, fugas_previas)
+    else:
+        # Primera ejecución incremental: el cubo se construye desde cero
+        df_cubo = construir_cubo_cohortes(df_nuevos)
+    guardar_cubo_cohortes(df_cubo, ruta_cubo)
+    fugas.to_parquet(ruta_fugas, index=False)
+    print(f"✓ Cubo de cohortes: {len(df_cubo)} celdas")
+    print("\n--- KPIs por Cohorte (cubo) ---")
+    print(resumen_metricas(calcular_metricas(df_cubo), 'Año_Mes_Creacion').to_string())
 
-    print("\n✅ Proceso Gold finalizado correctamente.\n")
-    print(f"Archivos generados en {carpeta_gold}:")
-    print(f" - {ruta_salida_montos}")
-    print(f" - {ruta_salida_trans}")
-    print(f" - {ruta_png_montos}")
-    print(f" - {ruta_png_trans}")
+    manifiesto['meses'].extend(nuevos)
+    guardar_manifiesto(ruta_manifiesto, manifiesto)
+    print(f"✓ Manifiesto Gold actualizado (marca de agua: {manifiesto['marca_agua']})")
+
+
+def totales_por_mes_relativo(df_silver):
+    """
+    Totales por mes relativo desde Silver en formato largo: el mes relativo
+    de cada registro es la distancia en meses entre Año_Mes_Donacion y
+    Año_Mes_Creacion (Mes 1 = mes de creación). Retorna dos Series
+    indexadas por mes relativo (1..N): suma de montos y cantidad de
+    transacciones con monto > 0.
+    """
+    creacion = _numero_mes(df_silver['Año_Mes_Creacion'])
+    donacion = _numero_mes(df_silver['Año_Mes_Donacion'])
+    relativo = donacion - creacion
+    total_meses = int(donacion.max() - creacion.min() + 1)
+    montos = df_silver['Monto_Donacion'].fillna(0).to_numpy(dtype=np.float64)
+
+    indice = pd.RangeIndex(1, total_meses + 1)
+    suma_montos = pd.Series(np.bincount(relativo, weights=montos, minlength=total_meses), index=indice)
+    suma_trans = pd.Series(np.bincount(relativo[montos > 0], minlength=total_meses), index=indice)
+    return suma_montos, suma_trans
+
+
+def construir_cubo_cohortes(df_silver, contados=None):
+    """
+    Agrega Silver (formato largo) en el cubo de cohortes del dashboard, una
+    fila por Año_Mes_Creacion x Año_Mes_Donacion x Estrategia x Método_Pago
+    x Status_Socio (el estado es fijo por donante, así que no lo duplica):
+    - Donantes / Fugados: donantes (y donantes fugados) distintos en la celda.
+    - Donantes_Nuevos / Fugados_Nuevos: los mismos, contados solo en el
+      primer periodo de cada donante (totales por cohorte o segmento).
+    - Monto_Total, Transacciones (monto > 0) y Registros.
+    - Registros_Fugados y Meses_Activo_Fugados: cantidad de registros de
+      donantes fugados y suma de sus meses activos (días hasta la fuga / 30),
+      para promediar el lifetime por cohorte.
+    contados son los Id_donante cuyo primer periodo ya está en otro cubo
+    (modo incremental): no suman en Donantes_Nuevos ni en Fugados_Nuevos.
+    """
+    donante = pd.factorize(df_silver['Id_donante'])[0]
+    periodo = _numero_mes(df_silver['Año_Mes_Donacion'])
+    orden = np.lexsort((periodo, donante))
+    donante_ord, periodo_ord = donante[orden], periodo[orden]
+
+    # Primer registro de cada donante y de cada donante x periodo
+    cambia_donante = np.r_[True, donante_ord[1:] != donante_ord[:-1]]
+    cambia_periodo = cambia_donante | np.r_[True, periodo_ord[1:] != periodo_ord[:-1]]
+    primero = np.zeros(len(df_silver), dtype=bool)
+    distinto = np.zeros(len(df_silver), dtype=bool)
+    primero[orden[cambia_donante]] = True
+    distinto[orden[cambia_periodo]] = True
+    if contados is not None:
+        primero &= ~df_silver['Id_donante'].isin(contados).to_numpy()
+
+    monto = df_silver['Monto_Donacion'].fillna(0).to_numpy(dtype=np.int64)
+    fugado = (df_silver['Status_Socio'] == 'Fugado').to_numpy()
+    dias_activo = (pd.to_datetime(df_silver['Fecha_Fuga']) - pd.to_datetime(df_silver['Fecha_Creacion'])).dt.days
+
+    df_cubo = df_silver[DIMENSIONES_CUBO].assign(
+        Donantes=distinto,
+        Donantes_Nuevos=primero,
+        Fugados=distinto & fugado,
+        Fugados_Nuevos=primero & fugado,
+        Monto_Total=monto,
+        Transacciones=monto > 0,
+        Registros=1,
+        Registros_Fugados=fugado,
+        Meses_Activo_Fugados=dias_activo.where(fugado, 0.0).to_numpy()
+    )
+    df_cubo = df_cubo.groupby(DIMENSIONES_CUBO, observed=True, sort=True).sum().reset_index()
+    # Se suman días enteros y se pasa a meses al final: la suma es exacta en
+    # cualquier orden, así que los motores alternativos dan el mismo cubo
+    df_cubo['Meses_Activo_Fugados'] = df_cubo['Meses_Activo_Fugados'] / 30
+    df_cubo[DIMENSIONES_CUBO] = df_cubo[DIMENSIONES_CUBO].astype(str)
+    # Orden por el texto de las dimensiones (el groupby ordena por los
+    # códigos de las categóricas, que siguen el orden de aparición en
+    # Bronze): es el mismo orden que dan los motores DuckDB y Polars
+    df_cubo = df_cubo.sort_values(DIMENSIONES_CUBO, ignore_index=True)
+    conteos = ['Donantes', 'Donantes_Nuevos', 'Fugados', 'Fugados_Nuevos', 'Transacciones',
+               'Registros', 'Registros_Fugados']
+    df_cubo[conteos] = df_cubo[conteos].astype('int64')
+    return df_cubo
+
+
+def actualizar_cubo_cohortes(df_cubo, df_nuevos, carpeta_silver, procesados, fugas, fugas_previas):
+    """
+    Agrega al cubo guardado (construido con los meses procesados) los
+    registros de los meses nuevos de Silver incremental (df_nuevos), sin
+    reconstruirlo desde todo Silver. Las métricas del cubo son sumas por
+    donante que dependen solo de sus registros y de su estado de fuga:
+    - Las cohortes tocadas por fugas nuevas (donantes de fugas que no están
+      en fugas_previas o con otra Fecha_Fuga) se recalculan completas con
+      los registros Silver de esas cohortes: la fuga cambia Status_Socio y
+      los meses activos en todos los periodos del donante.
+    - También se recalculan las cohortes con donantes cuyo primer periodo
+      pasa a un mes nuevo anterior a los procesados (meses fuera de orden).
+    - En el resto solo se agregan las celdas de los meses nuevos, sin
+      contar en Donantes_Nuevos a los donantes con meses procesados.
+    De los meses procesados se leen solo Id_donante, Año_Mes_Creacion y
+    Año_Mes_Donacion de los donantes afectados. Retorna el cubo completo,
+    ordenado como construir_cubo_cohortes.
+    """
+    meses_nuevos = sorted(df_nuevos['Año_Mes_Donacion'].astype(str).unique())
+    cambios = fugas.merge(fugas_previas, how='outer', indicator=True)
+    fugados = set(cambios.loc[cambios['_merge'] != 'both', 'Id_donante'])
+    afectados = sorted(fugados | set(df_nuevos['Id_donante']))
+
+    carpeta_incremental = os.path.join(carpeta_silver, "donantes_silver_incremental")
+    historial = pd.read_parquet([os.path.join(carpeta_incremental, f"{mes}.parquet") for mes in procesados],
+                                columns=['Id_donante', 'Año_Mes_Creacion', 'Año_Mes_Donacion'],
+                                filters=[('Id_donante', 'in', afectados)])
+
+    # Primer periodo de cada donante en los meses procesados y en los nuevos
+    previo = pd.Series(_numero_mes(historial['Año_Mes_Donacion'])).groupby(historial['Id_donante'].to_numpy()).min()
+    nuevo = pd.Series(_numero_mes(df_nuevos['Año_Mes_Donacion'])).groupby(df_nuevos['Id_donante'].to_numpy()).min()
+    comunes = previo.index.intersection(nuevo.index)
+    adelantados = set(comunes[nuevo[comunes].to_numpy() < previo[comunes].to_numpy()])
+
+    cohorte = pd.concat([historial[['Id_donante', 'Año_Mes_Creacion']], df_nuevos[['Id_donante', 'Año_Mes_Creacion']]])
+    recalcular = cohorte['Id_donante'].isin(fugados | adelantados)
+    cohortes = sorted(set(cohorte.loc[recalcular, 'Año_Mes_Creacion'].astype(str)))
+
+    partes = [df_cubo[~df_cubo['Año_Mes_Creacion'].isin(cohortes)]]
+    if cohortes:
+        df_cohortes = leer_silver_incremental(carpeta_silver, meses=procesados + meses_nuevos,
+                                              filtros=[('Año_Mes_Creacion', 'in', cohortes)])
+        partes.append(construir_cubo_cohortes(df_cohortes[COLUMNAS_CUBO]))
+    df_resto = df_nuevos[~df_nuevos['Año_Mes_Creacion'].astype(str).isin(cohortes)]
+    partes.append(construir_cubo_cohortes(df_resto, contados=previo.index))
+    print(f"✓ Cubo: {len(cohortes)} cohortes recalculadas por fugas nuevas, "
+          f"celdas de {len(meses_nuevos)} meses nuevos agregadas")
+    return pd.concat(partes, ignore_index=True).sort_values(DIMENSIONES_CUBO, ignore_index=True)
+
+
+def guardar_cubo_cohortes(df_cubo, ruta):
+    """
+    Escribe el cubo ordenado por cohorte con un row group por cohorte: las
+    estadísticas min/max de cada row group permiten que una lectura con
+    filtros (rango de cohortes, segmentos) salte las cohortes excluidas.
+    """
+    tabla = pa.Table.from_pandas(df_cubo, preserve_index=False)
+    cohortes = df_cubo['Año_Mes_Creacion'].to_numpy()
+    inicios = np.flatnonzero(np.r_[True, cohortes[1:] != cohortes[:-1]])
+    finales = np.r_[inicios[1:], len(df_cubo)]
+    with pq.ParquetWriter(ruta, tabla.schema) as writer:
+        for inicio, fin in zip(inicios, finales):
+            writer.write_table(tabla.slice(inicio, fin - inicio))
+
+
+def _totales_desde_pivot(df_pivot):
+    """
+    Totales por mes relativo desde el pivot ancho de Silver: cada celda se
+    desplaza según el índice del mes de creación del donante.
+    """
+    months = [col for col in df_pivot.columns if isinstance(col, str) and col[:4].isdigit() and '-' in col]
+    months = sorted(months, key=lambda x: pd.Period(x, freq='M'))  # orden cronológico
+    entry_idx = pd.Index(months).get_indexer(df_pivot['Año_Mes_Creacion'].astype(str))
+    if (entry_idx < 0).any():
+        raise ValueError("Hay cohortes (Año_Mes_Creacion) sin columna de mes en el pivot de Silver")
+
+    # Mes relativo de cada celda = índice del mes - índice de la cohorte del
+    # donante; las celdas anteriores a la cohorte quedan fuera
+    valores = df_pivot[months].to_numpy(dtype=np.float64)
+    relativo = np.arange(len(months))[np.newaxis, :] - entry_idx[:, np.newaxis]
+    vigente = relativo >= 0
+    max_months = len(months) - int(entry_idx.min())
+
+    indice = pd.RangeIndex(1, max_months + 1)
+    suma_montos = pd.Series(np.bincount(relativo[vigente], weights=valores[vigente], minlength=max_months), index=indice)
+    suma_trans = pd.Series(np.bincount(relativo[vigente][valores[vigente] > 0], minlength=max_months), index=indice)
+    return suma_montos, suma_trans
+
+
+def tablas_gold(suma_montos, suma_trans):
+    """Tablas Gold ('Mes N', total) a partir de Series indexadas por mes relativo."""
+    periodos = [f"Mes {i}" for i in suma_montos.index]
+    df_relative_t = pd.DataFrame({"Periodo": periodos, "Total_Monto": suma_montos.astype('float64').values})
+    df_presence_t = pd.DataFrame({"Periodo": periodos, "Cantidad_Transacciones": suma_trans.astype('int64').values})
+    return df_relative_t, df_presence_t
+
+
+def _numero_mes(periodos):
+    """
+    Convierte periodos 'AAAA-MM' en números de mes absolutos (año * 12 + mes).
+    Se calcula sobre las categorías y se expande con los códigos.
+    """
+    periodos = periodos.astype('category')
+    categorias = periodos.cat.categories.astype(str)
+    numeros = np.asarray(categorias.str[:4].astype(int) * 12 + categorias.str[5:7].astype(int))
+    return numeros[periodos.cat.codes.to_numpy()]
+
+
+def _por_mes_relativo(df_gold, columna):
+    """Serie de una tabla Gold indexada por número de mes relativo ('Mes 3' -> 3)."""
+    return pd.Series(df_gold[columna].values, index=df_gold['Periodo'].str[4:].astype(int))
 
 
 # =======================
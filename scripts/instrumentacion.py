@@ -0,0 +1,274 @@
+import contextlib
+import functools
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+# Instrumentación de las etapas del pipeline (lectura, filtro, pivot,
+# desplazamiento de cohortes, escritura, PNG, linaje). Cada etapa emite:
+# - un log estructurado (JSON) en el logger "medallon.etapas",
+# - métricas StatsD por UDP si MEDALLON_STATSD="host:puerto" (o "host", al
+#   puerto 8125),
+# - métricas en formato de texto Prometheus (texto_prometheus), escritas en
+#   MEDALLON_PROMETHEUS_ARCHIVO si está definida (textfile collector).
+# Con MEDALLON_PERFILAR="cprofile" (o "pyinstrument", si está instalado) cada
+# etapa se perfila y el resultado queda en MEDALLON_PERFILES_DIR; con
+# MEDALLON_PERFILAR_ETAPAS="silver.pivot,gold.total" solo las indicadas.
+# En las ejecuciones locales (main.py, pipeline_memoria, benchmark) los logs
+# se configuran con configurar_logging(): MEDALLON_LOG_NIVEL (INFO por
+# defecto) y MEDALLON_LOG_ARCHIVO (si no se define, van a stderr).
+PREFIJO = "medallon"
+PUERTO_STATSD = 8125
+logger = logging.getLogger("medallon.etapas")
+
+# Últimos valores por (métrica, capa, etapa) para la exposición Prometheus
+_registro = {}
+_candado = threading.Lock()
+_perfilando = threading.local()
+
+METRICAS = {
+    'segundos': "Duración de la etapa en segundos",
+    'filas': "Filas procesadas por la etapa",
+    'bytes_leidos': "Bytes leídos de disco por la etapa",
+    'bytes_escritos': "Bytes escritos en disco por la etapa",
+    'rss_pico_mb': "RSS pico del proceso al terminar la etapa (MB)"
+}
+
+
+@contextlib.contextmanager
+def etapa(capa, nombre, **atributos):
+    """
+    Mide una etapa: tiempo de pared, RSS pico del proceso y los contadores
+    que el bloque cargue en la medición (filas, bytes_leidos,
+    bytes_escritos). Uso:
+
+        with etapa("silver", "lectura") as medicion:
+            df = pd.read_parquet(ruta)
+            medicion['filas'] = len(df)
+            medicion['bytes_leidos'] = tamano_en_disco(ruta)
+
+    La medición se emite también si el bloque falla (con estado 'error').
+    """
+    medicion = dict(atributos)
+    perfilador = _iniciar_perfil(capa, nombre)
+    inicio = time.perf_counter()
+    estado = "ok"
+    try:
+        yield medicion
+    except BaseException:
+        estado = "error"
+        raise
+    finally:
+        medicion['segundos'] = round(time.perf_counter() - inicio, 4)
+        medicion['rss_pico_mb'] = rss_pico_mb()
+        if perfilador is not None:
+            medicion['perfil'] = _detener_perfil(perfilador, capa, nombre)
+        _emitir(capa, nombre, estado, medicion)
+
+
+def configurar_logging():
+    """
+    Configura el logging raíz para las ejecuciones locales, así los logs
+    estructurados de las etapas no se descartan. No cambia nada si el
+    logging ya está configurado (por ejemplo, en Airflow).
+    """
+    logging.basicConfig(
+        level=os.environ.get("MEDALLON_LOG_NIVEL", "INFO").upper(),
+        filename=os.environ.get("MEDALLON_LOG_ARCHIVO"),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+
+
+def medir_capa(capa):
+    """Decorador: mide la función completa de una capa como la etapa 'total'."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with etapa(capa, "total"):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def tamano_en_disco(*rutas):
+    """Bytes de los archivos indicados (las carpetas se recorren completas)."""
+    total = 0
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            total += sum(os.path.getsize(os.path.join(raiz, nombre))
+                         for raiz, _, nombres in os.walk(ruta) for nombre in nombres)
+        elif os.path.exists(ruta):
+            total += os.path.getsize(ruta)
+    return total
+
+
+def rss_pico_mb():
+    """RSS pico del proceso en MB (None si la plataforma no lo informa)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss viene en KB en Linux y en bytes en macOS
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+# -------------------------------
+# EMISIÓN
+# -------------------------------
+def _emitir(capa, nombre, estado, medicion):
+    registro = {
+        'evento': "etapa",
+        'capa': capa,
+        'etapa': nombre,
+        'estado': estado,
+        'momento': datetime.now(timezone.utc).isoformat(),
+        **medicion
+    }
+    logger.info(json.dumps(registro, ensure_ascii=False, default=str))
+
+    valores = {metrica: medicion[metrica] for metrica in METRICAS if medicion.get(metrica) is not None}
+    ruta_prometheus = os.environ.get("MEDALLON_PROMETHEUS_ARCHIVO")
+    with _candado:
+        for metrica, valor in valores.items():
+            _registro[(metrica, capa, nombre)] = valor
+        if ruta_prometheus:
+            # Bajo el candado: las etapas de otros hilos no escriben el archivo a la vez
+            _escribir_prometheus(ruta_prometheus, _formatear_prometheus(_registro))
+    _enviar_statsd(capa, nombre, valores)
+
+
+def _escribir_prometheus(ruta, texto):
+    """
+    Reemplaza el archivo del textfile collector en forma atómica (archivo
+    temporal propio del proceso y del hilo + os.replace).
+    """
+    ruta_temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(ruta_temporal, "w", encoding="utf-8") as f:
+            f.write(texto)
+        os.replace(ruta_temporal, ruta)
+    except OSError as e:
+        # Las métricas nunca interrumpen el pipeline (ni ocultan el error de la etapa)
+        logger.warning(f"No se pudo escribir el archivo de métricas Prometheus ({ruta}): {e}")
+        with contextlib.suppress(OSError):
+            os.remove(ruta_temporal)
+
+
+def _enviar_statsd(capa, nombre, valores):
+    """Envía las métricas de una etapa a StatsD (UDP, sin esperar respuesta)."""
+    destino = os.environ.get("MEDALLON_STATSD")
+    if not destino or not valores:
+        return
+    direccion = _direccion_statsd(destino)
+    lineas = []
+    for metrica, valor in valores.items():
+        if metrica == 'segundos':
+            lineas.append(f"{PREFIJO}.{capa}.{nombre}.duracion_ms:{valor * 1000:.1f}|ms")
+        else:
+            lineas.append(f"{PREFIJO}.{capa}.{nombre}.{metrica}:{valor}|g")
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as conexion:
+            conexion.sendto("\n".join(lineas).encode("utf-8"), direccion)
+    except OSError as e:
+        # Las métricas nunca interrumpen el pipeline
+        logger.warning(f"No se pudieron enviar métricas a StatsD ({destino}): {e}")
+
+
+@functools.lru_cache(maxsize=None)
+def _direccion_statsd(destino):
+    """
+    (host, puerto) de MEDALLON_STATSD ("host:puerto", "host" o ":puerto").
+    Se interpreta una vez por valor; sin puerto, o con uno inválido (se
+    avisa), se usa PUERTO_STATSD.
+    """
+    host, separador, puerto = destino.strip().rpartition(":")
+    if not separador:
+        return (puerto or "localhost", PUERTO_STATSD)
+    try:
+        numero = int(puerto)
+        if not 0 < numero < 65536:
+            raise ValueError(puerto)
+    except ValueError:
+        logger.warning(f"Puerto StatsD inválido en MEDALLON_STATSD={destino!r}; se usa {PUERTO_STATSD}")
+        numero = PUERTO_STATSD
+    return (host or "localhost", numero)
+
+
+def texto_prometheus():
+    """Últimas mediciones de cada etapa en formato de exposición de Prometheus."""
+    with _candado:
+        return _formatear_prometheus(_registro)
+
+
+def _formatear_prometheus(registro):
+    lineas = []
+    for metrica, descripcion in METRICAS.items():
+        muestras = sorted((capa, nombre, valor) for (m, capa, nombre), valor in registro.items() if m == metrica)
+        if not muestras:
+            continue
+        lineas.append(f"# HELP {PREFIJO}_etapa_{metrica} {descripcion}")
+        lineas.append(f"# TYPE {PREFIJO}_etapa_{metrica} gauge")
+        for capa, nombre, valor in muestras:
+            lineas.append(f'{PREFIJO}_etapa_{metrica}{{capa="{capa}",etapa="{nombre}"}} {valor}')
+    return "\n".join(lineas) + "\n"
+
+
+def reiniciar_metricas():
+    """Vacía el registro de métricas (por ejemplo, entre corridas en un mismo proceso)."""
+    with _candado:
+        _registro.clear()
+
+
+# -------------------------------
+# PERFILADO OPCIONAL
+# -------------------------------
+def _iniciar_perfil(capa, nombre):
+    herramienta = os.environ.get("MEDALLON_PERFILAR")
+    if not herramienta or getattr(_perfilando, 'activo', False):
+        # Un solo perfilador a la vez: las etapas anidadas quedan dentro del perfil de la externa
+        return None
+    etapas = os.environ.get("MEDALLON_PERFILAR_ETAPAS")
+    if etapas and f"{capa}.{nombre}" not in [e.strip() for e in etapas.split(",")]:
+        return None
+
+    if herramienta == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("MEDALLON_PERFILAR=pyinstrument pero pyinstrument no está instalado")
+            return None
+        perfilador = Profiler()
+        perfilador.start()
+    else:
+        import cProfile
+        perfilador = cProfile.Profile()
+        perfilador.enable()
+    _perfilando.activo = True
+    return perfilador
+
+
+def _detener_perfil(perfilador, capa, nombre):
+    """Detiene el perfilador y guarda el resultado; retorna la ruta del archivo."""
+    _perfilando.activo = False
+    carpeta = os.environ.get("MEDALLON_PERFILES_DIR", os.path.join(tempfile.gettempdir(), "medallon_perfiles"))
+    os.makedirs(carpeta, exist_ok=True)
+    # Microsegundos y pid: las etapas cortas, o las de tareas paralelas de
+    # Airflow, no se pisan el archivo dentro del mismo segundo
+    marca = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{os.getpid()}"
+    if hasattr(perfilador, 'output_html'):  # pyinstrument
+        perfilador.stop()
+        ruta = os.path.join(carpeta, f"{capa}.{nombre}-{marca}.html")
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(perfilador.output_html())
+    else:
+        perfilador.disable()
+        ruta = os.path.join(carpeta, f"{capa}.{nombre}-{marca}.prof")
+        perfilador.dump_stats(ruta)
+    return ruta
@@ -0,0 +1,201 @@
+import ast
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+import pyarrow.parquet as pq
+
+# Resultado de un paso cuyas entradas no cambiaron desde la última ejecución
+# (el DAG lo traduce en una tarea 'skipped')
+SIN_CAMBIOS = "sin_cambios"
+
+
+def leer_manifiesto(ruta):
+    """
+    Lee el manifiesto JSON de una capa. Si aún no existe (primera ejecución
+    incremental) retorna un manifiesto vacío, sin meses procesados.
+    """
+    if not os.path.exists(ruta):
+        return {'meses': [], 'marca_agua': None}
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def guardar_manifiesto(ruta, manifiesto):
+    """
+    Guarda el manifiesto de una capa de forma atómica (archivo temporal +
+    os.replace), actualizando la marca de agua y la fecha de generación.
+    Se escribe después de los datos: si la ejecución falla antes, los meses
+    pendientes se reprocesan en la siguiente.
+    """
+    manifiesto['meses'] = sorted(set(manifiesto['meses']))
+    manifiesto['marca_agua'] = manifiesto['meses'][-1] if manifiesto['meses'] else None
+    manifiesto['actualizado'] = datetime.now(timezone.utc).isoformat()
+
+    ruta_temporal = ruta + ".tmp"
+    with open(ruta_temporal, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    os.replace(ruta_temporal, ruta)
+
+
+def huella_parquet(ruta):
+    """
+    Huella del contenido de un archivo Parquet: mtime, tamaño y hash del
+    footer (esquema, row groups y estadísticas). Cambia cada vez que el
+    pipeline escribe una versión nueva, sin leer los datos.
+    """
+    estado = os.stat(ruta)
+    return f"{estado.st_mtime_ns}-{estado.st_size}-{hashlib.sha1(_footer_parquet(ruta)).hexdigest()}"
+
+
+def _footer_parquet(ruta):
+    with open(ruta, "rb") as f:
+        f.seek(-8, os.SEEK_END)
+        largo_footer = int.from_bytes(f.read(4), "little")
+        f.seek(-(8 + largo_footer), os.SEEK_END)
+        return f.read(largo_footer)
+
+
+# -------------------------------
+# LINAJE (SALTAR SI NO HAY CAMBIOS)
+# -------------------------------
+def huella_contenido(ruta):
+    """
+    Huella del contenido de un archivo o carpeta, sin fecha de modificación
+    (regenerar los mismos datos no la cambia). Un Parquet se identifica por
+    tamaño + hash del footer; otros archivos, por el hash completo. Una
+    carpeta (dataset particionado) combina las huellas de sus archivos.
+
+    La huella de un Parquet es una heurística: el footer trae esquema, filas
+    y, por row group y columna, tamaños, offsets y estadísticas (mín., máx.,
+    nulos), pero no los datos. Un cambio que conserve el tamaño del archivo,
+    todos esos tamaños y las estadísticas (por ejemplo, permutar valores
+    dentro de un row group) no cambia la huella; en ese caso hay que usar
+    forzar=True. Es suficiente para las salidas del pipeline, que se
+    reescriben completas.
+    """
+    if os.path.isdir(ruta):
+        combinada = hashlib.sha1()
+        for raiz, carpetas, archivos in os.walk(ruta):
+            carpetas.sort()
+            for nombre in sorted(archivos):
+                if nombre.endswith(".tmp"):
+                    continue
+                ruta_archivo = os.path.join(raiz, nombre)
+                combinada.update(os.path.relpath(ruta_archivo, ruta).encode("utf-8"))
+                combinada.update(huella_contenido(ruta_archivo).encode("utf-8"))
+        return combinada.hexdigest()
+
+    if ruta.endswith(".parquet"):
+        return f"{os.path.getsize(ruta)}-{hashlib.sha1(_footer_parquet(ruta)).hexdigest()}"
+    contenido = hashlib.sha1()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            contenido.update(bloque)
+    return contenido.hexdigest()
+
+
+def version_codigo(carpeta_scripts, modulo=None):
+    """
+    Hash del código de un paso: el módulo indicado y los módulos de
+    carpeta_scripts que importa (ver modulos_importados), así un cambio en
+    otra capa no invalida su linaje. Sin modulo, todos los .py de la carpeta.
+    """
+    if modulo is None:
+        nombres = sorted(nombre for nombre in os.listdir(carpeta_scripts) if nombre.endswith(".py"))
+    else:
+        nombres = [f"{nombre}.py" for nombre in modulos_importados(carpeta_scripts, modulo)]
+    codigo = hashlib.sha1()
+    for nombre in nombres:
+        with open(os.path.join(carpeta_scripts, nombre), "rb") as f:
+            codigo.update(nombre.encode("utf-8") + f.read())
+    return codigo.hexdigest()
+
+
+def modulos_importados(carpeta_scripts, modulo):
+    """
+    Módulos de carpeta_scripts de los que depende modulo (incluido), en
+    orden alfabético: sus importaciones, directas o transitivas, como
+    paquete (scripts.x) o por nombre (x), también las que están dentro de
+    funciones (motores opcionales).
+    """
+    encontrados = set()
+    pendientes = [modulo]
+    while pendientes:
+        nombre = pendientes.pop()
+        ruta = os.path.join(carpeta_scripts, f"{nombre}.py")
+        if nombre in encontrados or not os.path.exists(ruta):
+            continue
+        encontrados.add(nombre)
+        with open(ruta, encoding="utf-8") as f:
+            arbol = ast.parse(f.read(), filename=ruta)
+        for nodo in ast.walk(arbol):
+            if isinstance(nodo, ast.Import):
+                importados = [alias.name for alias in nodo.names]
+            elif isinstance(nodo, ast.ImportFrom) and nodo.module and not nodo.level:
+                # from scripts import bronze_layer -> scripts.bronze_layer
+                importados = [nodo.module] + [f"{nodo.module}.{alias.name}" for alias in nodo.names]
+            else:
+                continue
+            for importado in importados:
+                if importado.startswith("scripts."):
+                    importado = importado[len("scripts."):]
+                if "." not in importado:
+                    pendientes.append(importado)
+    return sorted(encontrados)
+
+
+def firma_paso(entradas, carpeta_scripts, parametros, modulo=None):
+    """
+    Firma de una ejecución: huella de cada entrada, versión del código (del
+    módulo del paso y los que importa) y parámetros que afectan las salidas.
+    """
+    return {
+        'entradas': {nombre: huella_contenido(ruta) for nombre, ruta in entradas.items()},
+        'codigo': version_codigo(carpeta_scripts, modulo),
+        'parametros': parametros
+    }
+
+
+def sin_cambios(ruta_linaje, firma, salidas):
+    """True si el linaje guardado tiene la misma firma y las salidas siguen existiendo."""
+    if not os.path.exists(ruta_linaje) or not all(os.path.exists(salida) for salida in salidas):
+        return False
+    linaje = leer_manifiesto(ruta_linaje)
+    return {clave: linaje.get(clave) for clave in firma} == firma
+
+
+def guardar_linaje(ruta_linaje, firma, salidas):
+    """
+    Guarda el manifiesto de linaje de una capa: la firma de la ejecución y,
+    por cada salida, cantidad de filas y esquema (leídos del footer; de una
+    salida que no es Parquet, como el CSV raw, solo su tamaño).
+    """
+    linaje = dict(firma)
+    linaje['salidas'] = {os.path.basename(salida): _describir_parquet(salida) for salida in salidas}
+    linaje['generado'] = datetime.now(timezone.utc).isoformat()
+
+    ruta_temporal = ruta_linaje + ".tmp"
+    with open(ruta_temporal, "w", encoding="utf-8") as f:
+        json.dump(linaje, f, ensure_ascii=False, indent=2)
+    os.replace(ruta_temporal, ruta_linaje)
+
+
+def _describir_parquet(ruta):
+    """Filas y esquema de un Parquet, o de todos los Parquet de una carpeta."""
+    if not os.path.isdir(ruta) and not ruta.endswith(".parquet"):
+        return {'bytes': os.path.getsize(ruta)}
+    if os.path.isdir(ruta):
+        archivos = sorted(
+            os.path.join(raiz, nombre) for raiz, _, nombres in os.walk(ruta)
+            for nombre in nombres if nombre.endswith(".parquet")
+        )
+    else:
+        archivos = [ruta]
+    if not archivos:
+        return {'filas': 0, 'esquema': {}}
+    esquema = pq.read_schema(archivos[0])
+    return {
+        'filas': sum(pq.read_metadata(archivo).num_rows for archivo in archivos),
+        'esquema': {campo.name: str(campo.type) for campo in esquema}
+    }
@@ -0,0 +1,43 @@
+# Medidas aditivas del cubo de cohortes con las que se calculan los KPIs.
+# Los totales de donantes y fugados usan las métricas *_Nuevos (cada donante
+# cuenta solo en su primer periodo), equivalentes a un nunique por Id_donante.
+MEDIDAS = ['Donantes_Nuevos', 'Fugados_Nuevos', 'Monto_Total', 'Registros',
+           'Registros_Fugados', 'Meses_Activo_Fugados']
+
+# Bloques de KPIs que muestra el dashboard
+CLAVES_KPI = ['Año_Mes_Creacion', 'Estrategia', 'Método_Pago']
+
+
+def calcular_metricas(df_cubo, claves=CLAVES_KPI):
+    """
+    Calcula todos los bloques de KPIs a partir del cubo de cohortes con una
+    sola pasada agrupada: el cubo se agrega una vez por todas las claves
+    juntas y cada bloque se obtiene sumando ese resultado (mucho menor).
+
+    Retorna un diccionario con un DataFrame por clave (indexado por sus
+    valores) y 'Global' (una fila), con las medidas sumadas y los KPIs:
+    Donacion_Promedio, Tasa_Fuga (%), LTV y Lifetime (meses activos
+    promedio por registro de donantes fugados; NaN si no hay fugas).
+    """
+    base = df_cubo.groupby(list(claves), observed=True)[MEDIDAS].sum()
+
+    metricas = {'Global': _kpis(base.groupby(lambda _: 'Global').sum())}
+    for clave in claves:
+        metricas[clave] = _kpis(base.groupby(level=clave).sum())
+    return metricas
+
+
+def _kpis(sumas):
+    """Agrega a las medidas sumadas los KPIs derivados (cocientes)."""
+    return sumas.assign(
+        Donacion_Promedio=sumas['Monto_Total'] / sumas['Registros'],
+        Tasa_Fuga=sumas['Fugados_Nuevos'] / sumas['Donantes_Nuevos'] * 100,
+        LTV=sumas['Monto_Total'] / sumas['Donantes_Nuevos'],
+        Lifetime=(sumas['Meses_Activo_Fugados'] / sumas['Registros_Fugados']).where(sumas['Registros_Fugados'] > 0)
+    )
+
+
+def resumen_metricas(metricas, clave):
+    """Tabla de KPIs de un bloque, para los logs estilo 'show()'."""
+    return metricas[clave][['Donantes_Nuevos', 'Fugados_Nuevos', 'Monto_Total',
+                            'Donacion_Promedio', 'Tasa_Fuga', 'LTV', 'Lifetime']].round(2)
@@ -0,0 +1,267 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+try:
+    from scripts.generacion_datos_sinteticos import (configuracion_perfil, generar_meses, PERFILES,
+                                                     METODOS_PAGO_CONFIG, ESTRATEGIAS,
+                                                     PROBABILIDADES_ESTRATEGIAS, PROBABILIDAD_MONTO_BASE,
+                                                     MONTOS_BASE, MONTOS_ALTOS)
+    from scripts.gold_layer import tablas_gold, guardar_cubo_cohortes, DIMENSIONES_CUBO, ARCHIVO_CUBO
+    from scripts.metricas import calcular_metricas, resumen_metricas
+except ImportError:  # ejecución directa: python scripts/motor_analitico.py
+    from generacion_datos_sinteticos import (configuracion_perfil, generar_meses, PERFILES,
+                                             METODOS_PAGO_CONFIG, ESTRATEGIAS,
+                                             PROBABILIDADES_ESTRATEGIAS, PROBABILIDAD_MONTO_BASE,
+                                             MONTOS_BASE, MONTOS_ALTOS)
+    from gold_layer import tablas_gold, guardar_cubo_cohortes, DIMENSIONES_CUBO, ARCHIVO_CUBO
+    from metricas import calcular_metricas, resumen_metricas
+
+# Motor analítico: valores esperados de las tablas Gold calculados en forma
+# cerrada a partir de los parámetros del generador, sin simular ni leer
+# datos. Reproduce el modelo de generacion_datos_sinteticos:
+# - cada cohorte mensual incorpora socios_mensuales socios, con método de
+#   pago, estrategia y monto fijo sorteados de forma independiente;
+# - cada mes, desde el de creación, el cobro resulta con la efectividad del
+#   método y después se fugan int(activos * tasa_fuga_mensual) socios
+#   activos; aquí se aproxima con una fuga independiente por socio con
+#   probabilidad tasa_fuga_mensual (mismo valor esperado salvo el redondeo);
+# - el registro del mes de fuga no tiene monto (y no tiene Fecha_Pago, por
+#   lo que Silver lo descarta, si el socio nunca había donado antes).
+# Produce las mismas formas que Gold ('Mes N' y cubo de cohortes, con
+# valores esperados en vez de conteos), para respuestas inmediatas del tipo
+# "qué pasaría si" y para validar la salida de Gold (validar_gold).
+
+# Desvío (en desviaciones estándar) a partir del cual validar_gold marca un mes
+UMBRAL_Z = 4.0
+
+# Día de fuga sorteado entre 1 y 28: en promedio, 13.5 días después del inicio del mes
+DIAS_FUGA_PROMEDIO = 13.5
+
+
+def gold_esperado(perfil="estandar", socios_mensuales=None, tasa_fuga_mensual=None,
+                  fecha_inicio=None, fecha_fin=None, metodos_pago_config=None):
+    """
+    Tablas Gold esperadas para los parámetros del generador (mismos
+    parámetros y perfiles que generar_datos_sinteticos). Retorna un dict con:
+    - 'montos' y 'transacciones': tablas 'Mes N' como las de tablas_gold;
+    - 'cubo': cubo de cohortes con las columnas de construir_cubo_cohortes;
+    - 'desvio_montos' y 'desvio_transacciones': desviación estándar de cada
+      total 'Mes N' (Series indexadas por mes relativo), para validar_gold.
+    """
+    config = configuracion_perfil(perfil, socios_mensuales, tasa_fuga_mensual, fecha_inicio, fecha_fin)
+    if metodos_pago_config is None:
+        metodos_pago_config = METODOS_PAGO_CONFIG
+    meses = generar_meses(config['fecha_inicio'], config['fecha_fin'])
+    total_meses = len(meses)
+    socios = config['socios_mensuales']
+    fuga = min(max(config['tasa_fuga_mensual'], 0.0), 1.0)
+    permanece = 1.0 - fuga
+
+    metodos = list(metodos_pago_config)
+    prob_metodo = np.array([metodos_pago_config[m]['probabilidad'] for m in metodos])
+    prob_metodo = prob_metodo / prob_metodo.sum()  # np.random.choice exige que sumen 1
+    efectividad = np.array([metodos_pago_config[m]['efectividad'] for m in metodos])
+    prob_estrategia = np.asarray(PROBABILIDADES_ESTRATEGIAS, dtype=np.float64)
+
+    # Momentos del monto fijo del socio (independiente del método de pago)
+    montos = np.r_[MONTOS_BASE, MONTOS_ALTOS].astype(np.float64)
+    prob_monto = np.r_[np.full(len(MONTOS_BASE), PROBABILIDAD_MONTO_BASE / len(MONTOS_BASE)),
+                       np.full(len(MONTOS_ALTOS), (1 - PROBABILIDAD_MONTO_BASE) / len(MONTOS_ALTOS))]
+    monto_medio = float(prob_monto @ montos)
+    monto_cuadrado = float(prob_monto @ montos ** 2)
+
+    fechas_meses = np.array(meses, dtype='datetime64[D]')
+    inicio_meses = fechas_meses.astype('datetime64[M]').astype('datetime64[D]')
+    periodos = [fecha.strftime("%Y-%m") for fecha in meses]
+
+    celdas = {}
+    suma_montos = np.zeros(total_meses)
+    suma_trans = np.zeros(total_meses)
+    varianza_montos = np.zeros(total_meses)
+    varianza_trans = np.zeros(total_meses)
+    for cohorte in range(total_meses):
+        ultimo = total_meses - 1 - cohorte  # último mes relativo observable (0 = mes de creación)
+        k = np.arange(ultimo + 1)[:, np.newaxis]  # mes relativo x método de pago
+        e = efectividad[np.newaxis, :]
+        socios_metodo = socios * prob_metodo[np.newaxis, :]
+        presente = permanece ** k                     # activo al inicio del mes k
+        sigue = permanece ** (ultimo + 1)             # nunca se fuga en el periodo (Activo)
+        sin_donar = (1 - e) ** k                      # sin cobros exitosos antes del mes k
+
+        # Probabilidad por socio de cada registro que llega a Silver
+        forma = (ultimo + 1, len(metodos))
+        registro_activo = np.full(forma, sigue)
+        registro_fugado = presente - sigue - fuga * presente * sin_donar
+        cobro_activo = np.broadcast_to(sigue * e, forma)
+        cobro_fugado = (presente * permanece - sigue) * e
+        nuevo_activo = np.broadcast_to(np.where(k == 0, sigue, 0.0), forma)
+        nuevo_fugado = np.broadcast_to(np.where(k == 0, permanece - sigue, 0.0), forma)
+
+        # Meses activos de los registros fugados: cada registro del mes k
+        # pertenece a un socio que se fuga en un mes j >= k (en j == k solo si
+        # ya había donado); días desde la creación hasta la fuga / 30
+        j = np.arange(ultimo + 1)
+        dias = ((inicio_meses[cohorte + j] - fechas_meses[cohorte]).astype(np.int64)
+                + DIAS_FUGA_PROMEDIO)
+        fuga_en_j = permanece ** j * fuga * dias / 30                         # por mes de fuga j
+        posteriores = np.cumsum(fuga_en_j[::-1])[::-1]                      # j >= k
+        meses_fugados = ((posteriores - fuga_en_j)[:, np.newaxis]
+                         + fuga_en_j[:, np.newaxis] * (1 - sin_donar))
+
+        for status, registro, cobro, nuevo, meses_activo in (
+                ('Activo', registro_activo, cobro_activo, nuevo_activo, np.zeros(forma)),
+                ('Fugado', registro_fugado, cobro_fugado, nuevo_fugado, meses_fugados)):
+            for i_estrategia, estrategia in enumerate(ESTRATEGIAS):
+                escala = socios_metodo * prob_estrategia[i_estrategia]
+                # Celdas periodo x método (orden por columnas: un método tras otro)
+                columnas = {
+                    'Año_Mes_Creacion': np.repeat(periodos[cohorte], registro.size),
+                    'Año_Mes_Donacion': np.tile(periodos[cohorte:], len(metodos)),
+                    'Estrategia': np.repeat(estrategia, registro.size),
+                    'Método_Pago': np.repeat(metodos, ultimo + 1),
+                    'Status_Socio': np.repeat(status, registro.size),
+                    'Registros': escala * registro,
+                    'Donantes_Nuevos': escala * nuevo,
+                    'Monto_Total': escala * cobro * monto_medio,
+                    'Transacciones': escala * cobro,
+                    'Meses_Activo_Fugados': escala * meses_activo
+                }
+                for columna, valores in columnas.items():
+                    celdas.setdefault(columna, []).append(np.ravel(valores, order='F'))
+
+        # Totales 'Mes N' y su varianza: en un mes dado cada socio aporta como
+        # mucho un cobro exitoso, independiente de los demás socios
+        exito = (presente * permanece) * e
+        suma_montos[:ultimo + 1] += (socios_metodo * exito).sum(axis=1) * monto_medio
+        suma_trans[:ultimo + 1] += (socios_metodo * exito).sum(axis=1)
+        varianza_montos[:ultimo + 1] += (socios_metodo * (exito * monto_cuadrado
+                                                          - (exito * monto_medio) ** 2)).sum(axis=1)
+        varianza_trans[:ultimo + 1] += (socios_metodo * exito * (1 - exito)).sum(axis=1)
+
+    df_cubo = pd.DataFrame({columna: np.concatenate(valores) for columna, valores in celdas.items()})
+    df_cubo = df_cubo[df_cubo['Registros'] > 0].reset_index(drop=True)
+    fugado = (df_cubo['Status_Socio'] == 'Fugado').to_numpy()
+    # Un registro por socio y mes: los donantes distintos de cada celda son sus registros
+    df_cubo = df_cubo.assign(
+        Donantes=df_cubo['Registros'],
+        Fugados=df_cubo['Registros'].where(fugado, 0.0),
+        Fugados_Nuevos=df_cubo['Donantes_Nuevos'].where(fugado, 0.0),
+        Registros_Fugados=df_cubo['Registros'].where(fugado, 0.0)
+    )
+    df_cubo = df_cubo[DIMENSIONES_CUBO + ['Donantes', 'Donantes_Nuevos', 'Fugados', 'Fugados_Nuevos',
+                                          'Monto_Total', 'Transacciones', 'Registros', 'Registros_Fugados',
+                                          'Meses_Activo_Fugados']]
+    df_cubo = df_cubo.sort_values(DIMENSIONES_CUBO, ignore_index=True)
+
+    indice = pd.RangeIndex(1, total_meses + 1)
+    df_relative_t, df_presence_t = tablas_gold(pd.Series(suma_montos, index=indice),
+                                               pd.Series(suma_trans, index=indice))
+    # Valores esperados: la tabla de transacciones no se redondea a enteros
+    df_presence_t['Cantidad_Transacciones'] = suma_trans
+    return {
+        'montos': df_relative_t,
+        'transacciones': df_presence_t,
+        'cubo': df_cubo,
+        'desvio_montos': pd.Series(np.sqrt(varianza_montos), index=indice),
+        'desvio_transacciones': pd.Series(np.sqrt(varianza_trans), index=indice)
+    }
+
+
+# -------------------------------
+# VALIDACIÓN DE GOLD
+# -------------------------------
+def validar_gold(carpeta_gold=None, umbral_z=UMBRAL_Z, **parametros):
+    """
+    Compara las tablas 'Mes N' de Gold con sus valores esperados para los
+    parámetros del generador (los de gold_esperado). Cada total se expresa
+    como desvío en desviaciones estándar (z); los meses con |z| > umbral_z
+    se informan como inconsistentes. Retorna la tabla de comparación y un
+    bool que indica si Gold es consistente con los parámetros.
+    """
+    if carpeta_gold is None:
+        carpeta_gold = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "layer", "gold")
+    ruta_montos = os.path.join(carpeta_gold, "suma_montos_gold.parquet")
+    ruta_trans = os.path.join(carpeta_gold, "cantidad_personas_gold.parquet")
+    for ruta in (ruta_montos, ruta_trans):
+        if not os.path.exists(ruta):
+            raise FileNotFoundError(f"No se encontró la tabla Gold: {ruta}")
+
+    esperado = gold_esperado(**parametros)
+    comparacion = (pd.read_parquet(ruta_montos)
+                   .merge(pd.read_parquet(ruta_trans), on='Periodo')
+                   .merge(esperado['montos'].rename(columns={'Total_Monto': 'Esperado_Monto'}),
+                          on='Periodo', how='outer', sort=False)
+                   .merge(esperado['transacciones'].rename(
+                       columns={'Cantidad_Transacciones': 'Esperado_Transacciones'}),
+                          on='Periodo', how='outer', sort=False))
+    comparacion = comparacion.sort_values('Periodo', key=lambda p: p.str[4:].astype(int), ignore_index=True)
+    if comparacion.isna().any(axis=None):
+        print("⚠ Gold y los parámetros no tienen los mismos meses relativos "
+              f"({comparacion['Total_Monto'].notna().sum()} en Gold, "
+              f"{comparacion['Esperado_Monto'].notna().sum()} esperados)")
+        return comparacion, False
+
+    mes = comparacion['Periodo'].str[4:].astype(int)
+    comparacion['Z_Monto'] = ((comparacion['Total_Monto'] - comparacion['Esperado_Monto'])
+                              / esperado['desvio_montos'].reindex(mes).to_numpy())
+    comparacion['Z_Transacciones'] = ((comparacion['Cantidad_Transacciones'] - comparacion['Esperado_Transacciones'])
+                                      / esperado['desvio_transacciones'].reindex(mes).to_numpy())
+    fuera = comparacion[(comparacion[['Z_Monto', 'Z_Transacciones']].abs() > umbral_z).any(axis=1)]
+    if fuera.empty:
+        print(f"✓ Gold consistente con los parámetros del generador (|z| <= {umbral_z} en "
+              f"{len(comparacion)} meses relativos)")
+    else:
+        print(f"⚠ {len(fuera)} meses relativos de Gold fuera de |z| <= {umbral_z}: "
+              f"{', '.join(fuera['Periodo'])}")
+    return comparacion, fuera.empty
+
+
+def guardar_gold_esperado(esperado, carpeta):
+    """Escribe las tablas esperadas con los nombres de archivo de Gold."""
+    os.makedirs(carpeta, exist_ok=True)
+    esperado['montos'].to_parquet(os.path.join(carpeta, "suma_montos_gold.parquet"), index=False)
+    esperado['transacciones'].to_parquet(os.path.join(carpeta, "cantidad_personas_gold.parquet"), index=False)
+    guardar_cubo_cohortes(esperado['cubo'], os.path.join(carpeta, ARCHIVO_CUBO))
+
+
+def _fecha(texto):
+    return pd.Timestamp(texto).to_pydatetime()
+
+
+# =======================
+# EJECUCIÓN LOCAL
+# =======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tablas Gold esperadas según los parámetros del generador.")
+    parser.add_argument("--perfil", choices=sorted(PERFILES), default="estandar",
+                        help="Perfil de parámetros base (estandar | estres)")
+    parser.add_argument("--socios-mensuales", type=int, help="Nuevos socios por mes")
+    parser.add_argument("--tasa-fuga", type=float, help="Tasa de fuga mensual (ej. 0.02)")
+    parser.add_argument("--fecha-inicio", type=_fecha, help="Primer mes (YYYY-MM-DD)")
+    parser.add_argument("--fecha-fin", type=_fecha, help="Último mes (YYYY-MM-DD)")
+    parser.add_argument("--salida", help="Carpeta donde escribir las tablas esperadas (nombres de Gold)")
+    parser.add_argument("--validar", action="store_true", help="Compara layer/gold con los valores esperados")
+    args = parser.parse_args()
+
+    parametros = dict(perfil=args.perfil, socios_mensuales=args.socios_mensuales,
+                      tasa_fuga_mensual=args.tasa_fuga, fecha_inicio=args.fecha_inicio,
+                      fecha_fin=args.fecha_fin)
+    esperado = gold_esperado(**parametros)
+
+    print("\n--- Gold esperado: Montos ---")
+    print(esperado['montos'].to_string(index=False, float_format=lambda valor: f"{valor:,.0f}"))
+    print(f"Total donaciones esperadas: {esperado['montos']['Total_Monto'].sum():,.0f}")
+    print("\n--- Gold esperado: Transacciones (>0) ---")
+    print(esperado['transacciones'].to_string(index=False, float_format=lambda valor: f"{valor:,.1f}"))
+    print("\n--- KPIs esperados por Cohorte ---")
+    print(resumen_metricas(calcular_metricas(esperado['cubo']), 'Año_Mes_Creacion').to_string())
+
+    if args.salida:
+        guardar_gold_esperado(esperado, args.salida)
+        print(f"\n✓ Tablas esperadas guardadas en: {args.salida}")
+    if args.validar:
+        print()
+        _, consistente = validar_gold(**parametros)
+        raise SystemExit(0 if consistente else 1)
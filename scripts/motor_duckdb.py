@@ -0,0 +1,181 @@
+import os
+import tempfile
+import duckdb
+import numpy as np
+import pandas as pd
+
+# Motor SQL opcional para las capas Silver y Gold: DuckDB en proceso lee los
+# Parquet de layer/* directamente, usa todos los núcleos y, si la consulta no
+# entra en memoria, derrama a disco en DIRECTORIO_TEMPORAL. Produce las mismas
+# tablas que el camino pandas (construir_matriz_donantes,
+# totales_por_mes_relativo y construir_cubo_cohortes).
+DIRECTORIO_TEMPORAL = os.path.join(tempfile.gettempdir(), "duckdb_medallon")
+
+# Número de mes absoluto (año * 12 + mes) de un periodo 'AAAA-MM'
+NUMERO_MES = "(CAST(left({0}, 4) AS INTEGER) * 12 + CAST(substr({0}, 6, 2) AS INTEGER))"
+
+# Filas por lote Arrow al leer el resultado del filtro de Silver
+FILAS_POR_LOTE = 128 * 1024
+
+
+def conectar(limite_memoria=None):
+    """
+    Conexión DuckDB en memoria con derrame a disco. limite_memoria acepta
+    el formato de DuckDB ('4GB'); por defecto usa el 80% de la RAM.
+    """
+    os.makedirs(DIRECTORIO_TEMPORAL, exist_ok=True)
+    config = {'temp_directory': DIRECTORIO_TEMPORAL}
+    if limite_memoria:
+        config['memory_limit'] = limite_memoria
+    return duckdb.connect(config=config)
+
+
+def _sql_ruta(ruta):
+    return "'" + ruta.replace("'", "''") + "'"
+
+
+# ===============================
+# SILVER
+# ===============================
+def filtrar_silver(con, ruta_bronze, filas_por_lote=FILAS_POR_LOTE):
+    """
+    Filtra Bronze en SQL (sin pasar por pandas): descarta los registros sin
+    Año_Mes_Donacion o sin Fecha_Pago. Retorna la cantidad de registros
+    leídos, la cantidad sin Año_Mes_Donacion y un lector de lotes Arrow
+    con los registros filtrados, en el orden de Bronze, para escribirlos
+    con silver_layer.escribir_silver.
+    """
+    origen = f"read_parquet({_sql_ruta(ruta_bronze)})"
+    registros, sin_mes = con.execute(
+        f"SELECT count(*), count(*) FILTER (WHERE Año_Mes_Donacion IS NULL) FROM {origen}"
+    ).fetchone()
+    lotes = con.execute(f"""
+        SELECT * FROM {origen}
+        WHERE Año_Mes_Donacion IS NOT NULL AND Fecha_Pago IS NOT NULL
+    """).to_arrow_reader(filas_por_lote)
+    return registros, sin_mes, lotes
+
+
+def matriz_donantes(con, ruta_silver, columnas_donante, categorias):
+    """
+    Matriz donante x mes en el formato de construir_matriz_donantes, con la
+    agregación por celda resuelta en SQL. Solo se materializan la tabla de
+    donantes y las celdas con monto > 0, no los registros de Silver.
+    categorias (de silver_layer.esquema_silver) fija las categorías de los
+    atributos como en el camino pandas.
+    """
+    origen = f"read_parquet({_sql_ruta(ruta_silver)}, file_row_number = true)"
+    atributos = ", ".join(f'"{c}"' for c in columnas_donante)
+
+    # Atributos del primer registro de cada donante, ordenados por Id_donante
+    donantes = con.execute(f"""
+        SELECT Clave_Donante, {atributos}
+        FROM {origen}
+        QUALIFY row_number() OVER (PARTITION BY Clave_Donante ORDER BY file_row_number) = 1
+        ORDER BY Id_donante
+    """).df()
+    for columna in columnas_donante:
+        if columna != 'Id_donante':
+            donantes[columna] = pd.Categorical(donantes[columna], categories=categorias[columna])
+
+    meses = [fila[0] for fila in con.execute(
+        f"SELECT DISTINCT CAST(Año_Mes_Donacion AS VARCHAR) AS mes FROM {origen} ORDER BY mes"
+    ).fetchall()]
+
+    con.register("posicion_donante", pd.DataFrame({
+        'Clave_Donante': donantes['Clave_Donante'].to_numpy(), 'fila': np.arange(len(donantes))
+    }))
+    con.register("posicion_mes", pd.DataFrame({'mes': meses, 'columna': np.arange(len(meses))}))
+    celdas = con.execute(f"""
+        SELECT d.fila, m.columna, sum(CAST(trunc(coalesce(s.Monto_Donacion, 0)) AS BIGINT)) AS monto
+        FROM {origen} s
+        JOIN posicion_donante d USING (Clave_Donante)
+        JOIN posicion_mes m ON m.mes = CAST(s.Año_Mes_Donacion AS VARCHAR)
+        GROUP BY d.fila, m.columna
+        HAVING monto > 0
+        ORDER BY d.fila, m.columna
+    """).df()
+    con.unregister("posicion_donante")
+    con.unregister("posicion_mes")
+
+    return {
+        'donantes': donantes,
+        'meses': meses,
+        'fila': celdas['fila'].to_numpy(dtype=np.int32),
+        'columna': celdas['columna'].to_numpy(dtype=np.int16),
+        'monto': celdas['monto'].to_numpy(dtype=np.int64)
+    }
+
+
+# ===============================
+# GOLD
+# ===============================
+def totales_por_mes_relativo(con, ruta_silver):
+    """Igual que gold_layer.totales_por_mes_relativo, agregando en SQL."""
+    origen = f"read_parquet({_sql_ruta(ruta_silver)})"
+    creacion = NUMERO_MES.format("CAST(Año_Mes_Creacion AS VARCHAR)")
+    donacion = NUMERO_MES.format("CAST(Año_Mes_Donacion AS VARCHAR)")
+    df = con.execute(f"""
+        WITH base AS (
+            SELECT {donacion} - {creacion} AS relativo,
+                   {creacion} AS creacion, {donacion} AS donacion,
+                   coalesce(CAST(Monto_Donacion AS DOUBLE), 0) AS monto
+            FROM {origen}
+        )
+        SELECT relativo, sum(monto) AS monto, count(*) FILTER (WHERE monto > 0) AS transacciones,
+               max(max(donacion)) OVER () - min(min(creacion)) OVER () + 1 AS total_meses
+        FROM base
+        GROUP BY relativo
+    """).df()
+
+    total_meses = int(df['total_meses'].iloc[0])
+    indice = pd.RangeIndex(1, total_meses + 1)
+    posicion = df['relativo'].to_numpy() + 1
+    suma_montos = pd.Series(df['monto'].to_numpy(dtype=np.float64), index=posicion).reindex(indice, fill_value=0.0)
+    suma_trans = pd.Series(df['transacciones'].to_numpy(dtype=np.int64), index=posicion).reindex(indice, fill_value=0)
+    return suma_montos, suma_trans
+
+
+def cubo_cohortes(con, ruta_silver, dimensiones):
+    """
+    Igual que gold_layer.construir_cubo_cohortes, en SQL: el primer
+    registro de cada donante y de cada donante x periodo se marca con
+    funciones de ventana y luego se agrega por las dimensiones del cubo.
+    """
+    origen = f"read_parquet({_sql_ruta(ruta_silver)}, file_row_number = true)"
+    columnas = ", ".join(f'CAST("{c}" AS VARCHAR) AS "{c}"' for c in dimensiones)
+    grupo = ", ".join(f'"{c}"' for c in dimensiones)
+    no_nulas = " AND ".join(f'"{c}" IS NOT NULL' for c in dimensiones)
+    periodo = NUMERO_MES.format("CAST(Año_Mes_Donacion AS VARCHAR)")
+    df_cubo = con.execute(f"""
+        WITH marcas AS (
+            SELECT {columnas},
+                   row_number() OVER (PARTITION BY Id_donante ORDER BY {periodo}, file_row_number) = 1 AS primero,
+                   row_number() OVER (PARTITION BY Id_donante, {periodo} ORDER BY file_row_number) = 1 AS distinto,
+                   Status_Socio = 'Fugado' AS fugado,
+                   CAST(trunc(coalesce(Monto_Donacion, 0)) AS BIGINT) AS monto,
+                   floor((epoch_us(CAST(Fecha_Fuga AS TIMESTAMP)) - epoch_us(CAST(Fecha_Creacion AS TIMESTAMP)))
+                         / 86400000000.0) AS dias_activo
+            FROM {origen}
+        )
+        SELECT {grupo},
+               count(*) FILTER (WHERE distinto) AS Donantes,
+               count(*) FILTER (WHERE primero) AS Donantes_Nuevos,
+               count(*) FILTER (WHERE distinto AND fugado) AS Fugados,
+               count(*) FILTER (WHERE primero AND fugado) AS Fugados_Nuevos,
+               sum(monto) AS Monto_Total,
+               count(*) FILTER (WHERE monto > 0) AS Transacciones,
+               count(*) AS Registros,
+               count(*) FILTER (WHERE fugado) AS Registros_Fugados,
+               coalesce(sum(dias_activo) FILTER (WHERE fugado), 0) / 30 AS Meses_Activo_Fugados
+        FROM marcas
+        WHERE {no_nulas}
+        GROUP BY {grupo}
+        ORDER BY {grupo}
+    """).df()
+
+    conteos = ['Donantes', 'Donantes_Nuevos', 'Fugados', 'Fugados_Nuevos', 'Monto_Total', 'Transacciones',
+               'Registros', 'Registros_Fugados']
+    df_cubo[conteos] = df_cubo[conteos].astype('int64')
+    df_cubo['Meses_Activo_Fugados'] = df_cubo['Meses_Activo_Fugados'].astype('float64')
+    return df_cubo
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+import polars as pl
+
+# Motor Polars opcional para las capas Silver y Gold: planes LazyFrame sobre
+# los Parquet de layer/*, con los filtros y la proyección de columnas
+# empujados a la lectura y ejecución en paralelo. Produce las mismas tablas
+# que el camino pandas (construir_matriz_donantes, totales_por_mes_relativo
+# y construir_cubo_cohortes).
+
+
+def _numero_mes(columna):
+    """Número de mes absoluto (año * 12 + mes) de un periodo 'AAAA-MM'."""
+    texto = pl.col(columna).cast(pl.String)
+    return texto.str.slice(0, 4).cast(pl.Int32) * 12 + texto.str.slice(5, 2).cast(pl.Int32)
+
+
+def _monto_entero():
+    return pl.col('Monto_Donacion').fill_null(0).cast(pl.Int64)
+
+
+# ===============================
+# SILVER
+# ===============================
+def filtrar_silver(ruta_bronze):
+    """
+    Filtra Bronze en streaming: descarta los registros sin Año_Mes_Donacion
+    o sin Fecha_Pago. Retorna la cantidad de registros leídos, la cantidad
+    sin Año_Mes_Donacion y un generador de lotes Arrow con los registros
+    filtrados, en el orden de Bronze, para escribirlos con
+    silver_layer.escribir_silver.
+    """
+    bronze = pl.scan_parquet(ruta_bronze)
+    conteo = bronze.select(
+        pl.len().alias('registros'),
+        pl.col('Año_Mes_Donacion').null_count().alias('sin_mes')
+    ).collect()
+    filtrado = bronze.filter(pl.col('Año_Mes_Donacion').is_not_null() & pl.col('Fecha_Pago').is_not_null())
+    lotes = (lote for df in filtrado.collect_batches() for lote in df.to_arrow().to_batches())
+    return int(conteo['registros'][0]), int(conteo['sin_mes'][0]), lotes
+
+
+def matriz_donantes(ruta_silver, columnas_donante, categorias):
+    """
+    Matriz donante x mes en el formato de construir_matriz_donantes. Solo se
+    materializan la tabla de donantes y las celdas con monto > 0.
+    categorias (de silver_layer.esquema_silver) fija las categorías de los
+    atributos como en el camino pandas.
+    """
+    silver = pl.scan_parquet(ruta_silver)
+
+    # Atributos del primer registro de cada donante, ordenados por Id_donante
+    donantes = (silver
+                .select(['Clave_Donante'] + columnas_donante)
+                .unique(subset='Clave_Donante', keep='first', maintain_order=True)
+                .with_columns(pl.col(c).cast(pl.String) for c in columnas_donante)
+                .sort('Id_donante')
+                .collect()
+                .to_pandas())
+    for columna in columnas_donante:
+        if columna != 'Id_donante':
+            donantes[columna] = pd.Categorical(donantes[columna], categories=categorias[columna])
+
+    meses = (silver
+             .select(pl.col('Año_Mes_Donacion').cast(pl.String).unique().sort())
+             .collect()
+             .to_series()
+             .to_list())
+
+    posicion_donante = pl.LazyFrame({
+        'Clave_Donante': donantes['Clave_Donante'].to_numpy(),
+        'fila': np.arange(len(donantes), dtype=np.int64)
+    })
+    posicion_mes = pl.LazyFrame({'mes': meses, 'columna': np.arange(len(meses), dtype=np.int64)})
+    celdas = (silver
+              .select('Clave_Donante', pl.col('Año_Mes_Donacion').cast(pl.String).alias('mes'),
+                      _monto_entero().alias('monto'))
+              .join(posicion_donante, on='Clave_Donante')
+              .join(posicion_mes, on='mes')
+              .group_by('fila', 'columna')
+              .agg(pl.col('monto').sum())
+              .filter(pl.col('monto') > 0)
+              .sort('fila', 'columna')
+              .collect())
+
+    return {
+        'donantes': donantes,
+        'meses': meses,
+        'fila': celdas['fila'].to_numpy().astype(np.int32),
+        'columna': celdas['columna'].to_numpy().astype(np.int16),
+        'monto': celdas['monto'].to_numpy().astype(np.int64)
+    }
+
+
+# ===============================
+# GOLD
+# ===============================
+def totales_por_mes_relativo(ruta_silver):
+    """Igual que gold_layer.totales_por_mes_relativo, con un plan lazy."""
+    base = pl.scan_parquet(ruta_silver).select(
+        _numero_mes('Año_Mes_Creacion').alias('creacion'),
+        _numero_mes('Año_Mes_Donacion').alias('donacion'),
+        pl.col('Monto_Donacion').fill_null(0).cast(pl.Float64).alias('monto')
+    )
+    limites = base.select(pl.col('creacion').min(), pl.col('donacion').max()).collect()
+    totales = (base
+               .group_by((pl.col('donacion') - pl.col('creacion')).alias('relativo'))
+               .agg(pl.col('monto').sum(), (pl.col('monto') > 0).sum().alias('transacciones'))
+               .collect())
+
+    total_meses = int(limites['donacion'][0] - limites['creacion'][0] + 1)
+    indice = pd.RangeIndex(1, total_meses + 1)
+    posicion = totales['relativo'].to_numpy() + 1
+    suma_montos = pd.Series(totales['monto'].to_numpy().astype(np.float64), index=posicion).reindex(indice, fill_value=0.0)
+    suma_trans = pd.Series(totales['transacciones'].to_numpy().astype(np.int64), index=posicion).reindex(indice, fill_value=0)
+    return suma_montos, suma_trans
+
+
+def cubo_cohortes(ruta_silver, dimensiones):
+    """
+    Igual que gold_layer.construir_cubo_cohortes: se ordena por donante,
+    periodo y posición en el archivo para marcar el primer registro de cada
+    donante y de cada donante x periodo, y se agrega por las dimensiones.
+    """
+    fugado = pl.col('Status_Socio').cast(pl.String) == 'Fugado'
+    dias_activo = (pl.col('Fecha_Fuga').cast(pl.Datetime('us')) - pl.col('Fecha_Creacion').cast(pl.Datetime('us'))
+                   ).dt.total_microseconds() // 86_400_000_000
+    marcas = (pl.scan_parquet(ruta_silver)
+              .with_row_index('orden')
+              .with_columns(_numero_mes('Año_Mes_Donacion').alias('periodo'))
+              .sort('Id_donante', 'periodo', 'orden')
+              .with_columns(
+                  (pl.col('Id_donante') != pl.col('Id_donante').shift(1)).fill_null(True).alias('primero'))
+              .with_columns(
+                  (pl.col('primero') | (pl.col('periodo') != pl.col('periodo').shift(1))).alias('distinto'),
+                  fugado.fill_null(False).alias('fugado'),
+                  _monto_entero().alias('monto'),
+                  dias_activo.cast(pl.Float64).alias('dias_activo')
+              ))
+
+    df_cubo = (marcas
+               .with_columns(pl.col(c).cast(pl.String) for c in dimensiones)
+               .filter(pl.all_horizontal(pl.col(c).is_not_null() for c in dimensiones))
+               .group_by(dimensiones)
+               .agg(
+                   pl.col('distinto').sum().alias('Donantes'),
+                   pl.col('primero').sum().alias('Donantes_Nuevos'),
+                   (pl.col('distinto') & pl.col('fugado')).sum().alias('Fugados'),
+                   (pl.col('primero') & pl.col('fugado')).sum().alias('Fugados_Nuevos'),
+                   pl.col('monto').sum().alias('Monto_Total'),
+                   (pl.col('monto') > 0).sum().alias('Transacciones'),
+                   pl.len().alias('Registros'),
+                   pl.col('fugado').sum().alias('Registros_Fugados'),
+                   pl.col('dias_activo').filter(pl.col('fugado')).sum().alias('Meses_Activo_Fugados')
+               )
+               .sort(dimensiones)
+               .collect()
+               .to_pandas())
+
+    conteos = ['Donantes', 'Donantes_Nuevos', 'Fugados', 'Fugados_Nuevos', 'Monto_Total', 'Transacciones',
+               'Registros', 'Registros_Fugados']
+    df_cubo[conteos] = df_cubo[conteos].astype('int64')
+    # Días sumados -> meses, dividiendo en numpy como el camino pandas
+    df_cubo['Meses_Activo_Fugados'] = df_cubo['Meses_Activo_Fugados'].astype('float64') / 30
+    return df_cubo
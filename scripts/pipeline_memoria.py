@@ -0,0 +1,170 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import pyarrow.parquet as pq
+
+try:
+    from scripts.manifiesto import firma_paso, sin_cambios, guardar_linaje, SIN_CAMBIOS
+    from scripts import bronze_layer, silver_layer, gold_layer
+    from scripts.metricas import calcular_metricas, resumen_metricas
+    from scripts.instrumentacion import etapa, medir_capa, tamano_en_disco, configurar_logging
+    from scripts.png_gold import esperar_png
+except ImportError:  # ejecución directa: python scripts/pipeline_memoria.py
+    from manifiesto import firma_paso, sin_cambios, guardar_linaje, SIN_CAMBIOS
+    import bronze_layer
+    import silver_layer
+    import gold_layer
+    from metricas import calcular_metricas, resumen_metricas
+    from instrumentacion import etapa, medir_capa, tamano_en_disco, configurar_logging
+    from png_gold import esperar_png
+
+# Ejecución local del pipeline completo (Bronze -> Silver -> Gold) en un solo
+# proceso: cada capa recibe en memoria el resultado de la anterior (tabla
+# Arrow de Bronze, DataFrame de Silver) en vez de releerlo de disco, y las
+# salidas de cada capa se escriben en segundo plano. Un solo hilo escritor
+# persiste las capas en orden, así que el linaje de Silver y Gold se calcula
+# sobre archivos de la capa anterior ya completos y coincide con el de
+# procesar_a_silver / procesar_a_gold: la siguiente ejecución en disco las
+# reconoce como vigentes. Los PNG de Gold se generan en modo "diferido",
+# fuera del hilo escritor, y se esperan al final.
+
+
+@medir_capa("pipeline")
+def ejecutar_pipeline(nombre_archivo="datos_donantes_sinteticos.parquet", forzar=False):
+    """
+    Procesa raw -> Bronze -> Silver -> Gold (modo completo, motor pandas)
+    pasando los datos entre capas en memoria. Genera los mismos archivos y
+    manifiestos de linaje que procesar_a_bronze, procesar_a_silver y
+    procesar_a_gold.
+
+    Si el origen raw no cambió desde la última ejecución (linaje de Bronze),
+    Silver y Gold se procesan con sus funciones habituales, que a su vez se
+    omiten si sus entradas tampoco cambiaron; en ese caso retorna
+    SIN_CAMBIOS. forzar=True ignora el linaje.
+    """
+    # -------------------------------
+    # CONFIGURACIÓN
+    # -------------------------------
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    proyecto_dir = os.path.dirname(base_dir)
+    carpeta_bronze = os.path.join(proyecto_dir, "layer", "bronze")
+    carpeta_silver = os.path.join(proyecto_dir, "layer", "silver")
+    carpeta_gold = os.path.join(proyecto_dir, "layer", "gold")
+    archivo = os.path.join(proyecto_dir, "layer", "raw", nombre_archivo)
+    ruta_bronze = os.path.join(carpeta_bronze, "donantes_bronze.parquet")
+    ruta_silver = os.path.join(carpeta_silver, "donantes_silver.parquet")
+    for carpeta in (carpeta_bronze, carpeta_silver, carpeta_gold):
+        os.makedirs(carpeta, exist_ok=True)
+
+    if not os.path.exists(archivo):
+        raise FileNotFoundError(f"No se encontró el archivo origen: {archivo}")
+
+    ruta_linaje_bronze = os.path.join(carpeta_bronze, bronze_layer.LINAJE)
+    firma_bronze = firma_paso({'raw': archivo}, base_dir, {'incremental': False}, "bronze_layer")
+    if not forzar and sin_cambios(ruta_linaje_bronze, firma_bronze, [ruta_bronze]):
+        print(f"✓ Origen sin cambios desde la última ejecución, Bronze vigente: {ruta_bronze}")
+        silver_layer.procesar_a_silver()
+        gold_layer.procesar_a_gold()
+        return SIN_CAMBIOS
+
+    with ThreadPoolExecutor(max_workers=1) as escritor:
+        escrituras = []
+
+        # -------------------------------
+        # BRONZE
+        # -------------------------------
+        with etapa("bronze", "lectura") as medicion:
+            tabla_raw = bronze_layer.leer_raw(archivo)
+            medicion.update(filas=tabla_raw.num_rows, bytes_leidos=tamano_en_disco(archivo))
+        with etapa("bronze", "esquema", filas=tabla_raw.num_rows):
+            tabla_bronze = bronze_layer.aplicar_esquema_bronze(tabla_raw)
+        del tabla_raw
+        print(f"✓ Bronze: {tabla_bronze.num_rows} registros (escritura en segundo plano)")
+        escrituras.append(escritor.submit(
+            _persistir, "bronze", [partial(pq.write_table, tabla_bronze, ruta_bronze)],
+            ruta_linaje_bronze, firma_bronze, [ruta_bronze]
+        ))
+
+        # -------------------------------
+        # SILVER
+        # -------------------------------
+        # to_pandas copia los datos (los textos pasan a objetos Python) y solo
+        # lee la tabla de Bronze, así que convive con su escritura en segundo
+        # plano (sin self_destruct, que la dejaría inutilizable para el hilo
+        # escritor). Tabla y DataFrame ocupan memoria a la vez hasta que
+        # Bronze termina de escribirse: ahí el hilo escritor suelta la tabla.
+        with etapa("silver", "filtro") as medicion:
+            df_silver = silver_layer.limpiar_silver(tabla_bronze.to_pandas())
+            medicion['filas'] = len(df_silver)
+        del tabla_bronze
+        with etapa("silver", "pivot") as medicion:
+            matriz = silver_layer.construir_matriz_donantes(df_silver)
+            medicion['filas'] = len(matriz['donantes'])
+        print(f"✓ Silver: {len(df_silver)} registros, matriz de {len(matriz['donantes'])} donantes x "
+              f"{len(matriz['meses'])} meses (escritura en segundo plano)")
+        salidas_silver = [ruta_silver, os.path.join(carpeta_silver, silver_layer.ARCHIVO_MATRIZ),
+                          os.path.join(carpeta_silver, silver_layer.ARCHIVO_DONANTES)]
+        escrituras.append(escritor.submit(
+            _persistir, "silver",
+            [partial(df_silver.to_parquet, ruta_silver, index=False),
+             partial(silver_layer.guardar_matriz_donantes, matriz, carpeta_silver)],
+            os.path.join(carpeta_silver, silver_layer.LINAJE),
+            ({'bronze': ruta_bronze}, base_dir, {'incremental': False, 'guardar_pivot': False, 'motor': "pandas"},
+             "silver_layer"),
+            salidas_silver, escrituras[-1]
+        ))
+
+        # -------------------------------
+        # GOLD
+        # -------------------------------
+        df_entrada_gold = df_silver[gold_layer.COLUMNAS_CUBO].reset_index(drop=True)
+        with etapa("gold", "desplazamiento_cohortes", filas=len(df_entrada_gold)):
+            suma_montos, suma_trans = gold_layer.totales_por_mes_relativo(df_entrada_gold)
+            df_cubo = gold_layer.construir_cubo_cohortes(df_entrada_gold)
+        df_relative_t, df_presence_t = gold_layer.tablas_gold(suma_montos, suma_trans)
+        print(f"✓ Gold: {len(df_relative_t)} meses relativos, cubo de {len(df_cubo)} celdas "
+              f"(escritura en segundo plano)")
+        print(f"Total donaciones acumuladas: {df_relative_t['Total_Monto'].sum():,.0f}")
+        print(f"Total transacciones acumuladas: {df_presence_t['Cantidad_Transacciones'].sum():,.0f}")
+        print("\n--- KPIs por Cohorte (cubo) ---")
+        print(resumen_metricas(calcular_metricas(df_cubo), 'Año_Mes_Creacion').to_string())
+        salidas_gold = [os.path.join(carpeta_gold, nombre) for nombre in
+                        ("suma_montos_gold.parquet", "cantidad_personas_gold.parquet", gold_layer.ARCHIVO_CUBO)]
+        escrituras.append(escritor.submit(
+            _persistir, "gold",
+            [partial(gold_layer.guardar_gold, carpeta_gold, df_relative_t, df_presence_t, df_cubo, png="diferido")],
+            os.path.join(carpeta_gold, gold_layer.LINAJE),
+            ({'silver': ruta_silver}, base_dir, {'incremental': False, 'motor': "pandas"}, "gold_layer"),
+            salidas_gold, escrituras[-1]
+        ))
+
+        # Propaga cualquier error de escritura
+        for escritura in escrituras:
+            escritura.result()
+
+    print(f"✓ Capas persistidas en: {carpeta_bronze}, {carpeta_silver}, {carpeta_gold}")
+    esperar_png()
+
+
+def _persistir(capa, escrituras, ruta_linaje, firma, salidas, anterior=None):
+    """
+    Ejecuta las escrituras de una capa (funciones sin argumentos) y registra
+    su linaje. firma puede venir calculada o como argumentos de firma_paso,
+    cuando depende de archivos de la capa anterior que recién se escribieron.
+    Si la escritura de la capa anterior falló, esta no se persiste.
+    """
+    if anterior is not None:
+        anterior.result()
+    with etapa(capa, "persistencia") as medicion:
+        for escritura in escrituras:
+            escritura()
+        medicion['bytes_escritos'] = tamano_en_disco(*salidas)
+    with etapa(capa, "linaje"):
+        if isinstance(firma, tuple):
+            firma = firma_paso(*firma)
+        guardar_linaje(ruta_linaje, firma, salidas)
+
+
+if __name__ == "__main__":
+    configurar_logging()
+    ejecutar_pipeline()
@@ -0,0 +1,194 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+try:
+    from scripts.instrumentacion import etapa, tamano_en_disco
+except ImportError:  # ejecución directa: python scripts/png_gold.py
+    from instrumentacion import etapa, tamano_en_disco
+
+# Imágenes PNG de las tablas Gold (suma_montos_gold / cantidad_personas_gold).
+# Se dibujan con matplotlib sobre el backend Agg (sin navegador ni pyplot) y
+# la huella del contenido de la tabla queda en los metadatos del PNG: si la
+# tabla no cambió, la imagen no se vuelve a generar.
+#
+# Modos de generación desde Gold:
+# - "sincrono": dentro de procesar_a_gold, después de escribir los Parquet.
+# - "diferido": en un hilo de fondo; Gold termina al escribir los Parquet y
+#   esperar_png() espera las imágenes pendientes (al salir del intérprete se
+#   esperan igual).
+# - "omitir": Gold no genera imágenes; el DAG las genera en una tarea aparte
+#   con generar_png_gold(), a partir de los Parquet de Gold.
+MODOS_PNG = ("sincrono", "diferido", "omitir")
+TABLAS_PNG = {
+    "suma_montos_gold.parquet": "suma_montos_gold.png",
+    "cantidad_personas_gold.parquet": "cantidad_personas_gold.png"
+}
+CLAVE_HUELLA = "huella_tabla"
+
+# Matplotlib no es seguro entre hilos: un único hilo genera las imágenes en orden
+_generador = None
+_pendientes = []
+_candado = threading.Lock()
+
+
+def exportar_tabla_png(df, ruta, renderizador="matplotlib"):
+    """
+    Genera el PNG de una tabla. Retorna False si el PNG existente ya
+    corresponde al mismo contenido (huella en sus metadatos) y no se
+    regenera. renderizador="dataframe_image" usa dataframe_image.export
+    (requiere Chrome) en lugar de matplotlib.
+    """
+    huella = huella_tabla(df, renderizador)
+    if _huella_png(ruta) == huella:
+        return False
+
+    ruta_temporal = ruta + ".tmp.png"
+    if renderizador == "dataframe_image":
+        import dataframe_image as dfi
+        from PIL import Image
+        from PIL.PngImagePlugin import PngInfo
+        dfi.export(df, ruta_temporal, max_cols=-1)
+        # Se reescribe el PNG para agregar la huella a sus metadatos
+        metadatos = PngInfo()
+        metadatos.add_text(CLAVE_HUELLA, huella)
+        with Image.open(ruta_temporal) as imagen:
+            imagen.save(ruta_temporal, pnginfo=metadatos)
+    elif renderizador == "matplotlib":
+        _dibujar_tabla(df, ruta_temporal, {CLAVE_HUELLA: huella})
+    else:
+        raise ValueError(f"Renderizador no soportado: {renderizador!r} (usar 'matplotlib' o 'dataframe_image')")
+    os.replace(ruta_temporal, ruta)
+    return True
+
+
+def huella_tabla(df, renderizador="matplotlib"):
+    """Hash del contenido de la tabla (columnas, valores) y del renderizador."""
+    contenido = hashlib.sha1(renderizador.encode("utf-8"))
+    contenido.update(df.to_csv(index=False).encode("utf-8"))
+    return contenido.hexdigest()
+
+
+def _huella_png(ruta):
+    """Huella guardada en los metadatos de un PNG (None si no existe o no la tiene)."""
+    if not os.path.exists(ruta):
+        return None
+    from PIL import Image
+    try:
+        with Image.open(ruta) as imagen:
+            return imagen.text.get(CLAVE_HUELLA)
+    except OSError:  # PNG incompleto o dañado: se regenera
+        return None
+
+
+def _dibujar_tabla(df, ruta, metadatos):
+    """Dibuja la tabla con matplotlib (Figure + backend Agg, sin estado global de pyplot)."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    celdas = [[_formatear(valor) for valor in fila] for fila in df.itertuples(index=False)]
+    alto_fila = 0.25
+    figura = Figure(figsize=(1.8 * len(df.columns), alto_fila * (len(df) + 1)), dpi=100)
+    FigureCanvasAgg(figura)
+    ejes = figura.add_axes([0, 0, 1, 1])
+    ejes.axis("off")
+    tabla = ejes.table(cellText=celdas, colLabels=list(df.columns), loc="center", cellLoc="right",
+                       bbox=[0, 0, 1, 1])
+    tabla.auto_set_font_size(False)
+    tabla.set_fontsize(9)
+    for (fila, _), celda in tabla.get_celld().items():
+        celda.set_edgecolor("#dddddd")
+        if fila == 0:
+            celda.set_text_props(weight="bold")
+            celda.set_facecolor("#f2f2f2")
+        elif fila % 2 == 0:
+            celda.set_facecolor("#f9f9f9")
+    figura.savefig(ruta, format="png", metadata=metadatos)
+
+
+def _formatear(valor):
+    if isinstance(valor, float):
+        return f"{valor:,.0f}" if valor.is_integer() else f"{valor:,.2f}"
+    if isinstance(valor, int):
+        return f"{valor:,}"
+    return str(valor)
+
+
+# -------------------------------
+# GENERACIÓN DESDE GOLD
+# -------------------------------
+def exportar_png_gold(carpeta_gold, tablas, modo="sincrono"):
+    """
+    Genera los PNG de las tablas Gold. tablas es un dict
+    {nombre_png: DataFrame}. Retorna las rutas de los PNG (en modo
+    "diferido", las que se van a generar; en modo "omitir", ninguna).
+    """
+    if modo not in MODOS_PNG:
+        raise ValueError(f"Modo PNG no soportado: {modo!r} (usar 'sincrono', 'diferido' u 'omitir')")
+    if modo == "omitir":
+        return []
+
+    rutas = {os.path.join(carpeta_gold, nombre): df for nombre, df in tablas.items()}
+    if modo == "sincrono":
+        _generar(rutas)
+    else:
+        global _generador
+        with _candado:
+            if _generador is None:
+                _generador = ThreadPoolExecutor(max_workers=1, thread_name_prefix="png_gold")
+            _pendientes.append(_generador.submit(_generar, rutas))
+        print(f"✓ PNG de Gold en segundo plano: {', '.join(os.path.basename(ruta) for ruta in rutas)}")
+    return list(rutas)
+
+
+def _generar(rutas):
+    with etapa("gold", "png") as medicion:
+        generadas = [ruta for ruta, df in rutas.items() if exportar_tabla_png(df, ruta)]
+        medicion.update(filas=sum(len(df) for df in rutas.values()), generadas=len(generadas),
+                        bytes_escritos=tamano_en_disco(*generadas))
+    omitidas = len(rutas) - len(generadas)
+    if omitidas:
+        print(f"✓ PNG sin cambios (misma huella), no se regeneran: {omitidas}")
+    return generadas
+
+
+def esperar_png():
+    """
+    Espera los PNG pendientes del modo "diferido". Retorna las rutas
+    generadas (sin contar las omitidas por huella) y propaga el primer error.
+    """
+    with _candado:
+        pendientes = list(_pendientes)
+        _pendientes.clear()
+    generadas = []
+    for pendiente in pendientes:
+        generadas.extend(pendiente.result())
+    return generadas
+
+
+def generar_png_gold(carpeta_gold=None):
+    """
+    Genera los PNG a partir de los Parquet de Gold ya escritos (tarea
+    opcional del DAG después de procesar_gold). Retorna las rutas generadas.
+    """
+    if carpeta_gold is None:
+        carpeta_gold = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "layer", "gold")
+    tablas = {}
+    for nombre_parquet, nombre_png in TABLAS_PNG.items():
+        ruta_parquet = os.path.join(carpeta_gold, nombre_parquet)
+        if not os.path.exists(ruta_parquet):
+            raise FileNotFoundError(f"No se encontró la tabla Gold: {ruta_parquet}")
+        tablas[nombre_png] = pd.read_parquet(ruta_parquet)
+    rutas = {os.path.join(carpeta_gold, nombre): df for nombre, df in tablas.items()}
+    generadas = _generar(rutas)
+    print(f"✓ PNG de Gold generados: {len(generadas)} de {len(rutas)}")
+    return generadas
+
+
+# =======================
+# EJECUCIÓN LOCAL
+# =======================
+if __name__ == "__main__":
+    generar_png_gold()
@@ -1,12 +1,66 @@
+import json
 import os
+import numpy as np
 import pandas as pd
-from datetime import datetime, timezone
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
-def procesar_a_silver(nombre_archivo="donantes_bronze.parquet"):
+try:
+    from scripts.manifiesto import (leer_manifiesto, guardar_manifiesto, firma_paso, sin_cambios,
+                                    guardar_linaje, SIN_CAMBIOS)
+    from scripts.instrumentacion import etapa, medir_capa, tamano_en_disco
+except ImportError:  # ejecución directa: python scripts/silver_layer.py
+    from manifiesto import (leer_manifiesto, guardar_manifiesto, firma_paso, sin_cambios,
+                            guardar_linaje, SIN_CAMBIOS)
+    from instrumentacion import etapa, medir_capa, tamano_en_disco
+
+# Modo incremental: un archivo Silver por mes de donación, la copia del estado
+# de fuga por socio y el manifiesto con los meses ya procesados
+CARPETA_INCREMENTAL = "donantes_silver_incremental"
+ARCHIVO_FUGAS = "fugas_silver.parquet"
+MANIFIESTO = "manifiesto_silver.json"
+
+# Matriz donante x mes en forma larga y dispersa: solo celdas con monto > 0,
+# con donantes y meses codificados como enteros. Los atributos de cada
+# donante van en una tabla aparte (una fila por donante).
+ARCHIVO_MATRIZ = "donantes_silver_matriz.parquet"
+ARCHIVO_DONANTES = "donantes_silver_dim.parquet"
+COLUMNAS_DONANTE = ['Id_donante', 'Método_Pago', 'Estrategia', 'Status_Socio', 'Año_Mes_Creacion']
+
+# Manifiesto de linaje de la capa (ver manifiesto.firma_paso)
+LINAJE = "linaje_silver.json"
+
+# Motores DuckDB/Polars: tipos que limpiar_silver cambia respecto de Bronze y
+# filas por row group de pq.write_table por defecto (el de to_parquet), para
+# que Silver quede igual byte a byte que en el camino pandas
+TIPOS_SILVER = {'Fecha_Creacion': pa.timestamp('ns'), 'Fecha_Pago': pa.timestamp('ns'),
+                'Monto_Donacion': pa.float64()}
+FILAS_POR_GRUPO = 1024 * 1024
+
+
+@medir_capa("silver")
+def procesar_a_silver(nombre_archivo="donantes_bronze.parquet", incremental=False, guardar_pivot=False,
+                      motor="pandas", forzar=False):
     """
     Procesa los datos desde Bronze hacia Silver con pivot mensual.
     Calcula totales acumulados y transacciones efectivas (>0).
     Retorna el DataFrame pivot y un resumen mensual consistente.
+
+    Gold lee Silver en formato largo, por lo que el pivot ancho
+    (donantes_silver_pivot.parquet) solo se escribe con guardar_pivot=True.
+
+    Con incremental=True procesa solo los meses que Bronze ingirió desde la
+    última ejecución (ver _procesar_incremental) y retorna los registros
+    nuevos junto con su resumen mensual.
+
+    Con motor="duckdb" o motor="polars" (modo completo) el filtrado y la
+    matriz se resuelven sobre los Parquet sin cargar Bronze en pandas (ver
+    _procesar_con_motor); retorna el pivot solo si guardar_pivot=True.
+
+    Si las entradas (Bronze o, en modo incremental, su manifiesto y la tabla
+    de fugas), el código y los parámetros coinciden con linaje_silver.json
+    no se reprocesa nada y se retorna SIN_CAMBIOS; forzar=True lo ignora.
     """
 
     # -------------------------------
@@ -18,6 +72,24 @@ def procesar_a_silver(nombre_archivo="donantes_bronze.parquet"):
     ruta_bronze = os.path.join(carpeta_bronze, nombre_archivo)
 
     os.makedirs(carpeta_silver, exist_ok=True)
+    ruta_linaje = os.path.join(carpeta_silver, LINAJE)
+
+    if incremental:
+        entradas = {
+            'manifiesto_bronze': os.path.join(carpeta_bronze, "manifiesto_bronze.json"),
+            'fugas_bronze': os.path.join(carpeta_bronze, "fugas_bronze.parquet")
+        }
+        salidas = [os.path.join(carpeta_silver, CARPETA_INCREMENTAL), os.path.join(carpeta_silver, ARCHIVO_FUGAS)]
+        if not all(os.path.exists(ruta) for ruta in entradas.values()):
+            raise FileNotFoundError(f"No hay meses ingeridos en modo incremental en Bronze: {carpeta_bronze}")
+        firma = firma_paso(entradas, base_dir, {'incremental': True}, "silver_layer")
+        if not forzar and sin_cambios(ruta_linaje, firma, salidas):
+            print(f"✓ Bronze sin cambios desde la última ejecución, Silver vigente: {salidas[0]}")
+            return SIN_CAMBIOS
+        with etapa("silver", "incremental"):
+            resultado = _procesar_incremental(carpeta_bronze, carpeta_silver)
+        _registrar_linaje(ruta_linaje, firma, salidas)
+        return resultado
 
     # -------------------------------
     # 1. VALIDAR EXISTENCIA DEL ARCHIVO
@@ -25,50 +97,53 @@ def procesar_a_silver(nombre_archivo="donantes_bronze.parquet"):
     if not os.path.exists(ruta_bronze):
         raise FileNotFoundError(f"No se encontró el archivo en Bronze: {ruta_bronze}")
     print(f"✓ Archivo encontrado en Bronze: {ruta_bronze}")
+    if motor not in ("pandas", "duckdb", "polars"):
+        raise ValueError(f"Motor no soportado: {motor!r} (usar 'pandas', 'duckdb' o 'polars')")
 
     # -------------------------------
-    # 2. LECTURA DEL ARCHIVO PARQUET
+    # 1b. LINAJE: SALTAR SI NO HAY CAMBIOS
     # -------------------------------
-    df_silver = pd.read_parquet(ruta_bronze)
-    print(f"✓ Archivo leído correctamente. Registros cargados: {len(df_silver)}")
+    salidas = [os.path.join(carpeta_silver, nombre) for nombre in
+               ("donantes_silver.parquet", ARCHIVO_MATRIZ, ARCHIVO_DONANTES)]
+    if guardar_pivot:
+        salidas.append(os.path.join(carpeta_silver, "donantes_silver_pivot.parquet"))
+    firma = firma_paso({'bronze': ruta_bronze}, base_dir,
+                       {'incremental': False, 'guardar_pivot': guardar_pivot, 'motor': motor}, "silver_layer")
+    if not forzar and sin_cambios(ruta_linaje, firma, salidas):
+        print(f"✓ Bronze sin cambios desde la última ejecución, Silver vigente: {salidas[0]}")
+        return SIN_CAMBIOS
+
+    if motor != "pandas":
+        with etapa("silver", "motor", motor=motor) as medicion:
+            resultado = _procesar_con_motor(ruta_bronze, carpeta_silver, guardar_pivot, motor)
+            medicion.update(bytes_leidos=tamano_en_disco(ruta_bronze), bytes_escritos=tamano_en_disco(*salidas))
+        _registrar_linaje(ruta_linaje, firma, salidas)
+        return resultado
 
     # -------------------------------
-    # 2b. FILTRAR REGISTROS SIN FECHA DE DONACIÓN
+    # 2. LECTURA DEL ARCHIVO PARQUET
     # -------------------------------
-    registros_originales = len(df_silver)
-    df_silver = df_silver[df_silver['Año_Mes_Donacion'].notna()].copy()
-    registros_filtrados = len(df_silver)
-    
-    if registros_originales != registros_filtrados:
-        print(f"✓ Filtrados {registros_originales - registros_filtrados} registros sin Año_Mes_Donacion (NaT)")
+    with etapa("silver", "lectura") as medicion:
+        df_silver = pd.read_parquet(ruta_bronze)
+        medicion.update(filas=len(df_silver), bytes_leidos=tamano_en_disco(ruta_bronze))
+    print(f"✓ Archivo leído correctamente. Registros cargados: {len(df_silver)}")
+    registros_filtrados = int(df_silver['Año_Mes_Donacion'].notna().sum())
 
     # ----------------------------------------------------------
-    # 3. TRANSFORMACIÓN - ELIMINAR ID FUGADOS Y DONACION + PIVOT
+    # 3. TRANSFORMACIÓN - FILTRAR SIN FECHA DE DONACIÓN O PAGO + PIVOT
     # ----------------------------------------------------------
-    fecha_pago_none = df_silver[df_silver['Fecha_Pago'].isna()]
-    df_silver = df_silver.drop(fecha_pago_none.index)
-
-    df_silver['Fecha_Creacion'] = pd.to_datetime(df_silver['Fecha_Creacion'])
-    df_silver['Fecha_Pago'] = pd.to_datetime(df_silver['Fecha_Pago'])
+    with etapa("silver", "filtro") as medicion:
+        df_silver = limpiar_silver(df_silver)
+        medicion['filas'] = len(df_silver)
 
-    df_pivot_silver = df_silver.pivot_table(
-        index=['Id_donante', 'Método_Pago', 'Estrategia', 'Status_Socio', 'Año_Mes_Creacion'],
-        columns='Año_Mes_Donacion',
-        values='Monto_Donacion',
-        aggfunc='sum',
-        fill_value=0
-    ).reset_index()
-
-    # Quitar nombre de columnas jerárquicas
-    df_pivot_silver.columns.name = None
-    
-    # Eliminar columna NaT si existe en el pivot
-    columnas_nat = [col for col in df_pivot_silver.columns if pd.isna(col)]
-    if columnas_nat:
-        df_pivot_silver = df_pivot_silver.drop(columns=columnas_nat)
-        print(f"✓ Eliminadas {len(columnas_nat)} columnas NaT del pivot")
-    
-    df_pivot_silver = df_pivot_silver.sort_values(by='Id_donante').reset_index(drop=True)
+    # Matriz donante x mes con códigos enteros (en vez de pivot_table) y
+    # vista densa con el mismo formato que el pivot histórico
+    with etapa("silver", "pivot") as medicion:
+        matriz = construir_matriz_donantes(df_silver)
+        df_pivot_silver = vista_densa(matriz)
+        medicion['filas'] = len(matriz['donantes'])
+    print(f"✓ Matriz donante x mes: {len(matriz['donantes'])} donantes x {len(matriz['meses'])} meses, "
+          f"{len(matriz['monto'])} celdas con monto")
 
     # -------------------------------
     # 3b. PRINT DE INSPECCIÓN
@@ -82,22 +157,22 @@ def procesar_a_silver(nombre_archivo="donantes_bronze.parquet"):
     # 4. GUARDAR PARQUET EN SILVER
     # -------------------------------
     ruta_salida = os.path.join(carpeta_silver, "donantes_silver.parquet")
-    ruta_salida_pivot = os.path.join(carpeta_silver, "donantes_silver_pivot.parquet")
-    df_silver.to_parquet(ruta_salida, index=False)
-    df_pivot_silver.to_parquet(ruta_salida_pivot, index=False)
+    with etapa("silver", "escritura", filas=len(df_silver)) as medicion:
+        df_silver.to_parquet(ruta_salida, index=False)
+        guardar_matriz_donantes(matriz, carpeta_silver)
+        if guardar_pivot:
+            ruta_salida_pivot = os.path.join(carpeta_silver, "donantes_silver_pivot.parquet")
+            df_pivot_silver.to_parquet(ruta_salida_pivot, index=False)
+        medicion['bytes_escritos'] = tamano_en_disco(*salidas)
     print(f"\n✓ Datos procesados y guardados en: {ruta_salida}")
-    print(f"\n✓ Datos procesados y guardados en: {ruta_salida_pivot}")
+    if guardar_pivot:
+        print(f"\n✓ Datos procesados y guardados en: {ruta_salida_pivot}")
+    print(f"\n✓ Matriz dispersa guardada en: {os.path.join(carpeta_silver, ARCHIVO_MATRIZ)}")
 
     # -------------------------------
-    # 5. ARCHIVO INDICADOR
+    # 5. MANIFIESTO DE LINAJE
     # -------------------------------
-    indicador_py = os.path.join(carpeta_silver, "donantes_silver.py")
-    ahora_utc = datetime.now(timezone.utc)
-    with open(indicador_py, "w", encoding="utf-8") as f:
-        f.write("# Archivo indicador para la capa Silver\n")
-        f.write(f"# Generado: {ahora_utc.isoformat()}\n")
-        f.write("# Contiene: donantes_silver.parquet (datos limpios y pivot mensuales)\n")
-    print(f"✓ Archivo indicador creado: {indicador_py}")
+    _registrar_linaje(ruta_linaje, firma, salidas)
 
     # -------------------------------
     # 6. RESUMEN MENSUAL
@@ -129,5 +204,409 @@ def procesar_a_silver(nombre_archivo="donantes_bronze.parquet"):
 
     return df_pivot_silver, resumen_mensual
 
+
+def limpiar_silver(df_bronze):
+    """
+    Reglas de limpieza de Silver sobre los registros de Bronze: descarta los
+    registros sin Año_Mes_Donacion (NaT) o sin Fecha_Pago y convierte las
+    fechas a datetime.
+    """
+    registros_originales = len(df_bronze)
+    df_silver = df_bronze[df_bronze['Año_Mes_Donacion'].notna()].copy()
+    registros_filtrados = len(df_silver)
+
+    if registros_originales != registros_filtrados:
+        print(f"✓ Filtrados {registros_originales - registros_filtrados} registros sin Año_Mes_Donacion (NaT)")
+
+    fecha_pago_none = df_silver[df_silver['Fecha_Pago'].isna()]
+    df_silver = df_silver.drop(fecha_pago_none.index)
+
+    df_silver['Fecha_Creacion'] = pd.to_datetime(df_silver['Fecha_Creacion'])
+    df_silver['Fecha_Pago'] = pd.to_datetime(df_silver['Fecha_Pago'])
+    return df_silver
+
+
+def construir_matriz_donantes(df_silver):
+    """
+    Construye la matriz donante x mes de Silver a partir de los registros
+    largos. Donantes y meses se codifican como enteros (fila, columna) y los
+    montos de una misma celda se suman; solo se guardan las celdas con
+    monto > 0 (el resto vale 0, como el fill_value del pivot).
+
+    Retorna un diccionario con:
+    - 'donantes': atributos por donante (COLUMNAS_DONANTE + Clave_Donante),
+      ordenados por Id_donante; su posición es la fila de la matriz.
+    - 'meses': lista ordenada de Año_Mes_Donacion; su posición es la columna.
+    - 'fila', 'columna', 'monto': coordenadas y valores de las celdas.
+    """
+    claves = df_silver['Clave_Donante'].to_numpy()
+    _, primera_fila = np.unique(claves, return_index=True)
+    donantes = (df_silver[['Clave_Donante'] + COLUMNAS_DONANTE].iloc[primera_fila]
+                .sort_values('Id_donante')
+                .reset_index(drop=True))
+    fila = _posicion_por_clave(donantes['Clave_Donante'].to_numpy())[claves]
+
+    # Meses: se recodifican los códigos de la categórica (sin pasar por texto)
+    periodo = df_silver['Año_Mes_Donacion'].astype('category')
+    codigos = periodo.cat.codes.to_numpy()
+    categorias = periodo.cat.categories.astype(str)
+    meses = sorted(categorias[np.unique(codigos[codigos >= 0])])
+    columna = pd.Index(meses).get_indexer(categorias)[codigos].astype(np.int64)
+    monto = df_silver['Monto_Donacion'].fillna(0).to_numpy(dtype=np.int64)
+
+    # Sumar celdas repetidas: la clave lineal fila * meses + columna ordena
+    # por donante y mes
+    celda = fila * len(meses) + columna
+    celdas, inversa = np.unique(celda, return_inverse=True)
+    suma = np.bincount(inversa, weights=monto, minlength=len(celdas)).astype(np.int64)
+    con_monto = suma > 0
+
+    return {
+        'donantes': donantes,
+        'meses': meses,
+        'fila': (celdas[con_monto] // len(meses)).astype(np.int32),
+        'columna': (celdas[con_monto] % len(meses)).astype(np.int16),
+        'monto': suma[con_monto]
+    }
+
+
+def _posicion_por_clave(claves):
+    """
+    Índice Clave_Donante -> posición en claves (-1 si la clave no está).
+    Sin claves (Silver vacío) retorna un índice vacío.
+    """
+    posicion = np.full(int(claves.max()) + 1 if len(claves) else 0, -1, dtype=np.int64)
+    posicion[claves] = np.arange(len(claves))
+    return posicion
+
+
+def vista_densa(matriz):
+    """
+    Vista densa de la matriz donante x mes con el formato del pivot
+    histórico de Silver: atributos del donante + una columna por mes.
+    """
+    valores = np.zeros((len(matriz['donantes']), len(matriz['meses'])), dtype=np.int64)
+    valores[matriz['fila'], matriz['columna']] = matriz['monto']
+    df_pivot = matriz['donantes'][COLUMNAS_DONANTE].copy()
+    return pd.concat([df_pivot, pd.DataFrame(valores, columns=matriz['meses'])], axis=1)
+
+
+def guardar_matriz_donantes(matriz, carpeta_silver):
+    """
+    Persiste la matriz en forma larga: una fila por celda con monto
+    (Clave_Donante, Año_Mes_Donacion, Monto_Donacion) y la tabla de
+    donantes. El eje completo de meses se guarda en los metadatos.
+    """
+    donantes = matriz['donantes']
+    tabla = pa.table({
+        'Clave_Donante': pa.array(donantes['Clave_Donante'].to_numpy()[matriz['fila']], pa.int32()),
+        'Año_Mes_Donacion': pa.DictionaryArray.from_arrays(
+            pa.array(matriz['columna'], pa.int16()), pa.array(matriz['meses'], pa.string())
+        ),
+        'Monto_Donacion': pa.array(matriz['monto'], pa.int64())
+    })
+    tabla = tabla.replace_schema_metadata({'meses': json.dumps(matriz['meses'])})
+    pq.write_table(tabla, os.path.join(carpeta_silver, ARCHIVO_MATRIZ))
+    donantes.to_parquet(os.path.join(carpeta_silver, ARCHIVO_DONANTES), index=False)
+
+
+def leer_matriz_donantes(carpeta_silver):
+    """
+    Lee la matriz donante x mes persistida por guardar_matriz_donantes y la
+    devuelve en el mismo formato que construir_matriz_donantes.
+    """
+    tabla = pq.read_table(os.path.join(carpeta_silver, ARCHIVO_MATRIZ))
+    donantes = pd.read_parquet(os.path.join(carpeta_silver, ARCHIVO_DONANTES))
+    meses = json.loads(tabla.schema.metadata[b'meses'])
+
+    posicion = _posicion_por_clave(donantes['Clave_Donante'].to_numpy())
+    periodo = tabla.column('Año_Mes_Donacion').to_pandas().astype(str)
+    return {
+        'donantes': donantes,
+        'meses': meses,
+        'fila': posicion[tabla.column('Clave_Donante').to_numpy()].astype(np.int32),
+        'columna': pd.Categorical(periodo, categories=meses).codes.astype(np.int16),
+        'monto': tabla.column('Monto_Donacion').to_numpy()
+    }
+
+
+def _registrar_linaje(ruta_linaje, firma, salidas):
+    with etapa("silver", "linaje"):
+        guardar_linaje(ruta_linaje, firma, salidas)
+    print(f"✓ Linaje registrado en: {ruta_linaje}")
+
+
+def esquema_silver(ruta_bronze):
+    """
+    Esquema Arrow con que el camino pandas escribe Silver desde ruta_bronze
+    (pd.read_parquet + limpiar_silver + to_parquet), con sus metadatos de
+    pandas. Las categorías de cada columna categórica quedan en el orden en
+    que pd.read_parquet unifica los diccionarios de los row groups de
+    Bronze; se leen de a un row group. Retorna (esquema, categorias).
+    """
+    esquema_bronze = pq.read_schema(ruta_bronze)
+    categoricas = [campo.name for campo in esquema_bronze if pa.types.is_dictionary(campo.type)]
+    categorias = {columna: {} for columna in categoricas}
+    archivo = pq.ParquetFile(ruta_bronze)
+    for grupo in range(archivo.num_row_groups):
+        tabla = archivo.read_row_group(grupo, columns=categoricas)
+        for columna in categoricas:
+            for trozo in tabla.column(columna).chunks:
+                categorias[columna].update(dict.fromkeys(trozo.dictionary.to_pylist()))
+    categorias = {columna: list(valores) for columna, valores in categorias.items()}
+
+    vacio = {}
+    campos = []
+    for campo in esquema_bronze:
+        if campo.name in categorias:
+            vacio[campo.name] = pd.Categorical([], categories=categorias[campo.name])
+            indices = pa.from_numpy_dtype(vacio[campo.name].codes.dtype)
+            campos.append(pa.field(campo.name, pa.dictionary(indices, pa.string())))
+        else:
+            campos.append(pa.field(campo.name, TIPOS_SILVER.get(campo.name, campo.type)))
+    tipos = pa.schema(campos)
+    df_vacio = tipos.empty_table().to_pandas().assign(**vacio)
+    return pa.Table.from_pandas(df_vacio, schema=tipos, preserve_index=False).schema, categorias
+
+
+def escribir_silver(lotes, ruta_silver, esquema, categorias):
+    """
+    Escribe los lotes Arrow filtrados por un motor con el esquema de
+    esquema_silver: las categóricas se codifican contra las categorías de
+    Bronze y el resto se convierte al tipo de pandas. Los row groups se
+    cortan cada FILAS_POR_GRUPO filas, como to_parquet, así que el archivo
+    es idéntico al del camino pandas.
+    """
+    diccionarios = {columna: pa.array(valores, pa.string()) for columna, valores in categorias.items()}
+    with pq.ParquetWriter(ruta_silver, esquema) as escritor:
+        pendientes, filas = [], 0
+        for lote in lotes:
+            pendientes.append(_convertir_lote(lote, esquema, diccionarios))
+            filas += lote.num_rows
+            while filas >= FILAS_POR_GRUPO:
+                tabla = pa.Table.from_batches(pendientes, esquema)
+                escritor.write_table(tabla.slice(0, FILAS_POR_GRUPO).combine_chunks())
+                resto = tabla.slice(FILAS_POR_GRUPO)
+                pendientes, filas = resto.to_batches(), resto.num_rows
+        if filas:
+            escritor.write_table(pa.Table.from_batches(pendientes, esquema).combine_chunks())
+
+
+def _convertir_lote(lote, esquema, diccionarios):
+    columnas = []
+    for campo in esquema:
+        columna = lote.column(campo.name)
+        if pa.types.is_dictionary(columna.type):
+            columna = columna.dictionary_decode()
+        if pa.types.is_dictionary(campo.type):
+            valores = diccionarios[campo.name]
+            indices = pc.index_in(columna.cast(pa.string()), value_set=valores)
+            columna = pa.DictionaryArray.from_arrays(indices.cast(campo.type.index_type), valores)
+        else:
+            columna = columna.cast(campo.type)
+        columnas.append(columna)
+    return pa.RecordBatch.from_arrays(columnas, schema=esquema)
+
+
+def _procesar_con_motor(ruta_bronze, carpeta_silver, guardar_pivot, motor):
+    """
+    Modo completo con un motor alternativo: mismos archivos que el camino
+    pandas (donantes_silver.parquet, matriz y tabla de donantes).
+    - duckdb: filtrado en SQL leído por lotes Arrow y matriz agregada en SQL.
+    - polars: filtrado en streaming (filtros empujados a la lectura) y
+      matriz agregada con un plan lazy multihilo.
+    Los lotes filtrados se escriben con escribir_silver, con el esquema y
+    las categorías del camino pandas.
+    """
+    ruta_salida = os.path.join(carpeta_silver, "donantes_silver.parquet")
+    esquema, categorias = esquema_silver(ruta_bronze)
+    if motor == "duckdb":
+        try:
+            from scripts import motor_duckdb
+        except ImportError:  # ejecución directa: python scripts/silver_layer.py
+            import motor_duckdb
+        with motor_duckdb.conectar() as con:
+            registros, sin_mes, lotes = motor_duckdb.filtrar_silver(con, ruta_bronze)
+            escribir_silver(lotes, ruta_salida, esquema, categorias)
+            matriz = motor_duckdb.matriz_donantes(con, ruta_salida, COLUMNAS_DONANTE, categorias)
+    else:
+        try:
+            from scripts import motor_polars
+        except ImportError:  # ejecución directa: python scripts/silver_layer.py
+            import motor_polars
+        registros, sin_mes, lotes = motor_polars.filtrar_silver(ruta_bronze)
+        escribir_silver(lotes, ruta_salida, esquema, categorias)
+        matriz = motor_polars.matriz_donantes(ruta_salida, COLUMNAS_DONANTE, categorias)
+
+    print(f"✓ Archivo procesado con {motor}. Registros leídos: {registros}")
+    if sin_mes:
+        print(f"✓ Filtrados {sin_mes} registros sin Año_Mes_Donacion (NaT)")
+    print(f"✓ Matriz donante x mes: {len(matriz['donantes'])} donantes x {len(matriz['meses'])} meses, "
+          f"{len(matriz['monto'])} celdas con monto")
+
+    guardar_matriz_donantes(matriz, carpeta_silver)
+    print(f"\n✓ Datos procesados y guardados en: {ruta_salida}")
+    df_pivot_silver = None
+    if guardar_pivot:
+        df_pivot_silver = vista_densa(matriz)
+        ruta_salida_pivot = os.path.join(carpeta_silver, "donantes_silver_pivot.parquet")
+        df_pivot_silver.to_parquet(ruta_salida_pivot, index=False)
+        print(f"\n✓ Datos procesados y guardados en: {ruta_salida_pivot}")
+    print(f"\n✓ Matriz dispersa guardada en: {os.path.join(carpeta_silver, ARCHIVO_MATRIZ)}")
+
+    # Resumen mensual desde las celdas de la matriz (= suma y celdas > 0 del pivot)
+    columnas = len(matriz['meses'])
+    resumen_mensual = pd.DataFrame(index=matriz['meses'])
+    resumen_mensual['Total_Donaciones'] = np.bincount(matriz['columna'], weights=matriz['monto'],
+                                                      minlength=columnas).astype(np.int64)
+    resumen_mensual['Cantidad_Donaciones_Exitosas'] = np.bincount(matriz['columna'], minlength=columnas)
+    resumen_mensual['Tasa_Exito_%'] = 100
+
+    print("\n--- RESUMEN MENSUAL EN SILVER ---")
+    print(resumen_mensual)
+    print("\n--- TOTALES ACUMULADOS EN SILVER ---")
+    print(f"Suma total Monto_Donacion: {resumen_mensual['Total_Donaciones'].sum()}")
+    print(f"\nCantidad total de registros generados: {registros - sin_mes}")
+    print(f"Total transacciones (>0): {resumen_mensual['Cantidad_Donaciones_Exitosas'].sum()}")
+
+    return df_pivot_silver, resumen_mensual
+
+
+def _procesar_incremental(carpeta_bronze, carpeta_silver):
+    """
+    Lleva a Silver los meses presentes en el manifiesto de Bronze que aún no
+    figuran en el de Silver. Cada mes se limpia por separado (mismas reglas
+    que el modo completo) y se escribe como un archivo nuevo; el historial
+    no se reescribe. El estado de fuga por socio se copia desde Bronze.
+    El DAG de Airflow ejecuta los mismos pasos con un mes por tarea
+    (procesar_mes_silver + consolidar_silver).
+    """
+    if not leer_manifiesto(os.path.join(carpeta_bronze, "manifiesto_bronze.json"))['meses']:
+        raise FileNotFoundError(f"No hay meses ingeridos en modo incremental en Bronze: {carpeta_bronze}")
+
+    nuevos = _meses_pendientes(carpeta_bronze, carpeta_silver)
+    if not nuevos:
+        manifiesto = leer_manifiesto(os.path.join(carpeta_silver, MANIFIESTO))
+        print(f"✓ Sin meses nuevos en Bronze (marca de agua: {manifiesto['marca_agua']})")
+        return None, pd.DataFrame(columns=['Total_Donaciones', 'Cantidad_Donaciones_Exitosas'])
+    print(f"✓ Meses nuevos a procesar: {len(nuevos)} ({nuevos[0]} .. {nuevos[-1]})")
+
+    df_nuevos = pd.concat([_limpiar_mes(carpeta_bronze, carpeta_silver, mes) for mes in nuevos],
+                          ignore_index=True)
+    montos = df_nuevos['Monto_Donacion'].astype('int64')
+    resumen_mensual = pd.DataFrame({
+        'Total_Donaciones': montos.groupby(df_nuevos['Año_Mes_Donacion'], observed=True).sum(),
+        'Cantidad_Donaciones_Exitosas': (montos > 0).groupby(df_nuevos['Año_Mes_Donacion'], observed=True).sum()
+    })
+    print("\n--- RESUMEN MENSUAL EN SILVER (MESES NUEVOS) ---")
+    print(resumen_mensual)
+
+    _consolidar_silver(carpeta_bronze, carpeta_silver, nuevos)
+    return df_nuevos, resumen_mensual
+
+
+# -------------------------------
+# TAREAS POR PARTICIÓN (DAG)
+# -------------------------------
+def _carpetas_silver():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, "..", "layer", "bronze"), os.path.join(base_dir, "..", "layer", "silver")
+
+
+def meses_pendientes_silver():
+    """Meses del manifiesto de Bronze que aún no figuran en el de Silver."""
+    return _meses_pendientes(*_carpetas_silver())
+
+
+def procesar_mes_silver(mes):
+    """
+    Limpia un solo mes de Bronze incremental (tarea mapeada del DAG). Solo
+    escribe el archivo Silver del mes, así que varios meses pueden correr en
+    paralelo y un reintento sobrescribe lo mismo; el manifiesto se actualiza
+    en consolidar_silver. Retorna el resumen del mes, o None si el mes ya
+    figura en el manifiesto.
+    """
+    carpeta_bronze, carpeta_silver = _carpetas_silver()
+    if mes in leer_manifiesto(os.path.join(carpeta_silver, MANIFIESTO))['meses']:
+        print(f"✓ {mes} ya consolidado en Silver")
+        return None
+    df_mes = _limpiar_mes(carpeta_bronze, carpeta_silver, mes)
+    montos = df_mes['Monto_Donacion'].astype('int64')
+    print(f"  · {mes}: {len(df_mes)} registros")
+    return {'mes': mes, 'Total_Donaciones': int(montos.sum()), 'Cantidad_Donaciones_Exitosas': int((montos > 0).sum())}
+
+
+def consolidar_silver(resultados):
+    """
+    Reducción del DAG: registra en el manifiesto los meses de
+    procesar_mes_silver. Retorna SIN_CAMBIOS si no hay meses nuevos.
+    """
+    carpeta_bronze, carpeta_silver = _carpetas_silver()
+    procesados = set(leer_manifiesto(os.path.join(carpeta_silver, MANIFIESTO))['meses'])
+    meses = [r['mes'] for r in resultados if r and r['mes'] not in procesados]
+    if not meses:
+        print("✓ Sin meses nuevos que consolidar en Silver")
+        return SIN_CAMBIOS
+    _consolidar_silver(carpeta_bronze, carpeta_silver, meses)
+
+
+def _meses_pendientes(carpeta_bronze, carpeta_silver):
+    manifiesto_bronze = leer_manifiesto(os.path.join(carpeta_bronze, "manifiesto_bronze.json"))
+    procesados = set(leer_manifiesto(os.path.join(carpeta_silver, MANIFIESTO))['meses'])
+    return [mes for mes in manifiesto_bronze['meses'] if mes not in procesados]
+
+
+def _limpiar_mes(carpeta_bronze, carpeta_silver, mes):
+    """Limpia un mes de Bronze incremental y escribe su archivo Silver."""
+    carpeta_incremental = os.path.join(carpeta_silver, CARPETA_INCREMENTAL)
+    os.makedirs(carpeta_incremental, exist_ok=True)
+    df_mes = pd.read_parquet(os.path.join(carpeta_bronze, "donantes_bronze_incremental", f"{mes}.parquet"))
+    df_mes = df_mes[df_mes['Fecha_Pago'].notna()].copy()
+    df_mes['Fecha_Creacion'] = pd.to_datetime(df_mes['Fecha_Creacion'])
+    df_mes['Fecha_Pago'] = pd.to_datetime(df_mes['Fecha_Pago'])
+    df_mes.to_parquet(os.path.join(carpeta_incremental, f"{mes}.parquet"), index=False)
+    return df_mes
+
+
+def _consolidar_silver(carpeta_bronze, carpeta_silver, meses):
+    """
+    Copia el estado de fuga vigente desde Bronze (incluye fugas de socios
+    cuyo historial ya estaba en Silver) y agrega los meses al manifiesto.
+    """
+    ruta_manifiesto = os.path.join(carpeta_silver, MANIFIESTO)
+    manifiesto = leer_manifiesto(ruta_manifiesto)
+    meses = [mes for mes in meses if mes not in manifiesto['meses']]
+    if not meses:
+        print(f"✓ Sin meses nuevos que consolidar en Silver (marca de agua: {manifiesto['marca_agua']})")
+        return
+    pd.read_parquet(os.path.join(carpeta_bronze, "fugas_bronze.parquet")).to_parquet(
+        os.path.join(carpeta_silver, ARCHIVO_FUGAS), index=False
+    )
+    manifiesto['meses'].extend(meses)
+    guardar_manifiesto(ruta_manifiesto, manifiesto)
+    print(f"✓ Manifiesto Silver actualizado (marca de agua: {manifiesto['marca_agua']})")
+
+
+def leer_silver_incremental(carpeta_silver, meses=None, filtros=None):
+    """
+    Reúne los archivos mensuales de Silver incremental y aplica el estado de
+    fuga vigente: un socio fugado en un mes posterior aparece como 'Fugado'
+    (con su Fecha_Fuga) también en los meses ya procesados. meses limita la
+    lectura a esos archivos mensuales y filtros se pasa a pd.read_parquet
+    (por ejemplo [('Año_Mes_Creacion', 'in', cohortes)]).
+    """
+    carpeta_incremental = os.path.join(carpeta_silver, CARPETA_INCREMENTAL)
+    if meses is not None:
+        carpeta_incremental = [os.path.join(carpeta_incremental, f"{mes}.parquet") for mes in meses]
+    df = pd.read_parquet(carpeta_incremental, filters=filtros)
+    fugas = pd.read_parquet(os.path.join(carpeta_silver, ARCHIVO_FUGAS)).set_index('Id_donante')
+
+    fugado = df['Id_donante'].isin(fugas.index)
+    df['Status_Socio'] = pd.Categorical(fugado.map({True: 'Fugado', False: 'Activo'}))
+    df['Fecha_Fuga'] = df['Id_donante'].map(fugas['Fecha_Fuga'])
+    df['Año_Mes_Fuga'] = df['Id_donante'].map(fugas['Año_Mes_Fuga']).astype('category')
+    return df
+
+
 if __name__ == "__main__":
     procesar_a_silver()
\ No newline at end of file
@@ -1,114 +1,295 @@
+import io
 import pandas as pd
+import pyarrow.parquet as pq
+import altair as alt
 import matplotlib.pyplot as plt
 import seaborn as sns
 import streamlit as st
 import os
+import sys
 
 # -------------------------------
 # CONFIGURACIÓN
 # -------------------------------
 base_dir = os.path.dirname(os.path.abspath(__file__))
-carpeta_silver = os.path.join(base_dir, "..", "layer", "silver")
-ruta_silver = os.path.join(carpeta_silver, "donantes_silver.parquet")
+carpeta_gold = os.path.join(base_dir, "..", "layer", "gold")
+ruta_cubo = os.path.join(carpeta_gold, "cubo_cohortes_gold.parquet")
+
+sys.path.insert(0, base_dir)
+from manifiesto import huella_parquet
+from metricas import calcular_metricas
 
 st.set_page_config(page_title="Análisis del LifeTime de los Donantes", layout="wide")
 st.title("📊 Análisis del LifeTime de los Donantes")
 
-if not os.path.exists(ruta_silver):
-    st.error(f"❌ Archivo Silver no encontrado: {ruta_silver}")
+if not os.path.exists(ruta_cubo):
+    st.error(f"❌ Cubo de cohortes no encontrado: {ruta_cubo}. Ejecuta la capa Gold.")
     st.stop()
 
 # -------------------------------
 # CARGAR DATOS
 # -------------------------------
-@st.cache_data
-def cargar_datos(ruta):
-    return pd.read_parquet(ruta).sort_values(['Id_donante', 'Año_Mes_Creacion']).reset_index(drop=True)
+# El dashboard lee solo el cubo de cohortes de Gold (cohorte x periodo x
+# estrategia x método de pago x estado): su tamaño no depende de la cantidad
+# de donantes. Todas las funciones cacheadas reciben la huella del cubo y los
+# filtros: cada combinación de filtros queda en caché (volver a una ya vista
+# no recalcula) hasta CACHE['max_entries'] entradas por función o una hora sin
+# uso. Cuando Gold escribe una versión nueva del cubo cambia la huella y las
+# cachés se vacían (ver huella_vigente).
+CACHE = {'max_entries': 64, 'ttl': 3600}
+DIMENSIONES_FILTRO = ['Año_Mes_Creacion', 'Estrategia', 'Método_Pago', 'Status_Socio']
+COLUMNAS_DASHBOARD = ['Año_Mes_Creacion', 'Año_Mes_Donacion', 'Estrategia', 'Método_Pago',
+                      'Donantes', 'Donantes_Nuevos', 'Fugados_Nuevos', 'Monto_Total', 'Registros',
+                      'Registros_Fugados', 'Meses_Activo_Fugados']
+
+
+@st.cache_data(**CACHE)
+def cargar_opciones(ruta, huella):
+    # Valores de cada filtro: se leen solo las columnas de dimensión
+    dimensiones = pq.read_table(ruta, columns=DIMENSIONES_FILTRO).to_pandas()
+    return {columna: sorted(dimensiones[columna].unique()) for columna in DIMENSIONES_FILTRO}
+
+
+@st.cache_data(**CACHE)
+def cargar_datos(ruta, huella, filtros):
+    # Filtros y proyección se resuelven en la lectura del Parquet (row groups
+    # por cohorte), no en pandas sobre el cubo completo
+    return pq.read_table(ruta, columns=COLUMNAS_DASHBOARD, filters=filtros or None).to_pandas()
+
+
+def construir_filtros(opciones, desde, hasta, seleccion):
+    """
+    Filtros de pyarrow (lista de tuplas, en conjunción) para la lectura del
+    cubo. Un segmento sin selección o con todos sus valores no filtra.
+    """
+    filtros = []
+    if desde != opciones['Año_Mes_Creacion'][0]:
+        filtros.append(('Año_Mes_Creacion', '>=', desde))
+    if hasta != opciones['Año_Mes_Creacion'][-1]:
+        filtros.append(('Año_Mes_Creacion', '<=', hasta))
+    for columna, valores in seleccion.items():
+        if valores and len(valores) < len(opciones[columna]):
+            filtros.append((columna, 'in', tuple(valores)))
+    return tuple(filtros)
+
+# -------------------------------
+# CÁLCULOS (MEMOIZADOS POR HUELLA)
+# -------------------------------
+@st.cache_data(**CACHE)
+def calcular_retencion(ruta, huella, filtros):
+    cubo = cargar_datos(ruta, huella, filtros)
+    cohorts = cubo.groupby(['Año_Mes_Creacion', 'Año_Mes_Donacion']).agg(
+        Id_donante=('Donantes', 'sum'), Monto_Donacion=('Monto_Total', 'sum')
+    )
+    cohort_size = cohorts['Id_donante'].groupby(level=0, observed=True).first()
+    retencion = cohorts['Id_donante'].unstack(0)
+    retencion_pc = retencion.divide(cohort_size, axis=0)
+    revenue_matrix = cohorts['Monto_Donacion'].unstack(0).T / 1_000_000
+    return retencion, retencion_pc, revenue_matrix
+
+
+# Todos los bloques de KPIs (global, por cohorte, estrategia y método de pago)
+# salen de una sola pasada agrupada sobre el cubo, compartida por las secciones
+@st.cache_data(**CACHE)
+def calcular_bloques_kpi(ruta, huella, filtros):
+    return calcular_metricas(cargar_datos(ruta, huella, filtros))
+
+
+def calcular_kpis(ruta, huella, filtros):
+    fila = calcular_bloques_kpi(ruta, huella, filtros)['Global'].iloc[0]
+    return {
+        'total_donantes': int(fila['Donantes_Nuevos']),
+        'tasa_fuga_global': fila['Tasa_Fuga'],
+        'donacion_promedio': fila['Donacion_Promedio'],
+        'ltv_promedio': fila['LTV']
+    }
+
+
+def calcular_por_cohorte(ruta, huella, filtros):
+    return calcular_bloques_kpi(ruta, huella, filtros)['Año_Mes_Creacion']
+
+
+@st.cache_data(**CACHE)
+def calcular_resumen_cohortes(ruta, huella, filtros):
+    por_cohorte = calcular_por_cohorte(ruta, huella, filtros)
+    resumen_base = pd.DataFrame({
+        'Total Donantes': por_cohorte['Donantes_Nuevos'],
+        'Monto Total': por_cohorte['Monto_Total'],
+        'Donación Promedio': por_cohorte['Donacion_Promedio']
+    })
+
+    resumen_base['Total Fugados'] = por_cohorte['Fugados_Nuevos'].astype(int)
+    resumen_base['Tasa de Fuga (%)'] = por_cohorte['Tasa_Fuga'].round(2)
+    resumen_base['LTV Promedio'] = por_cohorte['LTV']
+
+    # Formatear columnas de dinero
+    resumen_base['Monto Total'] = resumen_base['Monto Total'].apply(lambda x: f"${x:,.0f}")
+    resumen_base['Donación Promedio'] = resumen_base['Donación Promedio'].apply(lambda x: f"${x:,.0f}")
+    resumen_base['LTV Promedio'] = resumen_base['LTV Promedio'].apply(lambda x: f"${x:,.0f}")
+    return resumen_base
+
+
+# Misma tabla para Estrategia y Método_Pago (una entrada de caché por segmento)
+@st.cache_data(**CACHE)
+def calcular_tabla_segmento(ruta, huella, filtros, segmento):
+    por_segmento = calcular_bloques_kpi(ruta, huella, filtros)[segmento]
+    return pd.DataFrame({
+        'Total Donantes': por_segmento['Donantes_Nuevos'],
+        'Monto Total': por_segmento['Monto_Total'].apply(lambda x: f"${x:,.0f}"),
+        'Donación Promedio': por_segmento['Donacion_Promedio'].apply(lambda x: f"${x:,.0f}"),
+        'Total Fugados': por_segmento['Fugados_Nuevos'].astype(int),
+        'Tasa Fuga (%)': por_segmento['Tasa_Fuga'].round(2)
+    })
+
+
+def calcular_lifetime(ruta, huella, filtros):
+    # Promedio por registro de donantes fugados, como sobre las filas de Silver
+    lifetime = calcular_por_cohorte(ruta, huella, filtros)['Lifetime'].dropna()
+    return lifetime if not lifetime.empty else None
+
+
+# -------------------------------
+# HEATMAPS
+# -------------------------------
+# Modo rápido: Vega-Lite (Altair), se dibuja en el navegador.
+# Modo detallado: el heatmap anotado de seaborn se rasteriza una sola vez por
+# versión del cubo y se sirve como PNG cacheado.
+MODOS_HEATMAP = ["⚡ Rápido (interactivo)", "🖼️ Detallado (imagen)"]
+HEATMAPS = {
+    'retencion_pc': {'titulo': 'LifeTime expresado en Porcentaje', 'cmap': 'cividis', 'esquema': 'cividis',
+                     'fmt': '.0%', 'annot_size': 12, 'cbar_kws': {'shrink': 0.7}},
+    'retencion': {'titulo': 'LifeTime expresado en Cantidad de Donantes', 'cmap': 'magma', 'esquema': 'magma',
+                  'fmt': '.0f', 'annot_size': 12, 'cbar_kws': {'shrink': 0.7}},
+    'ingresos': {'titulo': 'Ingresos por Cohorte y Período (en Millones de $)', 'cmap': 'YlGn', 'esquema': 'yellowgreen',
+                 'fmt': '.1f', 'annot_size': 11, 'cbar_kws': {'shrink': 0.7, 'label': 'Millones de $'}},
+}
+
 
-df = cargar_datos(ruta_silver)
+def matriz_heatmap(ruta, huella, filtros, tipo):
+    retencion, retencion_pc, revenue_matrix = calcular_retencion(ruta, huella, filtros)
+    return {'retencion_pc': retencion_pc.T, 'retencion': retencion.T, 'ingresos': revenue_matrix}[tipo]
+
+
+@st.cache_data(**CACHE)
+def heatmap_png(ruta, huella, filtros, tipo):
+    config = HEATMAPS[tipo]
+    fig, ax = plt.subplots(figsize=(22, 12))
+    sns.heatmap(matriz_heatmap(ruta, huella, filtros, tipo), cmap=config['cmap'], annot=True, fmt=config['fmt'],
+                annot_kws={'size': config['annot_size']}, linewidths=0.5, linecolor='white',
+                cbar_kws=config['cbar_kws'], ax=ax)
+    ax.set_title(config['titulo'], fontsize=20, pad=20)
+    b, t = ax.get_ylim()
+    ax.set_ylim(b+0.5, t-0.5)
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def heatmap_altair(ruta, huella, filtros, tipo):
+    config = HEATMAPS[tipo]
+    matriz = matriz_heatmap(ruta, huella, filtros, tipo)
+    datos = matriz.rename_axis(index='Cohorte', columns='Periodo').stack().rename('Valor').reset_index()
+    base = alt.Chart(datos, title=config['titulo']).encode(
+        x=alt.X('Periodo:O', title='Año_Mes_Donacion'),
+        y=alt.Y('Cohorte:O', title='Año_Mes_Creacion')
+    )
+    celdas = base.mark_rect().encode(
+        color=alt.Color('Valor:Q', scale=alt.Scale(scheme=config['esquema']), title=None),
+        tooltip=['Cohorte', 'Periodo', alt.Tooltip('Valor:Q', format=config['fmt'])]
+    )
+    textos = base.mark_text(fontSize=9).encode(text=alt.Text('Valor:Q', format=config['fmt']))
+    return (celdas + textos).properties(height=600)
+
+
+def mostrar_heatmap(tipo, modo):
+    if modo == MODOS_HEATMAP[0]:
+        st.altair_chart(heatmap_altair(ruta_cubo, huella, filtros, tipo), use_container_width=True)
+    else:
+        st.image(heatmap_png(ruta_cubo, huella, filtros, tipo), use_column_width=True)
+
+
+@st.cache_resource
+def huella_vigente():
+    # Huella del cubo con que se llenaron las cachés, compartida entre sesiones
+    return {}
+
+
+huella = huella_parquet(ruta_cubo)
+vigente = huella_vigente()
+if vigente.get('huella') != huella:
+    # Cubo nuevo: las entradas de la versión anterior ya no se van a pedir
+    st.cache_data.clear()
+    vigente['huella'] = huella
 
 # -------------------------------
-# CÁLCULOS BASE
+# FILTROS
 # -------------------------------
-grouped = df.groupby(['Año_Mes_Creacion', 'Año_Mes_Donacion'])
-cohorts = grouped.agg({'Id_donante': 'nunique', 'Monto_Donacion': 'sum'})
-cohort_size = cohorts['Id_donante'].groupby(level=0).first()
-retencion = cohorts['Id_donante'].unstack(0)
-retencion_pc = retencion.divide(cohort_size, axis=0)
+opciones = cargar_opciones(ruta_cubo, huella)
+st.sidebar.header("🔎 Filtros")
+cohortes = opciones['Año_Mes_Creacion']
+desde, hasta = st.sidebar.select_slider("Cohorte (Año_Mes_Creacion)", options=cohortes,
+                                        value=(cohortes[0], cohortes[-1]))
+seleccion = {
+    columna: st.sidebar.multiselect(etiqueta, opciones[columna], default=opciones[columna])
+    for columna, etiqueta in [('Estrategia', 'Estrategia'), ('Método_Pago', 'Método de Pago'),
+                              ('Status_Socio', 'Estado del Socio')]
+}
+filtros = construir_filtros(opciones, desde, hasta, seleccion)
+
+if cargar_datos(ruta_cubo, huella, filtros).empty:
+    st.warning("⚠ No hay donantes para los filtros seleccionados.")
+    st.stop()
 
 # -------------------------------
-# TABS
+# SECCIONES
 # -------------------------------
-tab1, tab2, tab3, tab4 = st.tabs([
+# Solo se calcula y dibuja la sección elegida (st.tabs ejecuta todas)
+SECCIONES = [
     "📈 Heatmaps Clásicos", 
     "📊 Métricas Clave", 
     "🔍 Segmentación",
     "⏱️ Lifetime Analysis"
-])
+]
+seccion = st.radio("Sección", SECCIONES, horizontal=True, label_visibility="collapsed")
 
 # ===============================
-# TAB 1: HEATMAPS
+# SECCIÓN 1: HEATMAPS
 # ===============================
-with tab1:
+if seccion == SECCIONES[0]:
     st.header("Heatmaps de Retención")
     
+    modo_heatmap = st.radio("Modo de visualización", MODOS_HEATMAP, horizontal=True)
+    
     # Heatmap Porcentaje
-    fig1, ax1 = plt.subplots(figsize=(22, 12))
-    sns.heatmap(retencion_pc.T, cmap='cividis', annot=True, fmt='.0%',
-                annot_kws={'size': 12}, linewidths=0.5, linecolor='white',
-                cbar_kws={'shrink': 0.7}, ax=ax1)
-    ax1.set_title('LifeTime expresado en Porcentaje', fontsize=20, pad=20)
-    b, t = ax1.get_ylim()
-    ax1.set_ylim(b+0.5, t-0.5)
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    st.pyplot(fig1)
+    mostrar_heatmap('retencion_pc', modo_heatmap)
     
     # Heatmap Cantidad
-    fig2, ax2 = plt.subplots(figsize=(22, 12))
-    sns.heatmap(retencion.T, cmap='magma', annot=True, fmt='.0f',
-                annot_kws={'size': 12}, linewidths=0.5, linecolor='white',
-                cbar_kws={'shrink': 0.7}, ax=ax2)
-    ax2.set_title('LifeTime expresado en Cantidad de Donantes', fontsize=20, pad=20)
-    b, t = ax2.get_ylim()
-    ax2.set_ylim(b+0.5, t-0.5)
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    st.pyplot(fig2)
+    mostrar_heatmap('retencion', modo_heatmap)
     
     st.markdown("---")
     
     # Heatmap Ingresos
     st.subheader("💵 Ingresos por Cohorte y Período")
-    revenue = df.groupby(['Año_Mes_Creacion', 'Año_Mes_Donacion'])['Monto_Donacion'].sum()
-    revenue_matrix = revenue.unstack(0).T / 1_000_000
-    
-    fig3, ax3 = plt.subplots(figsize=(22, 12))
-    sns.heatmap(revenue_matrix, cmap='YlGn', annot=True, fmt='.1f',
-                annot_kws={'size': 11}, linewidths=0.5, linecolor='white',
-                cbar_kws={'shrink': 0.7, 'label': 'Millones de $'}, ax=ax3)
-    ax3.set_title('Ingresos por Cohorte y Período (en Millones de $)', fontsize=20, pad=20)
-    b, t = ax3.get_ylim()
-    ax3.set_ylim(b+0.5, t-0.5)
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    st.pyplot(fig3)
+    mostrar_heatmap('ingresos', modo_heatmap)
 
 # ===============================
-# TAB 2: MÉTRICAS CLAVE
+# SECCIÓN 2: MÉTRICAS CLAVE
 # ===============================
-with tab2:
+if seccion == SECCIONES[1]:
     st.header("Métricas Clave por Cohorte")
     
     # KPIs Generales
     st.subheader("🎯 KPIs Generales")
     col1, col2, col3, col4 = st.columns(4)
     
-    total_donantes = df['Id_donante'].nunique()
-    df_fugados = df[df['Status_Socio'] == 'Fugado']
-    tasa_fuga_global = (df_fugados['Id_donante'].nunique() / total_donantes * 100)
-    donacion_promedio = df['Monto_Donacion'].mean()
-    ltv_promedio = df.groupby('Id_donante')['Monto_Donacion'].sum().mean()
+    kpis = calcular_kpis(ruta_cubo, huella, filtros)
+    total_donantes = kpis['total_donantes']
+    tasa_fuga_global = kpis['tasa_fuga_global']
+    donacion_promedio = kpis['donacion_promedio']
+    ltv_promedio = kpis['ltv_promedio']
     
     col1.metric("Total Donantes", f"{total_donantes:,}")
     col2.metric("Tasa de Fuga Global", f"{tasa_fuga_global:.1f}%")
@@ -120,21 +301,8 @@ with tab2:
     # Tabla Resumen
     st.subheader("📋 Tabla Resumen por Cohorte")
     
-    resumen_base = df.groupby('Año_Mes_Creacion').agg({
-        'Id_donante': 'nunique',
-        'Monto_Donacion': ['sum', 'mean']
-    })
-    resumen_base.columns = ['Total Donantes', 'Monto Total', 'Donación Promedio']
-    
-    fugados_por_cohorte = df_fugados.groupby('Año_Mes_Creacion')['Id_donante'].nunique()
-    resumen_base['Total Fugados'] = fugados_por_cohorte.reindex(resumen_base.index, fill_value=0).astype(int)
-    resumen_base['Tasa de Fuga (%)'] = (resumen_base['Total Fugados'] / resumen_base['Total Donantes'] * 100).round(2)
-    resumen_base['LTV Promedio'] = resumen_base['Monto Total'] / resumen_base['Total Donantes']
-    
-    # Formatear columnas de dinero
-    resumen_base['Monto Total'] = resumen_base['Monto Total'].apply(lambda x: f"${x:,.0f}")
-    resumen_base['Donación Promedio'] = resumen_base['Donación Promedio'].apply(lambda x: f"${x:,.0f}")
-    resumen_base['LTV Promedio'] = resumen_base['LTV Promedio'].apply(lambda x: f"${x:,.0f}")
+    por_cohorte = calcular_por_cohorte(ruta_cubo, huella, filtros)
+    resumen_base = calcular_resumen_cohortes(ruta_cubo, huella, filtros)
     
     st.dataframe(resumen_base, use_container_width=True, height=400)
     
@@ -145,7 +313,7 @@ with tab2:
     
     with col_graf1:
         st.subheader("💰 Monto Total por Cohorte")
-        monto_cohorte = df.groupby('Año_Mes_Creacion')['Monto_Donacion'].sum()
+        monto_cohorte = por_cohorte['Monto_Total']
         fig4, ax4 = plt.subplots(figsize=(10, 6))
         ax4.bar(range(len(monto_cohorte)), monto_cohorte.values, color='#2E86AB', alpha=0.8)
         ax4.set_xticks(range(len(monto_cohorte)))
@@ -159,7 +327,7 @@ with tab2:
     
     with col_graf2:
         st.subheader("👥 Total Donantes por Cohorte")
-        donantes_cohorte = df.groupby('Año_Mes_Creacion')['Id_donante'].nunique()
+        donantes_cohorte = por_cohorte['Donantes_Nuevos']
         fig5, ax5 = plt.subplots(figsize=(10, 6))
         ax5.bar(range(len(donantes_cohorte)), donantes_cohorte.values, color='#A23B72', alpha=0.8)
         ax5.set_xticks(range(len(donantes_cohorte)))
@@ -172,25 +340,15 @@ with tab2:
         st.pyplot(fig5)
 
 # ===============================
-# TAB 3: SEGMENTACIÓN
+# SECCIÓN 3: SEGMENTACIÓN
 # ===============================
-with tab3:
+if seccion == SECCIONES[2]:
     st.header("Análisis por Segmentos")
     
     # Tabla Estrategia (PRIMERA)
     st.subheader("🎯 Comparación por Estrategia")
     
-    estrategia_donantes = df.groupby('Estrategia')['Id_donante'].nunique()
-    estrategia_monto = df.groupby('Estrategia')['Monto_Donacion'].agg(['sum', 'mean'])
-    estrategia_fugados = df_fugados.groupby('Estrategia')['Id_donante'].nunique()
-    
-    tabla_estrategia = pd.DataFrame({
-        'Total Donantes': estrategia_donantes,
-        'Monto Total': estrategia_monto['sum'].apply(lambda x: f"${x:,.0f}"),
-        'Donación Promedio': estrategia_monto['mean'].apply(lambda x: f"${x:,.0f}"),
-        'Total Fugados': estrategia_fugados.reindex(estrategia_donantes.index, fill_value=0).astype(int),
-        'Tasa Fuga (%)': (estrategia_fugados.reindex(estrategia_donantes.index, fill_value=0) / estrategia_donantes * 100).round(2)
-    })
+    tabla_estrategia = calcular_tabla_segmento(ruta_cubo, huella, filtros, 'Estrategia')
     
     st.dataframe(tabla_estrategia, use_container_width=True)
     
@@ -199,35 +357,18 @@ with tab3:
     # Tabla Método de Pago (SEGUNDA)
     st.subheader("💳 Comparación por Método de Pago")
     
-    metodo_donantes = df.groupby('Método_Pago')['Id_donante'].nunique()
-    metodo_monto = df.groupby('Método_Pago')['Monto_Donacion'].agg(['sum', 'mean'])
-    metodo_fugados = df_fugados.groupby('Método_Pago')['Id_donante'].nunique()
-    
-    tabla_metodo = pd.DataFrame({
-        'Total Donantes': metodo_donantes,
-        'Monto Total': metodo_monto['sum'].apply(lambda x: f"${x:,.0f}"),
-        'Donación Promedio': metodo_monto['mean'].apply(lambda x: f"${x:,.0f}"),
-        'Total Fugados': metodo_fugados.reindex(metodo_donantes.index, fill_value=0).astype(int),
-        'Tasa Fuga (%)': (metodo_fugados.reindex(metodo_donantes.index, fill_value=0) / metodo_donantes * 100).round(2)
-    })
+    tabla_metodo = calcular_tabla_segmento(ruta_cubo, huella, filtros, 'Método_Pago')
     
     st.dataframe(tabla_metodo, use_container_width=True)
 
 # ===============================
-# TAB 4: LIFETIME ANALYSIS
+# SECCIÓN 4: LIFETIME ANALYSIS
 # ===============================
-with tab4:
+if seccion == SECCIONES[3]:
     st.header("Análisis de Lifetime")
     
-    if len(df_fugados) > 0:
-        df_fugados_copy = df_fugados.copy()
-        df_fugados_copy['Meses_Activo'] = (
-            (pd.to_datetime(df_fugados_copy['Fecha_Fuga']) - 
-             pd.to_datetime(df_fugados_copy['Fecha_Creacion'])).dt.days / 30
-        )
-        
-        lifetime_promedio = df_fugados_copy.groupby('Año_Mes_Creacion')['Meses_Activo'].mean()
-        
+    lifetime_promedio = calcular_lifetime(ruta_cubo, huella, filtros)
+    if lifetime_promedio is not None:
         col_lt1, col_lt2 = st.columns(2)
         
         with col_lt1:
@@ -0,0 +1,60 @@
+import importlib
+import os
+import shutil
+import sys
+from datetime import datetime
+
+import pytest
+
+# Las pruebas importan los módulos como paquete (scripts.*), igual que main.py
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+# Dataset chico para las pruebas de capas: 40 socios por mes durante 8 meses
+PARAMETROS_CHICOS = {
+    'socios_mensuales': 40,
+    'tasa_fuga_mensual': 0.05,
+    'fecha_inicio': datetime(2024, 10, 31),
+    'fecha_fin': datetime(2025, 5, 30)
+}
+
+
+def _olvidar_scripts():
+    for nombre in [nombre for nombre in sys.modules if nombre == "scripts" or nombre.startswith("scripts.")]:
+        del sys.modules[nombre]
+
+
+class Proyecto:
+    """Copia de scripts/ con su propia carpeta layer/, importable como paquete scripts."""
+
+    def __init__(self, raiz):
+        self.raiz = str(raiz)
+
+    def modulo(self, nombre):
+        return importlib.import_module(f"scripts.{nombre}")
+
+    def capa(self, *partes):
+        return os.path.join(self.raiz, "layer", *partes)
+
+    def generar(self, **kwargs):
+        parametros = dict(PARAMETROS_CHICOS, **kwargs)
+        return self.modulo("generacion_datos_sinteticos").generar_datos_sinteticos(**parametros)
+
+
+@pytest.fixture
+def proyecto(tmp_path):
+    """
+    Proyecto temporal: las capas calculan sus rutas desde la ubicación de los
+    módulos, así que cada prueba trabaja sobre su propia copia de scripts/.
+    """
+    shutil.copytree(os.path.join(RAIZ, "scripts"), tmp_path / "scripts",
+                    ignore=shutil.ignore_patterns("__pycache__", ".ipynb_checkpoints"))
+    os.makedirs(tmp_path / "layer" / "raw")
+    _olvidar_scripts()
+    sys.path.insert(0, str(tmp_path))
+    try:
+        yield Proyecto(tmp_path)
+    finally:
+        sys.path.remove(str(tmp_path))
+        _olvidar_scripts()
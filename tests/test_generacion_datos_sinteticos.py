@@ -0,0 +1,70 @@
+import hashlib
+import os
+from datetime import datetime
+
+import pyarrow.dataset as ds
+import pytest
+
+from scripts.generacion_datos_sinteticos import generar_datos_sinteticos
+
+# Dataset chico: 50 socios por mes durante 12 meses
+PARAMETROS = {
+    'socios_mensuales': 50,
+    'tasa_fuga_mensual': 0.05,
+    'fecha_inicio': datetime(2024, 6, 30),
+    'fecha_fin': datetime(2025, 5, 30)
+}
+
+
+def _huella_dataset(carpeta):
+    """Hash de las rutas relativas y los bytes de todos los archivos del dataset."""
+    huella = hashlib.sha1()
+    for raiz, carpetas, archivos in sorted(os.walk(carpeta)):
+        carpetas.sort()
+        for archivo in sorted(archivos):
+            ruta = os.path.join(raiz, archivo)
+            huella.update(os.path.relpath(ruta, carpeta).encode("utf-8"))
+            with open(ruta, "rb") as f:
+                huella.update(f.read())
+    return huella.hexdigest()
+
+
+def _generar(tmp_path, nombre, **kwargs):
+    return generar_datos_sinteticos(ruta_salida=str(tmp_path / nombre), **PARAMETROS, **kwargs)
+
+
+def test_mismo_dataset_con_cualquier_cantidad_de_procesos(tmp_path):
+    secuencial = _generar(tmp_path, "secuencial.parquet")
+    paralelo = _generar(tmp_path, "paralelo.parquet", trabajadores=2, meses_por_bloque=2)
+    assert _huella_dataset(secuencial) == _huella_dataset(paralelo)
+
+
+def test_csv_igual_con_cualquier_cantidad_de_procesos(tmp_path):
+    secuencial = _generar(tmp_path, "secuencial.csv", formato="csv")
+    paralelo = _generar(tmp_path, "paralelo.csv", formato="csv", trabajadores=2)
+    with open(secuencial, "rb") as a, open(paralelo, "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_fugas_exactas_por_mes(tmp_path):
+    ruta = _generar(tmp_path, "raw.parquet")
+    df = ds.dataset(ruta, partitioning="hive").to_table().to_pandas()
+    socios = df.drop_duplicates('Id_donante')
+    fugas = socios[socios['Status_Socio'] == 'Fugado'].groupby('Año_Mes_Fuga').size()
+
+    # Cada mes se fugan int(activos * tasa) de los activos después de sumar la cohorte
+    activos = 0
+    esperadas = []
+    for _ in range(12):
+        activos += PARAMETROS['socios_mensuales']
+        num_fugas = int(activos * PARAMETROS['tasa_fuga_mensual'])
+        esperadas.append(num_fugas)
+        activos -= num_fugas
+    assert fugas.reindex(sorted(fugas.index)).tolist() == [n for n in esperadas if n]
+
+
+@pytest.mark.parametrize("tasa", [-0.1, 1.5])
+def test_tasa_fuga_fuera_de_rango(tmp_path, tasa):
+    with pytest.raises(ValueError, match="tasa de fuga"):
+        generar_datos_sinteticos(socios_mensuales=10, tasa_fuga_mensual=tasa,
+                                 ruta_salida=str(tmp_path / "raw.parquet"))
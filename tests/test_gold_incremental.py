@@ -0,0 +1,60 @@
+import os
+import shutil
+from datetime import date
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Meses que llegan en la segunda corrida incremental
+MESES_TARDIOS = ["2025-04", "2025-05"]
+
+
+def _particion(proyecto, mes):
+    return proyecto.capa("raw", "datos_donantes_sinteticos.parquet", f"Año_Mes_Donacion={mes}")
+
+
+def _registrar_fuga(ruta, cohorte, fecha_fuga):
+    """Marca como fugado, en un mes tardío, a un donante activo de una cohorte anterior."""
+    esquema = pq.read_schema(ruta)
+    df = pd.read_parquet(ruta)
+    activos = df[(df['Status_Socio'] == 'Activo') & (df['Año_Mes_Creacion'] == cohorte)]
+    donante = activos['Id_donante'].iloc[0]
+    df = df.astype({'Status_Socio': str, 'Año_Mes_Fuga': object})
+    fila = df['Id_donante'] == donante
+    df.loc[fila, 'Status_Socio'] = 'Fugado'
+    df.loc[fila, 'Fecha_Fuga'] = fecha_fuga
+    df.loc[fila, 'Año_Mes_Fuga'] = fecha_fuga.strftime("%Y-%m")
+    pq.write_table(pa.Table.from_pandas(df, schema=esquema, preserve_index=False), ruta)
+    return donante
+
+
+def _procesar_incremental(proyecto):
+    proyecto.modulo("bronze_layer").procesar_a_bronze(incremental=True)
+    proyecto.modulo("silver_layer").procesar_a_silver(incremental=True)
+    proyecto.modulo("gold_layer").procesar_a_gold(incremental=True, png="omitir")
+
+
+def test_cubo_incremental_igual_al_reconstruido(proyecto, tmp_path):
+    proyecto.generar()
+    for mes in MESES_TARDIOS:
+        shutil.move(_particion(proyecto, mes), tmp_path / mes)
+    _procesar_incremental(proyecto)
+
+    for mes in MESES_TARDIOS:
+        shutil.move(tmp_path / mes, _particion(proyecto, mes))
+    donante = _registrar_fuga(os.path.join(_particion(proyecto, "2025-04"), "part-0.parquet"),
+                              "2024-11", date(2025, 4, 15))
+    _procesar_incremental(proyecto)
+
+    silver = proyecto.modulo("silver_layer")
+    gold = proyecto.modulo("gold_layer")
+    df_silver = silver.leer_silver_incremental(proyecto.capa("silver"))
+    esperado = gold.construir_cubo_cohortes(df_silver[gold.COLUMNAS_CUBO])
+    cubo = pd.read_parquet(proyecto.capa("gold", gold.ARCHIVO_CUBO))
+    pd.testing.assert_frame_equal(cubo, esperado)
+
+    # La fuga nueva movió al donante a 'Fugado' también en los meses ya procesados
+    historial = df_silver[df_silver['Id_donante'] == donante]
+    assert (historial['Año_Mes_Donacion'].astype(str) < "2025-04").any()
+    assert (historial['Status_Socio'] == 'Fugado').all()
@@ -0,0 +1,93 @@
+import json
+import logging
+import os
+import socket
+
+import pytest
+
+from scripts import instrumentacion
+from scripts.instrumentacion import etapa, reiniciar_metricas
+
+
+@pytest.fixture(autouse=True)
+def registro_limpio(monkeypatch):
+    for variable in ["MEDALLON_STATSD", "MEDALLON_PROMETHEUS_ARCHIVO", "MEDALLON_PERFILAR"]:
+        monkeypatch.delenv(variable, raising=False)
+    reiniciar_metricas()
+    yield
+    reiniciar_metricas()
+
+
+@pytest.fixture
+def servidor_statsd():
+    """Socket UDP local que hace de servidor StatsD."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as servidor:
+        servidor.bind(("127.0.0.1", 0))
+        servidor.settimeout(5)
+        yield servidor
+
+
+def test_statsd_recibe_las_metricas_de_la_etapa(monkeypatch, servidor_statsd):
+    monkeypatch.setenv("MEDALLON_STATSD", f"127.0.0.1:{servidor_statsd.getsockname()[1]}")
+    with etapa("silver", "pivot") as medicion:
+        medicion['filas'] = 10
+
+    lineas = servidor_statsd.recv(65535).decode("utf-8").splitlines()
+    assert "medallon.silver.pivot.filas:10|g" in lineas
+    assert any(linea.startswith("medallon.silver.pivot.duracion_ms:") and linea.endswith("|ms")
+               for linea in lineas)
+
+
+@pytest.mark.parametrize("destino, direccion", [
+    ("localhost", ("localhost", 8125)),
+    ("metricas:9125", ("metricas", 9125)),
+    (":9125", ("localhost", 9125)),
+    ("metricas:abc", ("metricas", 8125))
+])
+def test_direccion_statsd(destino, direccion):
+    assert instrumentacion._direccion_statsd(destino) == direccion
+
+
+def test_statsd_sin_puerto_no_interrumpe_la_etapa(monkeypatch):
+    monkeypatch.setenv("MEDALLON_STATSD", "localhost")
+    with etapa("gold", "total") as medicion:
+        medicion['filas'] = 1
+
+
+def test_prometheus_en_archivo(monkeypatch, tmp_path):
+    ruta = tmp_path / "medallon.prom"
+    monkeypatch.setenv("MEDALLON_PROMETHEUS_ARCHIVO", str(ruta))
+    with etapa("bronze", "escritura") as medicion:
+        medicion['filas'] = 5
+        medicion['bytes_escritos'] = 2048
+
+    texto = ruta.read_text(encoding="utf-8")
+    assert '# TYPE medallon_etapa_filas gauge' in texto
+    assert 'medallon_etapa_filas{capa="bronze",etapa="escritura"} 5' in texto
+    assert 'medallon_etapa_bytes_escritos{capa="bronze",etapa="escritura"} 2048' in texto
+    assert list(tmp_path.iterdir()) == [ruta]  # sin temporales
+
+
+def test_error_de_prometheus_no_oculta_el_de_la_etapa(monkeypatch, tmp_path, caplog):
+    monkeypatch.setenv("MEDALLON_PROMETHEUS_ARCHIVO", str(tmp_path / "no_existe" / "medallon.prom"))
+    with caplog.at_level(logging.INFO, logger="medallon.etapas"):
+        with pytest.raises(KeyError, match="original"):
+            with etapa("silver", "lectura"):
+                raise KeyError("original")
+
+    registros = [json.loads(r.message) for r in caplog.records if r.levelno == logging.INFO]
+    assert registros[-1]['estado'] == "error"
+    assert any("Prometheus" in r.message for r in caplog.records if r.levelno == logging.WARNING)
+
+
+def test_perfiles_de_la_misma_etapa_no_se_pisan(monkeypatch, tmp_path):
+    monkeypatch.setenv("MEDALLON_PERFILAR", "cprofile")
+    monkeypatch.setenv("MEDALLON_PERFILES_DIR", str(tmp_path))
+    rutas = []
+    for _ in range(3):
+        with etapa("silver", "pivot") as medicion:
+            pass
+        rutas.append(medicion['perfil'])
+
+    assert len(set(rutas)) == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(os.path.basename(r) for r in rutas)
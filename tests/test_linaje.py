@@ -0,0 +1,70 @@
+import os
+
+from scripts.manifiesto import SIN_CAMBIOS
+
+
+def test_generador_no_regenera_con_los_mismos_parametros(proyecto):
+    ruta = proyecto.generar()
+    marca = os.stat(os.path.join(ruta, "Año_Mes_Donacion=2025-01", "part-0.parquet")).st_mtime_ns
+
+    assert proyecto.generar() == SIN_CAMBIOS
+    assert proyecto.generar(trabajadores=2, meses_por_bloque=3) == SIN_CAMBIOS
+    assert os.stat(os.path.join(ruta, "Año_Mes_Donacion=2025-01", "part-0.parquet")).st_mtime_ns == marca
+
+    assert proyecto.generar(semilla=7) == ruta
+    assert proyecto.generar(semilla=7, forzar=True) == ruta
+
+
+def test_capas_sin_cambios(proyecto):
+    proyecto.generar()
+    bronze = proyecto.modulo("bronze_layer")
+    silver = proyecto.modulo("silver_layer")
+    gold = proyecto.modulo("gold_layer")
+
+    bronze.procesar_a_bronze()
+    silver.procesar_a_silver()
+    gold.procesar_a_gold(png="omitir")
+    assert bronze.procesar_a_bronze() == SIN_CAMBIOS
+    assert silver.procesar_a_silver() == SIN_CAMBIOS
+    assert gold.procesar_a_gold(png="omitir") == SIN_CAMBIOS
+
+    # Regenerar el raw con la misma semilla no invalida Bronze
+    proyecto.generar(forzar=True)
+    assert bronze.procesar_a_bronze() == SIN_CAMBIOS
+
+
+def test_tareas_del_dag_sin_cambios(proyecto):
+    proyecto.generar()
+    bronze = proyecto.modulo("bronze_layer")
+    silver = proyecto.modulo("silver_layer")
+
+    meses = bronze.meses_pendientes_bronze()
+    resultados_bronze = [bronze.ingerir_mes_bronze(mes) for mes in meses]
+    resultados_silver = [silver.procesar_mes_silver(mes) for mes in meses]
+    assert bronze.consolidar_bronze(resultados_bronze) != SIN_CAMBIOS
+    assert silver.consolidar_silver(resultados_silver) != SIN_CAMBIOS
+
+    # Segunda corrida: nada pendiente, cada tarea informa SIN_CAMBIOS (skipped en el DAG)
+    assert bronze.meses_pendientes_bronze() == [] and silver.meses_pendientes_silver() == []
+    assert bronze.ingerir_mes_bronze(meses[0]) is None
+    assert silver.procesar_mes_silver(meses[0]) is None
+    assert bronze.consolidar_bronze([]) == SIN_CAMBIOS
+    assert silver.consolidar_silver([]) == SIN_CAMBIOS
+    assert bronze.consolidar_bronze(resultados_bronze) == SIN_CAMBIOS
+
+
+def test_version_de_codigo_por_capa(proyecto):
+    proyecto.generar()
+    bronze = proyecto.modulo("bronze_layer")
+    bronze.procesar_a_bronze()
+
+    # Un cambio en un módulo que Bronze no importa no invalida su linaje
+    with open(f"{proyecto.raiz}/scripts/gold_layer.py", "a", encoding="utf-8") as f:
+        f.write("\n# cambio de prueba\n")
+    assert bronze.procesar_a_bronze() == SIN_CAMBIOS
+    assert proyecto.generar() == SIN_CAMBIOS
+
+    # Uno en un módulo que importa, sí
+    with open(f"{proyecto.raiz}/scripts/manifiesto.py", "a", encoding="utf-8") as f:
+        f.write("\n# cambio de prueba\n")
+    assert not isinstance(bronze.procesar_a_bronze(), str)  # reprocesa: retorna el DataFrame
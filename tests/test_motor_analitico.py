@@ -0,0 +1,9 @@
+def test_gold_simulado_consistente_con_el_esperado(proyecto):
+    # Perfil por defecto (estandar), el que describe el modelo analítico
+    proyecto.modulo("generacion_datos_sinteticos").generar_datos_sinteticos()
+    proyecto.modulo("bronze_layer").procesar_a_bronze()
+    proyecto.modulo("silver_layer").procesar_a_silver()
+    proyecto.modulo("gold_layer").procesar_a_gold(png="omitir")
+
+    comparacion, consistente = proyecto.modulo("motor_analitico").validar_gold(proyecto.capa("gold"))
+    assert consistente, comparacion.to_string()
@@ -0,0 +1,38 @@
+import hashlib
+
+import pytest
+
+# Archivos de Silver y Gold que el modo completo escribe con cualquier motor
+ARCHIVOS = [
+    ("silver", "donantes_silver.parquet"),
+    ("silver", "donantes_silver_matriz.parquet"),
+    ("silver", "donantes_silver_dim.parquet"),
+    ("gold", "suma_montos_gold.parquet"),
+    ("gold", "cantidad_personas_gold.parquet"),
+    ("gold", "cubo_cohortes_gold.parquet"),
+]
+
+
+def _huellas(proyecto):
+    huellas = {}
+    for capa, nombre in ARCHIVOS:
+        with open(proyecto.capa(capa, nombre), "rb") as f:
+            huellas[nombre] = hashlib.sha1(f.read()).hexdigest()
+    return huellas
+
+
+@pytest.mark.parametrize("motor", ["duckdb", "polars"])
+def test_motor_escribe_los_mismos_archivos_que_pandas(proyecto, motor):
+    pytest.importorskip(motor)
+    proyecto.generar()
+    proyecto.modulo("bronze_layer").procesar_a_bronze()
+    silver = proyecto.modulo("silver_layer")
+    gold = proyecto.modulo("gold_layer")
+
+    silver.procesar_a_silver()
+    gold.procesar_a_gold(png="omitir")
+    esperadas = _huellas(proyecto)
+
+    silver.procesar_a_silver(motor=motor)
+    gold.procesar_a_gold(motor=motor, png="omitir")
+    assert _huellas(proyecto) == esperadas
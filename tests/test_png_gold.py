@@ -0,0 +1,39 @@
+import os
+
+import pandas as pd
+
+
+def _gold(proyecto):
+    proyecto.generar()
+    proyecto.modulo("bronze_layer").procesar_a_bronze()
+    proyecto.modulo("silver_layer").procesar_a_silver()
+    proyecto.modulo("gold_layer").procesar_a_gold(png="omitir")
+    return proyecto.capa("gold")
+
+
+def test_png_sin_cambios_no_se_regenera(proyecto):
+    png_gold = proyecto.modulo("png_gold")
+    carpeta_gold = _gold(proyecto)
+    rutas = png_gold.generar_png_gold(carpeta_gold)
+    assert sorted(os.path.basename(ruta) for ruta in rutas) == sorted(png_gold.TABLAS_PNG.values())
+    modificados = {ruta: os.stat(ruta).st_mtime_ns for ruta in rutas}
+
+    # Gold reprocesado con los mismos datos: mismas tablas, los PNG no se tocan
+    proyecto.modulo("gold_layer").procesar_a_gold(forzar=True, png="sincrono")
+    assert png_gold.generar_png_gold(carpeta_gold) == []
+    assert {ruta: os.stat(ruta).st_mtime_ns for ruta in rutas} == modificados
+
+
+def test_png_de_tabla_cambiada_se_reescribe_con_su_huella(proyecto):
+    png_gold = proyecto.modulo("png_gold")
+    carpeta_gold = _gold(proyecto)
+    png_gold.generar_png_gold(carpeta_gold)
+
+    ruta_parquet = os.path.join(carpeta_gold, "suma_montos_gold.parquet")
+    df = pd.read_parquet(ruta_parquet)
+    df.loc[0, 'Total_Monto'] += 1000
+    df.to_parquet(ruta_parquet, index=False)
+
+    ruta_png = os.path.join(carpeta_gold, png_gold.TABLAS_PNG["suma_montos_gold.parquet"])
+    assert png_gold.generar_png_gold(carpeta_gold) == [ruta_png]
+    assert png_gold._huella_png(ruta_png) == png_gold.huella_tabla(df)
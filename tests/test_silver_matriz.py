@@ -0,0 +1,31 @@
+import pandas as pd
+
+
+def _silver(proyecto):
+    proyecto.generar()
+    proyecto.modulo("bronze_layer").procesar_a_bronze()
+    proyecto.modulo("silver_layer").procesar_a_silver()
+    return pd.read_parquet(proyecto.capa("silver", "donantes_silver.parquet"))
+
+
+def test_matriz_guardada_igual_a_la_construida(proyecto):
+    silver = proyecto.modulo("silver_layer")
+    matriz = silver.construir_matriz_donantes(_silver(proyecto))
+    silver.guardar_matriz_donantes(matriz, proyecto.capa("silver"))
+
+    leida = silver.leer_matriz_donantes(proyecto.capa("silver"))
+    assert leida['meses'] == matriz['meses']
+    pd.testing.assert_frame_equal(silver.vista_densa(leida), silver.vista_densa(matriz))
+
+
+def test_matriz_de_silver_vacio(proyecto, tmp_path):
+    silver = proyecto.modulo("silver_layer")
+    matriz = silver.construir_matriz_donantes(_silver(proyecto).iloc[:0])
+    assert matriz['meses'] == [] and len(matriz['donantes']) == 0 and len(matriz['monto']) == 0
+
+    # Sin celdas, el eje de meses se conserva en los metadatos
+    matriz['meses'] = ["2025-01", "2025-02"]
+    silver.guardar_matriz_donantes(matriz, str(tmp_path))
+    leida = silver.leer_matriz_donantes(str(tmp_path))
+    assert leida['meses'] == ["2025-01", "2025-02"]
+    assert silver.vista_densa(leida).shape == (0, len(silver.COLUMNAS_DONANTE) + 2)